@@ -1,3 +1,4 @@
+import copy
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional
 from dataclasses import dataclass, field
@@ -74,7 +75,9 @@ class IlluminatorModel():
                 self.model_type : {
                     'public': True,
                     'params': list(self.parameters.keys()),
-                    'attrs': list(self.outputs.keys())
+                    # inputs are attributes too, so that connections can reach them
+                    'attrs': list(self.outputs.keys()) + [attr for attr in self.inputs
+                                                           if attr not in self.outputs]
                 }
             }}
         return meta
@@ -124,6 +127,7 @@ class ModelConstructor(ABC, Simulator):
             )
         super().__init__(meta=model.simulator_meta)
         self._model = model
+        self._configs = {}  # configurations of the models that share this simulator, by name
         self.model_entities = {}
         self.time = 0  # time is an interger wihout a unit
 
@@ -156,51 +160,112 @@ class ModelConstructor(ABC, Simulator):
         self.sid = sid
         self.time_resolution = time_resolution
 
-        # This bit of code is unused.
-        # Assuming sim_params is structured as {'sim_params': {model_name: model_data}}
+        # sim_params is structured as {'sim_params': {model_name: model_data, ...}}, with the
+        # configurations of all models of the same type, which are entities of this simulator
         sim_params = sim_params.get('sim_params', {})
-        if len(sim_params) != 1:
-            raise ValueError("Expected sim_params to contain exactly one model.")
+        if len(sim_params) < 1:
+            raise ValueError("Expected sim_params to contain at least one model.")
+        self._configs = sim_params
+
+        # entities accept the parameters and provide the outputs of any of the models
+        model_meta = self.meta['models'][self._model.model_type]
+        for model_data in sim_params.values():
+            for param in model_data.get('parameters') or {}:
+                if param not in model_meta['params']:
+                    model_meta['params'].append(param)
+            for attr in [*(model_data.get('outputs') or {}), *(model_data.get('inputs') or {})]:
+                if attr not in model_meta['attrs']:
+                    model_meta['attrs'].append(attr)
 
         # # Extract the model_name and model_data
         # self.model_name, self.model_data = next(iter(sim_params.items()))
         # self.model = self.load_model_class(self.model_data['model_path'], self.model_data['model_type'])
-        return self._model.simulator_meta
+        return self.meta
     
     def create(self, num:int, model:str, **model_params) -> List[dict]: # This change is mandatory. It MUST contain num and model as parameters otherwise it receives an incorrect number of parameters
-        """Creates an instance of the model"""
+        """Creates instances of the model, one per call in the order of the models passed
+        to `init`. Each entity is named after its model and has its own parameters, inputs
+        and outputs. `model_params` override the parameters of the entities."""
         new_entities = [] # See below why this was created
-        for i in range(num): # this seems ok
-            eid = f"{self._model.simulator_type.value}_{i}" # this seems ok
-            self.model_entities[eid] = self._model # this seems fine
+        names = list(self._configs)
+        for _ in range(num):
+            index = len(self.model_entities)
+            if index < len(names):
+                eid = names[index]
+                model_data = self._configs[eid]
+            else:
+                eid = f"{self._model.simulator_type.value}_{index}"
+                model_data = {}
+            self.model_entities[eid] = IlluminatorModel(
+                parameters={**(model_data.get('parameters') or self._model.parameters), **model_params},
+                inputs=dict(model_data.get('inputs') or self._model.inputs),
+                outputs=dict(model_data.get('outputs') or self._model.outputs),
+                states={},
+                model_type=self._model.model_type
+            )
         # return list(self.model_entities.keys()) # I removed this bit for now. Create is expected to return a list of dictionaries
             new_entities.append({'eid': eid, 'type': model})  # So basically, like this. Later on we can look into other alternatives if needed.
         return new_entities
     
+    def get_state(self) -> dict:
+        """Returns the state of the simulator for a checkpoint: its time and the
+        inputs, outputs and states of every entity. Models that keep other values
+        between steps extend it with them.
+
+        Returns
+        -------
+        dict
+            A copy of the state, which can be pickled. Example::
+
+                {'time': 96, 'entities': {'Battery1': {'inputs': {...}, 'outputs': {...},
+                                                       'states': {...}, 'time': None}}}
+        """
+        return copy.deepcopy({
+            'time': self.time,
+            'entities': {eid: {'inputs': model.inputs, 'outputs': model.outputs,
+                               'states': model.states, 'time': model.time}
+                         for eid, model in self.model_entities.items()}
+        })
+
+    def set_state(self, state: dict) -> None:
+        """Restores a state returned by `get_state`, after the entities are created.
+        Parameters are not part of the state, so that a checkpoint can be continued
+        with other parameters."""
+        unknown = set(state['entities']) - set(self.model_entities)
+        if unknown:
+            raise ValueError(f"Entities {sorted(unknown)} of the checkpoint are not entities of {self.sid}.")
+        state = copy.deepcopy(state)
+        self.time = state['time']
+        for eid, values in state['entities'].items():
+            model = self.model_entities[eid]
+            model.inputs = values['inputs']
+            model.outputs = values['outputs']
+            model.states = values['states']
+            model.time = values['time']
+
     def current_time(self): 
         """Returns the current time of the simulation"""
         pass
         # TODO: implement this method
 
-    def get_data(self) -> Dict:
+    def get_data(self, outputs: dict) -> Dict:
         """Expose model outputs and states to the simulation environment
-        
+
+        Parameters
+        ----------
+        outputs: dict
+            The requested attributes by entity id, e.g. ``{'Adder1': ['out1']}``.
+
         Returns
         -------
         Dict
-            A dictionary of model outputs and states.
+            A dictionary of model outputs and states of the requested entities.
         """
         data = {}
-
-        for eid, attrs in self._model.outputs.items():
+        for eid, attrs in outputs.items():
             model_instance = self.model_entities[eid]
-            data[eid] = {}
-            for attr in attrs:
-                if attr in model_instance.outputs:
-                    data[eid][attr] = model_instance.outputs[attr]
-                else:
-                    data[eid][attr] = model_instance.states[attr]
-
+            data[eid] = {attr: model_instance.outputs.get(attr, model_instance.states.get(attr))
+                         for attr in attrs}
         return data
 
 
@@ -0,0 +1,79 @@
+"""
+Checkpoints of simulations: the state of a simulation at a time of the
+simulation, saved periodically so that a long simulation can be resumed
+after a failure, or so that several simulations can start from the state
+reached at the end of a shared spin-up period.
+"""
+
+from __future__ import annotations
+
+import os
+import glob
+import pickle
+
+DEFAULT_DIRECTORY = './checkpoints'
+FILE_PATTERN = 'checkpoint-*.pkl'
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    """Writes `state` to `path`. The file is replaced at once, so that a
+    failure while writing leaves the previous checkpoint intact."""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as _file:
+        pickle.dump(state, _file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+
+def load_checkpoint(path: str) -> dict:
+    """Returns the state stored in the checkpoint file `path`."""
+    with open(path, 'rb') as _file:
+        return pickle.load(_file)
+
+
+def latest_checkpoint(directory: str) -> str | None:
+    """Returns the path of the checkpoint of `directory` taken at the latest
+    simulation time, or None if there is none."""
+    paths = glob.glob(os.path.join(directory, FILE_PATTERN))
+    return max(paths, default=None)
+
+
+class Checkpoints:
+    """
+    Saves the state of a simulation every `every` units of simulation time.
+
+    Checkpoints are written to `directory` as 'checkpoint-<time>.pkl', with
+    the time padded with zeros so that the names sort by time. Only the last
+    `keep` checkpoints are kept. Checkpoints are pickled, so they must only
+    be loaded from trusted sources.
+
+    Parameters
+    ----------
+    every : int
+        Number of units of simulation time between two checkpoints.
+    directory : str
+        Directory to which checkpoints are written. It is created if needed.
+    keep : int
+        Number of checkpoints kept, the older ones are deleted.
+    """
+
+    def __init__(self, every: int, directory: str = DEFAULT_DIRECTORY, keep: int = 1) -> None:
+        if every < 1 or keep < 1:
+            raise ValueError("'every' and 'keep' must be positive integers.")
+        self.every = every
+        self.directory = directory
+        self.keep = keep
+
+    def next_time(self, time: int) -> int:
+        """Returns the time of the first checkpoint after `time`."""
+        return (time // self.every + 1) * self.every
+
+    def save(self, state: dict) -> str:
+        """Writes a checkpoint of `state`, which holds the simulation 'time',
+        deletes the oldest checkpoints, and returns the path of the new one."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"checkpoint-{state['time']:012d}.pkl")
+        save_checkpoint(path, state)
+        paths = sorted(glob.glob(os.path.join(self.directory, FILE_PATTERN)))
+        for old in paths[:-self.keep]:
+            os.remove(old)
+        return path
@@ -10,6 +10,7 @@ from pathlib import Path
 # from illuminator.cluster import build_runshfile 
 from illuminator.schema.simulation import load_config_file
 from illuminator.engine import Simulation
+from illuminator.sweep import load_sweep_file, run_sweep
 
 APP_NAME = "illuminator"
 DEFAULT_PORT = 5123
@@ -24,13 +25,30 @@ cluster_app = typer.Typer()
 app.add_typer(cluster_app, name="cluster", help="Utilities for a RaspberryPi cluster.")
 
 @scenario_app.command("run")
-def scenario_run(config_file: Annotated[str, typer.Argument(help="Path to scenario configuration file.")] = "config.yaml"):
+def scenario_run(config_file: Annotated[str, typer.Argument(help="Path to scenario configuration file.")] = "config.yaml",
+                 profile: Annotated[bool, typer.Option(help="Print the time spent in every simulator at the end.")] = False,
+                 trace: Annotated[str, typer.Option(help="Write a Chrome trace (JSON) of the calls to the simulators to this file.")] = None,
+                 resume: Annotated[bool, typer.Option(help="Continue the simulation from its latest checkpoint.")] = False,
+                 checkpoint: Annotated[str, typer.Option(help="Continue the simulation from this checkpoint file.")] = None):
     "Runs a simulation scenario using a YAML file."
 
     simulation = Simulation(config_file)
-    simulation.run()
+    simulation.run(profile=profile, trace_file=trace, resume=checkpoint or resume)
     
 
+@scenario_app.command("sweep")
+def scenario_sweep(sweep_file: Annotated[str, typer.Argument(help="Path to sweep file.")] = "sweep.yaml",
+                   workers: Annotated[int, typer.Option(help="Number of variants run in parallel. Defaults to the number of processors.")] = None):
+    "Runs the variants of a simulation scenario defined by a sweep file in parallel."
+
+    sweep = load_sweep_file(sweep_file)
+    summary = run_sweep(sweep, workers=workers)
+    failed = (summary['status'] != 'ok').sum()
+    print(f"{len(summary) - failed} of {len(summary)} variants succeeded. Summary written to {sweep['output_dir']}")
+    if failed:
+        raise typer.Exit(code=1)
+
+
 @cluster_app.command("build")
 def cluster_build(config_file: Annotated[str, typer.Argument(help="Path to scenario configuration file.")] = "config.yaml"):
     """Builds the run.sh files for a cluster of Raspberry Pi's."""
@@ -0,0 +1,350 @@
+"""
+Direct execution of scenarios whose simulators all run in this process and
+are time-based or event-based: the methods of the simulators are called in a
+loop, in a fixed order given by the connections, without the scheduling and
+data handling of mosaik.
+
+`DirectWorld` provides the subset of the interface of ``mosaik.World`` used
+by the engine, so that scenarios are built in the same way for both kinds of
+execution.
+"""
+
+import time
+import importlib
+from mosaik_api_v3 import Simulator
+
+
+class DirectEntity:
+    """An entity created in a simulator of a `DirectWorld`, like ``mosaik.scenario.Entity``."""
+
+    __slots__ = ('sid', 'eid', 'type', 'children')
+
+    def __init__(self, sid: str, eid: str, type: str, children: list = None) -> None:
+        self.sid = sid
+        self.eid = eid
+        self.type = type
+        self.children = children or []
+
+    @property
+    def full_id(self) -> str:
+        return f'{self.sid}.{self.eid}'
+
+    def __repr__(self) -> str:
+        return f'DirectEntity({self.full_id!r})'
+
+
+class DirectModel:
+    """Creates entities of one model of a simulator, like ``mosaik.scenario.ModelMock``."""
+
+    def __init__(self, simulator: '_DirectSimulator', name: str) -> None:
+        self._simulator = simulator
+        self.name = name
+
+    def __call__(self, **model_params) -> DirectEntity:
+        return self.create(1, **model_params)[0]
+
+    def create(self, num: int, **model_params) -> list:
+        params = self._simulator.meta['models'][self.name].get('params', [])
+        unexpected = set(model_params).difference(params)
+        if unexpected:
+            raise TypeError(f"create() got unexpected keyword arguments: {', '.join(sorted(unexpected))}")
+        entities = self._simulator.sim.create(num, self.name, **model_params)
+        if len(entities) != num:
+            raise ValueError(f'{num} entities were requested but {len(entities)} were created.')
+        sid = self._simulator.sid
+
+        def make(entity):
+            return DirectEntity(sid, entity['eid'], entity['type'],
+                                [make(child) for child in entity.get('children', [])])
+        return [make(entity) for entity in entities]
+
+
+class DirectModelFactory:
+    """Gives access to the public models of a simulator, like ``mosaik.scenario.ModelFactory``."""
+
+    def __init__(self, simulator: '_DirectSimulator') -> None:
+        self._simulator = simulator
+        self.meta = simulator.meta
+
+    def __getattr__(self, name: str) -> DirectModel:
+        models = self.__dict__['meta']['models']
+        if name not in models or not models[name].get('public', True):
+            raise AttributeError(f"Model '{name}' is not a public model of {self._simulator.sid}.")
+        return DirectModel(self._simulator, name)
+
+
+class _ProfiledSimulator:
+    """Passes the calls to the methods of a simulator to it, and reports their
+    duration to a ``illuminator.profiling.Profiler``."""
+
+    def __init__(self, sim: Simulator, sid: str, profiler) -> None:
+        self._sim = sim
+        self._sid = sid
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._sim, name)
+        if not callable(attr):
+            return attr
+        sid, profiler = self._sid, self._profiler
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = attr(*args, **kwargs)
+                return result
+            finally:
+                profiler.record(sid, name, start, time.perf_counter(), result)
+
+        return timed
+
+
+class _DirectSimulator:
+    """State of one simulator of a `DirectWorld`."""
+
+    __slots__ = ('sid', 'sim', 'meta', 'event_based', 'next_step', 'stepped_at', 'data', 'has_data',
+                 'sources', 'outputs', 'inputs')
+
+    def __init__(self, sid: str, sim: Simulator, meta: dict) -> None:
+        self.sid = sid
+        self.sim = sim
+        self.meta = meta
+        self.event_based = meta.get('type') == 'event-based'
+        # event-based simulators step when a source steps, unless they schedule a step
+        self.next_step = None if self.event_based else 0
+        self.stepped_at = None  # time of the last step
+        self.data = {}  # last values of the requested outputs, by entity id and attribute
+        self.has_data = False
+        # (destination entity id, destination attribute, source simulator, source entity id,
+        # source attribute, source full id) of every input
+        self.sources = []
+        self.outputs = {}  # attributes requested from get_data, by entity id
+        self.inputs = {}  # inputs passed to step, filled in place
+
+
+class DirectWorld:
+    """
+    Runs a scenario by calling the simulators directly, in one process.
+
+    All simulators are started in this process from their 'python' entry of
+    `sim_config`. At every time at which simulators step, they step in a
+    topological order of the connections, so that every simulator receives
+    the outputs its predecessors produced at the same time or earlier. As in
+    mosaik, the last value of every output of time-based and hybrid
+    simulators is received until a new value is produced, while the outputs
+    of event-based simulators are only received at the time they are
+    produced. Event-based simulators step at the times at which one of their
+    sources steps, and at the times they schedule themselves. Inputs are
+    passed in dictionaries that are filled in place at every step.
+
+    Time-based simulators, event-based simulators, and hybrid simulators
+    without triggers are supported; connections must not form cycles. Use
+    ``mosaik.World`` for scenarios with remote simulators or triggers.
+
+    The state of the simulation can be saved in checkpoints while it runs,
+    and a simulation can be resumed from a checkpoint, if all simulators
+    have `get_state` and `set_state` methods. See `run`.
+
+    Parameters
+    ----------
+    sim_config : dict
+        Simulators by name, e.g. ``{'CSV': {'python': 'illuminator.models:CSV'}}``.
+    time_resolution : int
+        Number of seconds of one unit of simulation time.
+    profiler : illuminator.profiling.Profiler
+        If given, the calls to the methods of the simulators are timed and
+        recorded by the profiler.
+    """
+
+    def __init__(self, sim_config: dict, time_resolution: int = 1, profiler=None) -> None:
+        self.sim_config = sim_config
+        self.time_resolution = time_resolution
+        self.profiler = profiler
+        self.sims = {}
+        self._counters = {}
+        self._connections = []  # (source entity, destination entity, source attribute, destination attribute)
+
+    def start(self, sim_name: str, sim_id: str = None, **sim_params) -> DirectModelFactory:
+        """Starts the simulator `sim_name` of `sim_config` with the parameters
+        `sim_params` of its init. Like in mosaik, the simulator is named `sim_id`,
+        or '<sim_name>-<number>' if it is not given."""
+        config = self.sim_config.get(sim_name)
+        if config is None or 'python' not in config:
+            raise ValueError(f"Simulator '{sim_name}' must be a Python class ('python' entry of "
+                             "sim_config) to run in direct execution.")
+        module_name, class_name = config['python'].split(':')
+        sim = getattr(importlib.import_module(module_name), class_name)()
+
+        if sim_id is None:
+            number = self._counters.get(sim_name, 0)
+            self._counters[sim_name] = number + 1
+            sim_id = f'{sim_name}-{number}'
+        if sim_id in self.sims:
+            raise ValueError(f"A simulator with sim_id '{sim_id}' has already been started.")
+        sid = sim_id
+        if self.profiler is not None:
+            sim = _ProfiledSimulator(sim, sid, self.profiler)
+        meta = sim.init(sid, **{'time_resolution': self.time_resolution, **sim_params})
+        if meta.get('type') == 'hybrid' and any(
+                model.get('trigger') for model in meta['models'].values()):
+            raise ValueError(f"Simulator {sid} has triggers, which are not supported in direct "
+                             "execution.")
+        self.sims[sid] = _DirectSimulator(sid, sim, meta)
+        return DirectModelFactory(self.sims[sid])
+
+    def connect(self, src: DirectEntity, dest: DirectEntity, *attr_pairs) -> None:
+        """Connects the outputs of `src` to the inputs of `dest`. Attribute pairs are
+        tuples ``(output, input)`` or a name used for both."""
+        for pair in attr_pairs:
+            src_attr, dest_attr = (pair, pair) if isinstance(pair, str) else pair
+            self._connections.append((src, dest, src_attr, dest_attr))
+
+    def _order(self) -> list:
+        """Returns the simulators in a topological order of the connections."""
+        successors = {sid: set() for sid in self.sims}
+        for src, dest, _, _ in self._connections:
+            if src.sid == dest.sid:
+                raise ValueError(f'{src.full_id} is connected to {dest.full_id} of the same simulator, '
+                                 'which is not supported in direct execution.')
+            successors[src.sid].add(dest.sid)
+        order = []
+        state = {}  # 1 while visiting, 2 when done
+
+        def visit(sid):
+            if state.get(sid) == 2:
+                return
+            if state.get(sid) == 1:
+                raise ValueError(f'The connections of {sid} form a cycle, which is not supported in '
+                                 'direct execution.')
+            state[sid] = 1
+            for successor in sorted(successors[sid]):
+                visit(successor)
+            state[sid] = 2
+            order.append(sid)
+
+        for sid in self.sims:
+            visit(sid)
+        return [self.sims[sid] for sid in reversed(order)]
+
+    def _fill_inputs(self, simulator: _DirectSimulator, time: int) -> dict:
+        """Updates the inputs of `simulator` with the last outputs of its sources,
+        and with the outputs of its event-based sources produced at `time`."""
+        inputs = simulator.inputs
+        for dest_eid, dest_attr, source, src_eid, src_attr, src_full_id in simulator.sources:
+            if not source.has_data or (source.event_based and source.stepped_at != time):
+                # like in mosaik, inputs without values are left out
+                values = inputs.get(dest_eid, {}).get(dest_attr)
+                if values is not None and src_full_id in values:
+                    del values[src_full_id]
+                    if not values:
+                        del inputs[dest_eid][dest_attr]
+                        if not inputs[dest_eid]:
+                            del inputs[dest_eid]
+                continue
+            values = inputs.get(dest_eid, {}).get(dest_attr)
+            if values is None:
+                values = inputs.setdefault(dest_eid, {}).setdefault(dest_attr, {})
+            values[src_full_id] = source.data.get(src_eid, {}).get(src_attr)
+        return inputs
+
+    def _triggered(self, simulator: _DirectSimulator, time: int) -> bool:
+        """Returns True if `simulator` is event-based and one of its sources stepped at `time`."""
+        return simulator.event_based and any(
+            source.stepped_at == time for _, _, source, _, _, _ in simulator.sources)
+
+    def get_state(self, time: int) -> dict:
+        """Returns the state of the simulation at `time`, before the steps at
+        `time`: the state of every simulator, from its `get_state` method, and
+        the times of their next steps and their last outputs."""
+        simulators = {}
+        for sid, simulator in self.sims.items():
+            if not hasattr(simulator.sim, 'get_state'):
+                raise ValueError(f'{sid} cannot be checkpointed: {type(simulator.sim).__name__} '
+                                 'has no get_state method.')
+            simulators[sid] = {'state': simulator.sim.get_state(), 'next_step': simulator.next_step,
+                               'data': simulator.data, 'has_data': simulator.has_data}
+        return {'time': time, 'simulators': simulators}
+
+    def set_state(self, state: dict) -> None:
+        """Restores a state returned by `get_state` in the simulators, once
+        their entities are created."""
+        if set(state['simulators']) != set(self.sims):
+            raise ValueError(f"The checkpoint has the simulators {sorted(state['simulators'])}, but "
+                             f"the scenario has {sorted(self.sims)}.")
+        for sid, values in state['simulators'].items():
+            simulator = self.sims[sid]
+            simulator.sim.set_state(values['state'])
+            simulator.next_step = values['next_step']
+            simulator.data = values['data']
+            simulator.has_data = values['has_data']
+
+    def run(self, until: int, checkpoints=None, resume: dict = None) -> None:
+        """
+        Runs the simulation until the simulation time `until`, excluded.
+
+        Parameters
+        ----------
+        until : int
+            The end of the simulation.
+        checkpoints : illuminator.checkpoint.Checkpoints
+            If given, the state of the simulation is saved every `checkpoints.every`
+            units of time. The state is also taken once before the first step, so that
+            a simulator that cannot be checkpointed fails at the start.
+        resume : dict
+            A state saved in a checkpoint. If given, the simulation continues from the
+            time of the checkpoint.
+        """
+        order = self._order()
+        for src, dest, src_attr, dest_attr in self._connections:
+            source = self.sims[src.sid]
+            source.outputs.setdefault(src.eid, [])
+            if src_attr not in source.outputs[src.eid]:
+                source.outputs[src.eid].append(src_attr)
+            self.sims[dest.sid].sources.append(
+                (dest.eid, dest_attr, source, src.eid, src_attr, src.full_id))
+
+        for simulator in order:
+            simulator.sim.setup_done()
+
+        time = 0
+        if resume is not None:
+            self.set_state(resume)
+            time = resume['time']
+        if checkpoints is not None:
+            self.get_state(time)
+            next_checkpoint = checkpoints.next_time(time)
+
+        while time < until:
+            if checkpoints is not None and time >= next_checkpoint:
+                checkpoints.save(self.get_state(time))
+                next_checkpoint = checkpoints.next_time(time)
+            for simulator in order:
+                if simulator.next_step != time and not self._triggered(simulator, time):
+                    continue
+                inputs = self._fill_inputs(simulator, time)
+                next_step = simulator.sim.step(time, inputs, until)
+                simulator.stepped_at = time
+                if simulator.outputs:
+                    simulator.data = simulator.sim.get_data(simulator.outputs)
+                    simulator.data.pop('time', None)  # output time of event-based simulators
+                    simulator.has_data = True
+                if next_step is None:
+                    simulator.next_step = None
+                elif next_step <= time:
+                    raise ValueError(f'{simulator.sid} returned step {next_step} at time {time}; '
+                                     'the next step must be later.')
+                else:
+                    simulator.next_step = next_step
+            steps = [simulator.next_step for simulator in order if simulator.next_step is not None]
+            if not steps:
+                break
+            time = min(steps)
+
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """Finalizes all simulators."""
+        sims, self.sims = self.sims, {}
+        for simulator in sims.values():
+            simulator.sim.finalize()
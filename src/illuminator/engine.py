@@ -4,16 +4,24 @@ serves as a wrapper for the Mosaik API.
 By: M. Rom & M. Garcia Alvarez
 """
 
+from __future__ import annotations
+
 import math
 import importlib.util
+from contextlib import nullcontext
 from mosaik.scenario import Entity as MosaikEntity
 from mosaik.scenario import World as MosaikWorld
 from datetime import datetime
 from illuminator.schema.simulation import load_config_file
+from illuminator.timeseries import is_columnar
+from illuminator.profiling import Profiler
+from illuminator.direct import DirectWorld
+from illuminator.checkpoint import Checkpoints, DEFAULT_DIRECTORY, latest_checkpoint, load_checkpoint
 
 current_model = {}
 
-def create_world(sim_config: dict, time_resolution: int) -> MosaikWorld:
+def create_world(sim_config: dict, time_resolution: int, execution: str = 'mosaik',
+                 profiler: Profiler = None) -> MosaikWorld | DirectWorld:
     """
     Creates a Mosaik world object based on the simulation configuration.
 
@@ -23,13 +31,27 @@ def create_world(sim_config: dict, time_resolution: int) -> MosaikWorld:
         The simulation configuration for the Mosaik world.
     time_resolution: int
         The time resolution of the simulation in seconds.
+    execution: str
+        'mosaik' to run the simulation with mosaik, or 'direct' to call the simulators
+        directly in this process (see ``illuminator.direct.DirectWorld``). In 'direct'
+        execution, the Collector also runs in this process.
+    profiler: Profiler
+        The profiler of the simulation, if any. In 'direct' execution, the world reports
+        the calls to the simulators to it. In 'mosaik' execution, calls are recorded
+        through the proxies of mosaik while the profiler is attached.
 
     Returns
     -------
-    mosaik.World
+    mosaik.World | DirectWorld
         The Mosaik world object.
     """
 
+    if execution == 'direct':
+        sim_config = {**sim_config, 'Collector': {'python': 'illuminator.models:Collector'}}
+        return DirectWorld(sim_config, time_resolution=time_resolution, profiler=profiler)
+    if execution != 'mosaik':
+        raise ValueError(f"Unknown execution '{execution}'. Valid executions are 'mosaik' and 'direct'.")
+
     world = MosaikWorld(sim_config, time_resolution=time_resolution)
     return world
 
@@ -68,10 +90,21 @@ def apply_default_values(config_simulation: dict) -> dict:
     # TODO: set other default values
 
     if 'time_resolution' not in config_simulation['scenario']:
-        config_simulation.update(time_resolution)
+        config_simulation['scenario'].update(time_resolution)
     # file to store the results
     if 'file' not in config_simulation['monitor']:
-        config_simulation.update(out_file)
+        config_simulation['monitor'].update(out_file)
+    # format of the results file, inferred from its extension
+    if 'format' not in config_simulation['monitor']:
+        extension = config_simulation['monitor']['file'].rsplit('.', 1)[-1]
+        config_simulation['monitor']['format'] = 'parquet' if extension == 'parquet' else 'csv'
+    # without a list of sinks, results are written to 'file' in the given 'format'
+    if 'sinks' not in config_simulation['monitor']:
+        sink = {'type': config_simulation['monitor']['format'],
+                'file': config_simulation['monitor']['file']}
+        if 'row_group_size' in config_simulation['monitor']:
+            sink['row_group_size'] = config_simulation['monitor']['row_group_size']
+        config_simulation['monitor']['sinks'] = [sink]
 
     #TODO: Write a unit test for this
     return config_simulation
@@ -136,9 +169,119 @@ def generate_mosaik_configuration(config_simulation:dict,  collector:str =None)
     return mosaik_configuration
 
 
-def start_simulators(world: MosaikWorld, models: list) -> dict:
+def csv_simulator_key(parameters: dict) -> tuple:
+    """
+    Returns the key of the simulator of a CSV model. CSV models with the same key
+    read the same file with the same parameters, and share one simulator.
+    """
+    options = {key: value for key, value in parameters.items()
+               if key not in ('start', 'datafile', 'columns')}
+    return (parameters['start'], parameters['datafile'], repr(sorted(options.items())))
+
+
+def used_attributes(model_name: str, connections: list, monitor_config: dict) -> set:
+    """
+    Returns the attributes of a model that are used by the connections or
+    monitored. Attributes '<attr>_horizon' of CSV models count as '<attr>'.
+    """
+    names = [connection['from'] for connection in connections]
+    names += [split_monitor_item(item)[0] for item in monitor_config.get('items', [])]
+    attributes = set()
+    for name in names:
+        from_model, from_attr = name.split('.')
+        if from_model == model_name:
+            if from_attr.endswith('_horizon'):
+                from_attr = from_attr[:-len('_horizon')]
+            attributes.add(from_attr)
+    return attributes
+
+
+def csv_read_columns(models: list, connections: list, monitor_config: dict) -> dict:
+    """
+    Returns the attributes read by each CSV simulator of a Parquet or Feather
+    file, by simulator key: the `columns` of its models or, if they are not
+    given, the attributes that are used.
+    """
+    read_columns = {}
+    for model in models:
+        parameters = model.get('parameters', {})
+        if model['type'] != 'CSV' or not is_columnar(parameters.get('datafile', '')) \
+                or 'start' not in parameters:
+            continue
+        columns = parameters.get('columns')
+        if columns is None:
+            columns = used_attributes(model['name'], connections, monitor_config)
+        key = csv_simulator_key(parameters)
+        read_columns[key] = read_columns.get(key, set()) | set(columns)
+    return read_columns
+
+
+def _has_cycle(successors: dict) -> bool:
+    """Returns True if the directed graph of `successors`, a set of nodes by node, has a cycle."""
+    state = {}  # 1 while visiting, 2 when done
+
+    def visit(node):
+        state[node] = 1
+        for successor in successors.get(node, ()):
+            if state.get(successor) == 1 or (successor not in state and visit(successor)):
+                return True
+        state[node] = 2
+        return False
+
+    return any(node not in state and visit(node) for node in list(successors))
+
+
+def simulator_groups(models: list, connections: list = None) -> dict:
+    """
+    Returns the number of the simulator of every model that is not a CSV model, by model name.
+    Models of the same type share a simulator, unless sharing it would make the connections
+    between simulators form a cycle, e.g. when the models are connected to each other. Such
+    models are run by several simulators of their type.
+
+    Parameters
+    ----------
+    models: list
+        The models of the configuration file.
+    connections: list
+        The connections of the configuration file.
+
+    Returns
+    -------
+    dict
+        Numbers of the simulators by model name, counted per model type, e.g.
+        {'Adder1': 0, 'Adder2': 1, 'PV': 0}
+    """
+    links = [(connection['from'].split('.')[0], connection['to'].split('.')[0])
+             for connection in connections or []]
+    groups = {}  # model name -> (type, number) of the models placed so far
+
+    def forms_cycle():
+        successors = {}
+        for src, dest in links:
+            successors.setdefault(groups.get(src, src), set()).add(groups.get(dest, dest))
+        return _has_cycle(successors)
+
+    counts = {}
+    for model in models:
+        if model['type'] == 'CSV':
+            continue
+        for number in range(counts.get(model['type'], 0) + 1):
+            groups[model['name']] = (model['type'], number)
+            if not forms_cycle():
+                break
+        counts[model['type']] = max(counts.get(model['type'], 0), number + 1)
+    return {name: number for name, (_, number) in groups.items()}
+
+
+def start_simulators(world: MosaikWorld, models: list, connections: list = None,
+                     monitor_config: dict = None, end_time: str = None) -> dict:
         """
-        Instantiates simulators in the Mosaik world based on the model configurations .
+        Instantiates simulators in the Mosaik world based on the model configurations.
+        Models of the same type share one simulator, named '<type>-<number>', in which every
+        model is an entity created with its own parameters. Models connected to each other,
+        directly or through other models, are kept in separate simulators of their type, see
+        `simulator_groups`. CSV models share a simulator when they read the same file with
+        the same parameters.
         
         Parameters
         ----------
@@ -147,14 +290,37 @@ def start_simulators(world: MosaikWorld, models: list) -> dict:
         models: dict
             A list of models to be started for the Mosaik world as defined by 
             Illuminator's schema.
+        connections: list
+            The connections of the simulation, which decide which models share a simulator.
+            If given with `monitor_config`, CSV models of Parquet and Feather files only read
+            the attributes that are used.
+        monitor_config: dict
+            The monitor section of the configuration file.
+        end_time: str
+            End time of the simulation. If given, CSV models of Parquet and Feather files do
+            not read the rows after it.
 
         Returns
         -------
         dict
-            A dictionary of simulator entities (instances) created for the Mosaik world.
+            A dictionary of simulator entities (instances) created for the Mosaik world,
+            by model name.
         """
 
         model_entities = {}
+        # CSV simulators by their parameters, so that models that read the same file share one simulator
+        csv_simulators = {}
+        # simulators of the other models by type and number, and the configurations of their models
+        groups = simulator_groups(models, connections)
+        simulators = {}
+        models_by_group = {}
+        for model in models:
+            if model['type'] != 'CSV':
+                group = (model['type'], groups[model['name']])
+                models_by_group.setdefault(group, {})[model['name']] = model
+        read_columns = {}
+        if connections is not None and monitor_config is not None:
+            read_columns = csv_read_columns(models, connections, monitor_config)
 
         for model in models:
             model_name = model['name']
@@ -172,45 +338,46 @@ def start_simulators(world: MosaikWorld, models: list) -> dict:
                 if 'start' not in model_parameters.keys() or 'datafile' not in model_parameters.keys():
                     raise ValueError("The CSV model requires 'start' and 'datafile' parameters. Check your YAML configuration file.")
                 
-                simulator = world.start(sim_name=model_name,
-                                         sim_start=model_parameters['start'], datafile=model_parameters['datafile'])
+                # other parameters, such as 'delimiter' or 'preload', are passed as they are
+                options = {key: value for key, value in model_parameters.items()
+                           if key not in ('start', 'datafile', 'columns')}
+                key = csv_simulator_key(model_parameters)
+                if is_columnar(model_parameters['datafile']):
+                    if key in read_columns:
+                        options['usecols'] = sorted(read_columns[key])
+                    if end_time is not None:
+                        options['sim_end'] = end_time
+                simulator = csv_simulators.get(key)
+                if simulator is None:
+                    simulator = world.start(model_name,
+                                             sim_start=model_parameters['start'], datafile=model_parameters['datafile'],
+                                             **options)
+                    csv_simulators[key] = simulator
                 
                 model_factory = getattr(simulator, model_type)
-                entity = model_factory.create(num=1)
+                entity = model_factory.create(num=1, columns=model_parameters.get('columns'))
                 
             else:
-                simulator = world.start(sim_name=model_name,
-                                    # **model_parameters
-                                    model_name = model_name,
-                                    sim_params= {model_name: model} # This value gets picked up in the init() function
-                                    # Some items must be passed here, and some other at create()
-                                    )
+                group = (model_type, groups[model_name])
+                simulator = simulators.get(group)
+                if simulator is None:
+                    # the first model of a group starts the simulator of all models of the group
+                    simulator = world.start(model_name,
+                                        sim_id=f'{model_type}-{group[1]}',
+                                        model_name = model_name,
+                                        sim_params= models_by_group[group] # This value gets picked up in the init() function
+                                        # Some items must be passed here, and some other at create()
+                                        )
+                    simulators[group] = simulator
         
-                # TODO: make all parameters in create() **kwargs
                 # TODO: model_type must match model name in META for the simulator
                 
                 # allows instantiating an entity by using the value of 'model_type' dynamically
                 model_factory = getattr(simulator, model_type) 
-                # Mulple entities entities for the same model are created
-                # one at a time. This is by design.
-                # TODO: parameters must be passed as **kwargs in create().
-                # This should be fixed by adapting models to use the Illumnator's interface
-
-                # TODO:
-                # this is a temporary solution to continue developing the CLI
-
-                # TODO: If we wish to use different values here, we must define the parameters used here within the appropriate .yaml file.
-                # Right now adder.yaml defines the custom parameters as "param1"
-                
-        #         entity = model_factory.create(num=1, sim_start='2012-01-01 00:00:00', 
-        #                                     panel_data={'Module_area': 1.26, 'NOCT': 44, 'Module_Efficiency': 0.198, 'Irradiance_at_NOCT': 800,
-        #   'Power_output_at_STC': 250,'peak_power':600},
-        #                                     m_tilt=14, 
-        #                                     m_az=180, 
-        #                                     cap=500,
-        #                                     output_type='power'
-        #                                     )
-            entity = model_factory.create(num=1, param1="Not in use") 
+                # Mulple entities for the same model type are created one at a time
+                # in the same simulator, each with the parameters of its model.
+                # Connections reach them through the entity of each model.
+                entity = model_factory.create(num=1, **model_parameters)
 
             model_entities[model_name] = entity
             print(model_entities)
@@ -287,11 +454,82 @@ def compute_mosaik_end_time(start_time:str, end_time:str, time_resolution:int =
 def set_current_model(model):
     global current_model
     current_model["type"] = model['type']
-    current_model['parameters']=model['parameters']
-    current_model['inputs']=model["inputs"]
-    current_model['outputs']=model["outputs"]
+    # parameters, inputs and outputs are optional in the configuration file
+    current_model['parameters']=model.get('parameters', {})
+    current_model['inputs']=model.get("inputs", {})
+    current_model['outputs']=model.get("outputs", {})
     
 
+def split_monitor_item(item: str | dict) -> tuple:
+    """
+    Returns the name and the aggregation rule of an item of the monitor section.
+    Items are either a name, such as 'PV.pv_gen', or a mapping of a name to an 
+    aggregation rule, such as {'PV.pv_gen': {'every': 3600, 'agg': 'mean'}}.
+
+    Returns
+    -------
+    tuple
+        The name of the item and its aggregation rule, which is None if the
+        item is not aggregated.
+    """
+    if isinstance(item, dict):
+        name, rule = next(iter(item.items()))
+        return name, rule
+    return item, None
+
+
+def monitor_aggregation(model_entities: dict[MosaikEntity], monitor_config: dict) -> dict:
+    """
+    Returns the aggregation rules of the monitor section by the name of the column 
+    used by the Collector, '<entity full id>-<attribute>'.
+
+    Parameters
+    ----------
+    model_entities: dict
+        A dictionary of model entities created for the Mosaik world.
+    monitor_config: dict
+        The configuration for the monitor.
+
+    Returns
+    -------
+    dict
+        Aggregation rules, e.g. {'PvAdapter-0.pv_0-pv_gen': {'every': 3600, 'agg': 'mean'}}
+    """
+    aggregation = {}
+    for item in monitor_config['items']:
+        name, rule = split_monitor_item(item)
+        if rule is not None:
+            from_model, from_attr = name.split('.')
+            aggregation[f'{model_entities[from_model][0].full_id}-{from_attr}'] = rule
+    return aggregation
+
+
+def monitor_columns(model_entities: dict[MosaikEntity], monitor_config: dict) -> list:
+    """
+    Returns the names of the columns used by the Collector for the items of the
+    monitor section, '<entity full id>-<attribute>', in the order of the items.
+
+    Parameters
+    ----------
+    model_entities: dict
+        A dictionary of model entities created for the Mosaik world.
+    monitor_config: dict
+        The configuration for the monitor.
+
+    Returns
+    -------
+    list
+        Column names, e.g. ['PvAdapter-0.pv_0-pv_gen', 'Load-0.load_0-load_dem']
+    """
+    columns = []
+    for item in monitor_config['items']:
+        from_model, from_attr = split_monitor_item(item)[0].split('.')
+        column = f'{model_entities[from_model][0].full_id}-{from_attr}'
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
 def connect_monitor(world: MosaikWorld,  model_entities: dict[MosaikEntity], 
                     monitor:MosaikEntity, monitor_config: dict) -> MosaikWorld:
     """
@@ -315,7 +553,7 @@ def connect_monitor(world: MosaikWorld,  model_entities: dict[MosaikEntity],
     """
 
     for item in monitor_config['items']:
-            from_model, from_attr =  item.split('.')
+            from_model, from_attr =  split_monitor_item(item)[0].split('.')
 
             to_attr = from_attr # enforce connecting attributes have the same name
             try:
@@ -338,6 +576,60 @@ def connect_monitor(world: MosaikWorld,  model_entities: dict[MosaikEntity],
     return world
 
 
+def name_connections(profiler: Profiler, model_entities: dict[MosaikEntity], connections: list[dict],
+                     monitor_config: dict) -> None:
+    """
+    Names the connections and monitored items of the configuration file in the
+    report of `profiler`, by the output of the entity from which they start.
+    """
+    names = [(connection['from'], f"{connection['from']} -> {connection['to']}")
+             for connection in connections]
+    names += [(split_monitor_item(item)[0], f"{split_monitor_item(item)[0]} -> monitor")
+              for item in monitor_config['items']]
+    for source, name in names:
+        from_model, from_attr = source.split('.')
+        entity = model_entities[from_model][0]
+        profiler.add_connection(entity.sid, entity.eid, from_attr, name)
+
+
+def checkpoint_options(scenario_config: dict, resume: bool | str = False) -> tuple:
+    """
+    Returns the checkpoints of a simulation, from the 'checkpoint' of the scenario
+    section, and the state from which it resumes.
+
+    Parameters
+    ----------
+    scenario_config: dict
+        The scenario section of the configuration file.
+    resume: bool | str
+        False to start the simulation from the beginning, True to resume it from the latest
+        checkpoint of its directory, or the path of the checkpoint file from which it resumes.
+
+    Returns
+    -------
+    tuple
+        The ``Checkpoints`` of the simulation, or None if checkpoints are not taken, and the
+        state from which the simulation resumes, or None.
+    """
+    options = scenario_config.get('checkpoint')
+    if (options is not None or resume) and scenario_config.get('execution', 'mosaik') != 'direct':
+        raise ValueError("Checkpoints require the 'direct' execution of the scenario.")
+
+    checkpoints = None
+    if options is not None:
+        checkpoints = Checkpoints(options['every'], options.get('directory', DEFAULT_DIRECTORY),
+                                  options.get('keep', 1))
+    if not resume:
+        return checkpoints, None
+    if resume is True:
+        directory = DEFAULT_DIRECTORY if options is None else options.get('directory', DEFAULT_DIRECTORY)
+        resume = latest_checkpoint(directory)
+        if resume is None:
+            raise ValueError(f"There is no checkpoint in {directory} to resume the simulation from.")
+    print(f"Resuming the simulation from {resume}")
+    return checkpoints, load_checkpoint(resume)
+
+
 class Simulation:
     """A simplified interface to run simulations with Illuminator."""
 
@@ -346,10 +638,38 @@ class Simulation:
         self.config_file = load_config_file(config_file)
 
 
-    def run(self):
-        """Runs a simulation scenario"""
-
+    def run(self, profile: bool = False, trace_file: str = None, resume: bool | str = False):
+        """Runs a simulation scenario
+        
+        Parameters
+        ----------
+        profile: bool
+            If True, the wall time and number of calls of the methods of every simulator,
+            and the data sent through every connection, are recorded and printed as a
+            report at the end of the simulation. The Profiler is kept as `self.profiler`.
+        trace_file: str
+            Path to a JSON file to which the calls to the simulators are written as a
+            timeline in the Chrome trace event format. Implies `profile`.
+        resume: bool | str
+            If True, the simulation continues from the latest checkpoint in the 'directory'
+            of the 'checkpoint' of the scenario. If a path, it continues from that checkpoint
+            file, which can come from another simulation with the same models, e.g. to start
+            several variants from a shared spin-up period. Requires the 'direct' execution.
+        """
+        self.profiler = None
+        if profile or trace_file is not None:
+            self.profiler = Profiler(trace=trace_file is not None)
+        with self.profiler.attach() if self.profiler is not None else nullcontext():
+            self._run(resume)
+
+        if self.profiler is not None:
+            print(self.profiler.report())
+            if trace_file is not None:
+                self.profiler.write_trace(trace_file)
+
+    def _run(self, resume: bool | str = False):
         config = apply_default_values(self.config_file)
+        checkpoints, state = checkpoint_options(config['scenario'], resume)
         
         # Define the Mosaik simulation configuration
         sim_config = generate_mosaik_configuration(config)
@@ -358,31 +678,43 @@ class Simulation:
         _start_time = config['scenario']['start_time']
         _end_time = config['scenario']['end_time']
         _time_resolution = config['scenario']['time_resolution']
-        # output file with forecast results
-        _results_file = config['monitor']['file']
 
         # Initialize the Mosaik worlds
-        world = create_world(sim_config, time_resolution=_time_resolution)
+        world = create_world(sim_config, time_resolution=_time_resolution,
+                             execution=config['scenario'].get('execution', 'mosaik'),
+                             profiler=self.profiler)
         # TODO: collectors are also customisable simulators, define in the same way as models.
         # A way to define custom collectors should be provided by the Illuminator.
         collector = world.start('Collector', 
                                 time_resolution=_time_resolution, 
                                 start_date=_start_time,  
-                                results_show={'write2csv':True, 'dashboard_show':False, 
-                                            'Finalresults_show':False,'database':False, 'mqtt':False}, 
-                                output_file=_results_file)
+                                sinks=config['monitor']['sinks'],
+                                retention=config['monitor'].get('retention', 'none'),
+                                retention_steps=config['monitor'].get('retention_steps', 96),
+                                print_results=config['monitor'].get('retention', 'none') != 'none',
+                                background=config['monitor'].get('background', True),
+                                queue_size=config['monitor'].get('queue_size', 1024),
+                                mode=config['monitor'].get('mode', 'time-based'),
+                                step_size=config['monitor'].get('step_size', 1),
+                                record=config['monitor'].get('record', 'all'),
+                                tolerance=config['monitor'].get('tolerance', 0.0))
         
-        # initialize monitor
-        monitor = collector.Monitor()
-
         # Dictionary to keep track of created model entities
-        model_entities = start_simulators(world, config['models'])
+        model_entities = start_simulators(world, config['models'], config['connections'],
+                                          config['monitor'], _end_time)
+
+        # initialize monitor
+        monitor = collector.Monitor(aggregation=monitor_aggregation(model_entities, config['monitor']),
+                                    columns=monitor_columns(model_entities, config['monitor']))
 
         # Connect the models based on the connections specified in the configuration
         world = build_connections(world, model_entities, config['connections'])
 
         # Connect monitor
         world = connect_monitor(world, model_entities, monitor, config['monitor'])
+
+        if self.profiler is not None:
+            name_connections(self.profiler, model_entities, config['connections'], config['monitor'])
         
         # Run the simulation until the specified end time
         mosaik_end_time =  compute_mosaik_end_time(_start_time,
@@ -390,7 +722,10 @@ class Simulation:
                                                 _time_resolution
                                             )
 
-        world.run(until=mosaik_end_time)
+        if checkpoints is None and state is None:
+            world.run(until=mosaik_end_time)
+        else:
+            world.run(until=mosaik_end_time, checkpoints=checkpoints, resume=state)
 
     @property
     def config(self)-> dict:
@@ -1,5 +1,6 @@
 import datetime
 
+import numpy as np
 import pandas as pd
 
 DATE_FORMAT = ['YYYY-MM-DD HH:mm', 'YYYY-MM-DD HH:mm:ss']
@@ -31,14 +32,18 @@ class LoadModel:
             Obtain id lists
         self.loads : list
             ???
-        self.data : ???
-            ???
-        self._data : pd.DataFrame
-            The data at minutes
-        self._last_date : ???
-            Last time instance
-        self._cache : series
-            Load power at cache
+        self.data : pd.DataFrame
+            The load profiles, with the 'Time' column converted to timestamps
+        self._values : np.ndarray
+            The load power of all loads, one row per row of the profiles and one column per load
+        self._rows : np.ndarray
+            Row of `self._values` for every step of `self.resolution` minutes from `self._first_step`
+            on, or -1 if the profiles have no row at that step
+        self._first_step : int
+            Number of steps of `self.resolution` minutes between `self.start` and the first row of
+            the profiles
+        self._cache : np.ndarray
+            Load power at the last requested time
         """
         #data={'start':'2015-02-01 00:00:00','resolution':15*60,'unit':'W'}
         #profile=dataframe of load profile
@@ -57,9 +62,18 @@ class LoadModel:
         ]
         self.data=profile
         self.data['Time']=pd.to_datetime(self.data['Time'])#change time to 'timestamp'
+        #index the profiles once by step, so that get() does not scan them
+        self._values=self.data[self.load_ids].to_numpy(dtype=float)
+        self._values.flags.writeable=False
+        step_seconds=self.resolution*60
+        seconds=(self.data['Time']-pd.to_datetime(self.start)).to_numpy()//np.timedelta64(1,'s')
+        valid=(seconds>=0)&(seconds%step_seconds==0)
+        # keep the first row of every step, like a lookup by time would
+        steps,first=np.unique(seconds[valid]//step_seconds,return_index=True)
+        self._first_step=int(steps[0]) if len(steps) else 0
+        self._rows=np.full(int(steps[-1])-self._first_step+1 if len(steps) else 0,-1,dtype=np.int64)
+        self._rows[steps-self._first_step]=np.flatnonzero(valid)[first]
         #variables for get()
-        self._data=None#the data at minutes(dataFrame)
-        self._last_date=None#last time instance
         self._cache=None#load power at cache
 
     def get(self,minutes:int):
@@ -73,8 +87,14 @@ class LoadModel:
         
         Returns
         --------
-        series
-            load power at cache
+        np.ndarray
+            load power of every load, in the order of `self.load_ids`. This is a read-only view
+            of the profiles
+
+        Raises
+        ------
+        IndexError
+            If the profiles have no row at the requested time
 
         Notes
         -----
@@ -86,18 +106,15 @@ class LoadModel:
         # Trim "minutes" to multiples of "self.resolution"
         # Example: res=15, minutes=40 -> minutes == 30
         minutes = minutes // self.resolution * self.resolution
-        target_data=pd.to_datetime(self.start)+datetime.timedelta(minutes=minutes)
-        last_data=self.data['Time'].iloc[-1]
-        if target_data>last_data:
+        step = minutes // self.resolution - self._first_step
+        row = self._rows[step] if 0 <= step < len(self._rows) else -1
+        if row < 0:
+            target_data=pd.to_datetime(self.start)+datetime.timedelta(minutes=minutes)
             raise IndexError('Target date "%s" (%s minutes from start) '
                              'out of range.' % (target_data, minutes))
-        else:
-            self._last_date=target_data
-            self._data=self.data[self.data['Time']==target_data]
-            just_cache=self._data.drop(['Time'],axis=1)
-            self._cache=just_cache.iloc[0]
+        self._cache=self._values[row]
 
-        #return series nload_1:  1.0, load_2:    1.0
+        #return array [load_1, load_2]
         return self._cache
 
 
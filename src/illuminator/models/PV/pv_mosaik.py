@@ -1,4 +1,5 @@
 
+import copy
 import itertools
 import mosaik_api_v3 as mosaik_api
 #import PV.PV_model as PV_model
@@ -45,14 +46,17 @@ class PvAdapter(mosaik_api.Simulator):
             ???
         self._cache : dict
             Used in the step function to store the values after running the python model of the technology
+        self.start : pd.Timestamp | None
+            Date of the start of the simulation, if it is given to `create`
         """
         super(PvAdapter, self).__init__(meta)
         self.eid_prefix='pv_'
         self.entities = {}  # every entity that we create of PV gets stored in this dictionary as a list
         self.mods = {}
         self._cache = {}  #we store the final outputs after calling the python model (#PV1) here.
+        self.start = None
 
-    def init(self, sid:str, time_resolution:float) -> dict:
+    def init(self, sid:str, time_resolution:float, **sim_params) -> dict:
         """
         Initialize the simulator with the ID `sid` and pass the `time_resolution` and additional parameters sent by mosaik.
 
@@ -64,6 +68,9 @@ class PvAdapter(mosaik_api.Simulator):
             The String ID of the class (???)
         time_resolution : float
             ???
+        sim_params : dict
+            Parameters passed by the engine to the simulators of all model types, such as `model_name`
+            and `sim_params`. They are not used: every PV entity is created with the parameters of its model
         
         Returns
         -------
@@ -75,7 +82,7 @@ class PvAdapter(mosaik_api.Simulator):
         # print('Exited init os SimAPI')  # working (20220524)
         return self.meta
 
-    def create(self, num:int, model:str, sim_start:str, **model_params) -> list:
+    def create(self, num:int, model:str, sim_start:str=None, **model_params) -> list:
         """
         Create `num` instances of `model` using the provided `model_params`.
 
@@ -88,7 +95,8 @@ class PvAdapter(mosaik_api.Simulator):
         model : str
             `model` needs to be a public entry in the simulator's ``meta['models']``.
         sim_start : str
-            Date and time (YYYY-MM-DD hh:mm:ss) of the start of the simulation in string format
+            Date and time (YYYY-MM-DD hh:mm:ss) of the start of the simulation in string format. It is only used
+            to report the date of the steps, and it is optional because models of configuration files do not set it
         **model_params : dict 
             A mapping of parameters (from``meta['models'][model]['params']``) to their values.
         
@@ -119,10 +127,12 @@ class PvAdapter(mosaik_api.Simulator):
         grid nodes are related to their adjacent branches). The *children* entry is optional and may contain a sub-list of entities.
         """
         # print('hi, you have entered create of SimAPI')  # working (20220524)
-        self.start = pd.to_datetime(sim_start)
+        if sim_start is not None:
+            self.start = pd.to_datetime(sim_start)
         entities = []
         for i in range (num):
-            eid = '%s%d' % (self.eid_prefix, i)
+            # entities of several create() calls share this simulator, so they are numbered across calls
+            eid = '%s%d' % (self.eid_prefix, len(self.entities))
 
             # we are creating an instance for PV and call the python file for that. **model_params refers to the
             # parameters we have mentioned above in the META. New instance will have those parameters.
@@ -163,9 +173,10 @@ class PvAdapter(mosaik_api.Simulator):
         
         """
         # in this method, we call the python file at every data interval and perform the calculations.
-        current_time = (self.start + pd.Timedelta(time * self.time_resolution,
-                                                  unit='seconds'))  # timedelta represents a duration of time
-        print('from pv %%%%%%%%%', current_time)
+        if self.start is not None:
+            current_time = (self.start + pd.Timedelta(time * self.time_resolution,
+                                                      unit='seconds'))  # timedelta represents a duration of time
+            print('from pv %%%%%%%%%', current_time)
         # print('#inouts: ', inputs)
         for eid, attrs in inputs.items():
             # print('#eid: ', eid)
@@ -253,6 +264,23 @@ class PvAdapter(mosaik_api.Simulator):
                     data[eid][attr] = self._cache[eid]['total_irr']
         return data
 
+    def get_state(self) -> dict:
+        """
+        Returns the state of the simulator for a checkpoint: the outputs of the last step of every entity.
+        The PV models keep no other values between steps
+        """
+        return {'cache': copy.deepcopy(self._cache)}
+
+    def set_state(self, state:dict) -> None:
+        """
+        Restores a state returned by `get_state`, after the entities are created
+        """
+        unknown = set(state['cache']) - set(self.entities)
+        if unknown:
+            raise ValueError(f"Entities {sorted(unknown)} of the checkpoint are not PV entities.")
+        self._cache = copy.deepcopy(state['cache'])
+
+
 def main():
     mosaik_api.start_simulation(PvAdapter(), 'PV-Illuminator')
 if __name__ == '__main__':
@@ -19,9 +19,14 @@ adder = IlluminatorModel(
 # construct the model
 class Adder(ModelConstructor):
 
-    def step(self, time) -> None:
-        self._model.outputs["out1"] = self._model.inputs["in1"] + self._model.inputs["in2"]
-        print("result:", self._model.outputs["out1"])
+    def step(self, time, inputs=None, max_advance=None) -> None:
+        # every model of type Adder is an entity of this simulator
+        for eid, model in self.model_entities.items():
+            # connected inputs replace the initial values, summed over their sources
+            for attr, values in (inputs or {}).get(eid, {}).items():
+                model.inputs[attr] = sum(values.values())
+            model.outputs["out1"] = model.inputs["in1"] + model.inputs["in2"]
+            print("result:", eid, model.outputs["out1"])
 
         return time + self._model.time_step_size
 
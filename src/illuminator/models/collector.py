@@ -1,10 +1,9 @@
-import collections
+import copy
+import warnings
 import pandas as pd
 import mosaik_api_v3 as mosaik_api
-import os
-import sqlite3
-import paho.mqtt.client as mqtt
-from urllib.parse import urlparse
+from illuminator.monitor import (SinkWriter, WindowAggregator, ChangeFilter, create_sink,
+                                 create_retention, get_sink_state, set_sink_columns)
 
 META = {
     'type': 'hybrid',
@@ -12,13 +11,12 @@ META = {
         'Monitor': {
             'public': True,
             'any_inputs': True,
-            'params': [],
+            'params': ['aggregation', 'columns'],
             'attrs': [],
         },
     },
 }
 #import wandb
-import sqlite3
 
 class Collector(mosaik_api.Simulator):
     def __init__(self) -> None:
@@ -34,18 +32,27 @@ class Collector(mosaik_api.Simulator):
             Contains metadata of the control sim such as type, models, parameters, attributes, etc.. Created via gpcontrolSim's parent class.
         self.eid : string
             ???
-        self.data : dict
-            ???
+        self.data : RingRetention | StatsRetention | None
+            Values kept in memory to be printed in `finalize`, according to the retention policy
+        self.aggregator : WindowAggregator | None
+            Aggregates monitored items over time windows before they are written to the sinks
+        self.change_filter : ChangeFilter | None
+            Drops values that did not change before they are written to the sinks
         """
         super().__init__(META)
         self.eid = None
-        self.data = collections.defaultdict(lambda: collections.defaultdict(dict))
+        self.data = None
+        self.aggregator = None
+        self.change_filter = None
 
-    def init(self, sid:str, time_resolution:int, start_date, results_show,output_file,
+    def init(self, sid:str, time_resolution:int, start_date, results_show:dict=None, output_file:str=None,
              date_format:str='%Y-%m-%d %H:%M:%S',
              db_file:str='Result/result.db',
              mqtt_broker:str='mqtt://192.168.10.90:1883', mqtt_topic:str='TGVFCBB75',
-             print_results:bool=False) -> dict:
+             print_results:bool=False, sinks:list=None, retention:str=None,
+             retention_steps:int=96, background:bool=True,
+             queue_size:int=1024, mode:str='time-based', step_size:int=None,
+             record:str='all', tolerance:float=0.0) -> dict:
         """
         Initialize the simulator with the ID `sid` and pass the `time_resolution` and additional parameters sent by mosaik.
         Because this method has an additional parameter `step_size` it is overriding the parent method init().
@@ -60,10 +67,11 @@ class Collector(mosaik_api.Simulator):
             ???
         start_date : ???
             ???
-        results_show : ???
-            ???
-        output_file : ???
-            ???
+        results_show : dict
+            Legacy selection of outputs, used when `sinks` is None. The flags 'write2csv', 'database'
+            and 'mqtt' add a sink for `output_file`, `db_file` and `mqtt_broker` respectively
+        output_file : str
+            The path of the CSV file used when 'write2csv' is set in `results_show`
         date_format : str
             The expected date formatting
         db_file : str
@@ -74,6 +82,34 @@ class Collector(mosaik_api.Simulator):
             ???
         print_results : bool
             Should the results be printed
+        sinks : list
+            Configurations of the sinks to which results are written, as accepted by
+            ``illuminator.monitor.create_sink``. Example: ``[{'type': 'csv', 'file': './out.csv'}]``
+        retention : str
+            Which values are kept in memory to be printed at the end of the simulation:
+            'none', 'ring' for the last `retention_steps` values, or 'stats' for summary statistics.
+            By default 'ring' if `print_results` is True, 'none' otherwise
+        retention_steps : int
+            Number of values kept per item when `retention` is 'ring'
+        background : bool
+            If True, results are written by background threads, one per sink, instead of
+            within `step`
+        queue_size : int
+            Maximum number of rows waiting to be written by each background thread. `step`
+            blocks when the queue is full
+        mode : str
+            'time-based' to record values every `step_size`, or 'event-based' to record values
+            only when a connected model provides new values
+        step_size : int
+            Number of simulation time units between two records in 'time-based' mode. A time
+            unit lasts `time_resolution` seconds. By default 1, or 900 when `sinks` is None, as in
+            the scripts that select their outputs with `results_show`
+        record : str
+            'all' to write every value, or 'changes' to write a value only when it differs from
+            the last written value of the same item. See ``ChangeFilter``
+        tolerance : float
+            Largest absolute difference between two values considered unchanged when `record`
+            is 'changes'
 
         Attributes
         ----------
@@ -81,20 +117,18 @@ class Collector(mosaik_api.Simulator):
             ???
         self.start_date : ???
             ???
-        self.output_file : ???
-            ???
         self.print_results : boolean
             Should the results be printed
-        self.results_show : ???
-            ???
-        self.db_file : str
-            The path of the database file
-        self.mqtt_client : ???
-            ???
-        self.mqtt_topic : str
-            ???
-        self.mqtt_broker : str
-            ???
+        self.results_show : dict
+            Legacy selection of outputs
+        self.background : bool
+            Whether results are written by background threads
+        self.queue_size : int
+            Maximum number of rows waiting to be written by each background thread
+        self.sinks : list
+            Sinks to which the rows are written
+        self.step_size : int | None
+            Number of simulation time units between two records, None in 'event-based' mode
 
         Returns
         -------
@@ -103,17 +137,55 @@ class Collector(mosaik_api.Simulator):
         """
         self.time_resolution = time_resolution
         self.start_date = pd.to_datetime(start_date, format=date_format)
-        self.output_file = output_file
         self.print_results = print_results
-        self.results_show=results_show
-        self.db_file=db_file
-        self.mqtt_client=None
-        self.mqtt_topic=mqtt_topic
-        self.mqtt_broker=mqtt_broker
+        self.results_show = results_show or {}
+        if retention is None:
+            retention = 'ring' if print_results else 'none'
+        elif print_results and retention == 'none':
+            warnings.warn("The Collector keeps no values with retention 'none': "
+                          "'print_results' prints nothing.")
+        self.data = create_retention(retention, retention_steps)
+        self.background = background
+        self.queue_size = queue_size
+
+        if mode == 'time-based':
+            if step_size is None:
+                # scripts using results_show were written for steps of 900 time units (15 min at 1 s)
+                step_size = 900 if sinks is None else 1
+            if step_size < 1:
+                raise ValueError("'step_size' must be a positive integer.")
+            self.step_size = step_size
+        elif mode == 'event-based':
+            # all inputs of an event-based simulator are triggers
+            self.meta['type'] = 'event-based'
+            self.step_size = None
+        else:
+            raise ValueError(f"Unknown mode '{mode}'. Valid modes are 'time-based' and 'event-based'.")
+
+        if record == 'changes':
+            self.change_filter = ChangeFilter(tolerance)
+        elif record != 'all':
+            raise ValueError(f"Unknown record option '{record}'. Valid options are 'all' and 'changes'.")
+
+        if sinks is None:
+            sinks = []
+            if self.results_show.get('write2csv', False):
+                sinks.append({'type': 'csv', 'file': output_file})
+            if self.results_show.get('database', False):
+                sinks.append({'type': 'sqlite', 'file': db_file})
+            if self.results_show.get('mqtt', False):
+                sinks.append({'type': 'mqtt', 'broker': mqtt_broker, 'topic': mqtt_topic})
+
+        self.sinks = []
+        for sink_config in sinks:
+            sink = create_sink(sink_config)
+            if self.background:
+                sink = SinkWriter(sink, queue_size=self.queue_size)
+            self.sinks.append(sink)
 
         return self.meta
 
-    def create(self, num:int, model:str) -> list:
+    def create(self, num:int, model:str, aggregation:dict=None, columns:list=None) -> list:
         """
         Create `num` instances of `model` using the provided `model_params`.
 
@@ -125,6 +197,12 @@ class Collector(mosaik_api.Simulator):
             The number of model instances to create.
         model : str
             `model` needs to be a public entry in the simulator's ``meta['models']``.
+        aggregation : dict
+            Rules to aggregate monitored items over time windows, by column name ``'<src>-<attr>'``.
+            Example: ``{'PvAdapter-0.pv_0-pv_gen': {'every': 3600, 'agg': 'mean'}}``. See ``WindowAggregator``.
+        columns : list
+            Names ``'<src>-<attr>'`` of all monitored items. Sinks with a fixed set of columns, such as
+            CSV and Parquet files, store these columns even if an item has no value in the first row.
         
         Returns
         -------
@@ -159,21 +237,13 @@ class Collector(mosaik_api.Simulator):
         self.eid = 'Monitor'
         print('Collector create: bye')
 
-        if self.results_show['database']==True:
-            # if os.path.exists(self.db_file):
-            #     os.remove(self.db_file)
-            self.conn = sqlite3.connect(self.db_file)
-            self.cursor = self.conn.cursor()
-            #self.cursor.execute("ALTER TABLE pv_gen ADD COLUMN date DATATYPE;")
-        if self.results_show['mqtt'] == True:
-            self.mqtt_client = mqtt.Client()
-            broker_url = urlparse(self.mqtt_broker)
-            if broker_url.hostname and broker_url.port:
-                self.mqtt_client.connect(broker_url.hostname, broker_url.port)
-            else:
-                print('hostname:', broker_url.hostname)
-                print('port:', broker_url.port)
-                raise ValueError('Invalid host.')
+        self.aggregator = None
+        if aggregation:
+            self.aggregator = WindowAggregator(aggregation, self.start_date, self.time_resolution)
+
+        if columns is not None:
+            for sink in self.sinks:
+                set_sink_columns(sink, ['date'] + list(columns))
 
         return [{'eid': self.eid, 'type': model}]
 
@@ -208,78 +278,106 @@ class Collector(mosaik_api.Simulator):
         
         Returns
         -------
-        new_step : int
+        new_step : int | None
             Return the new simulation time, i.e. the time at which ``step()`` should be called again.
+            None in 'event-based' mode, where the next step is triggered by new inputs.
         """
         # print(inputs)
         current_date = (self.start_date
                         + pd.Timedelta(time * self.time_resolution, unit='seconds'))
 
-        df_dict = {'date': current_date}
+        row = {'date': current_date}
 
         data = inputs.get(self.eid, {})
         for attr, values in data.items():
             for src, value in values.items():
-                self.data[src][attr][time] = value
-                df_dict[f'{src}-{attr}'] = [value]
+                if self.data is not None:
+                    self.data.record(src, attr, time, value)
+                row[f'{src}-{attr}'] = value
 
-        df = pd.DataFrame.from_dict(df_dict)
-        df = df.set_index('date')
+        # the row is built once and shared by all sinks
+        rows = [row] if self.aggregator is None else self.aggregator.push(time, row)
+        self._write(rows)
 
-        if self.results_show['dashboard_show']==True:
+        if self.results_show.get('dashboard_show', False):
             # TODO: raise warning, not implemented
-            for key, value in df.items():
-                wandb.log({key: value[0],
-                           "custom_step":time/900})
+            for key, value in row.items():
+                wandb.log({key: value,
+                           "custom_step":time})
 
-        if self.results_show['write2csv'] == True:
-            if time == 0:
-                # Overwrite the CSV file at the first time step
-                df.to_csv(self.output_file, mode='w', header=True)
-            else:
-                if os.path.exists(self.output_file):
-                    # Read existing CSV
-                    existing_df = pd.read_csv(self.output_file, index_col='date', parse_dates=True)
+        if self.step_size is None:
+            return None  # wait for the next input
+        return time + self.step_size
 
-                    # Align the columns
-                    combined_df = pd.concat([existing_df, df])
-                else:
-                    combined_df = df
-
-                # Write the merged data to CSV
-                combined_df.to_csv(self.output_file, mode='w', header=True)
-
-
-        if self.results_show['database']==True:
-            today_date = pd.Timestamp.now().normalize()
+    def _write(self, rows:list) -> None:
+        """
+        Writes `rows` to all sinks, keeping only changed values if `record` is 'changes'
+        """
+        if self.change_filter is not None:
+            rows = [changed for changed in map(self.change_filter.push, rows) if changed is not None]
+        self._write_to_sinks(rows)
 
-            # Change the date component to today's date, but keep the time component
-            df.index = df.index.map(
-                lambda dt: pd.Timestamp(year=today_date.year, month=today_date.month, day=today_date.day-1, hour=dt.hour,
-                                        minute=dt.minute, second=dt.second))
+    def _write_to_sinks(self, rows:list) -> None:
+        for sink in self.sinks:
+            for output_row in rows:
+                sink.write(output_row)
 
-            df.reset_index(inplace=True)
-            df.to_sql(attr, self.conn, if_exists='append', index=False)
-            self.conn.commit()
-        if self.results_show.get('mqtt', False):
-            msg = df.to_json()
-            self.mqtt_client.publish(self.mqtt_topic, msg)
+    def get_state(self) -> dict:
+        """
+        Returns the state of the Collector for a checkpoint: the position reached in every
+        sink, once the rows written so far are stored, and the pending values of the
+        aggregation and of the change filter. Values kept in memory by the retention policy
+        are not part of the state
+
+        Raises
+        ------
+        ValueError
+            If a sink cannot be checkpointed, such as a Parquet sink
+        """
+        return {
+            'sinks': [get_sink_state(sink) for sink in self.sinks],
+            'aggregator': copy.deepcopy(self.aggregator),
+            'change_filter': copy.deepcopy(self.change_filter),
+        }
 
-        return time + 900
+    def set_state(self, state:dict) -> None:
+        """
+        Continues the results of a checkpoint returned by `get_state`. Rows written to the
+        sinks after the checkpoint are discarded. Must be called before the first step
+        """
+        if len(state['sinks']) != len(self.sinks):
+            raise ValueError(f"The checkpoint has {len(state['sinks'])} sinks, but the "
+                             f"monitor has {len(self.sinks)}.")
+        for sink, sink_state in zip(self.sinks, state['sinks']):
+            sink.set_state(sink_state)
+        self.aggregator = copy.deepcopy(state['aggregator'])
+        self.change_filter = copy.deepcopy(state['change_filter'])
 
     def finalize(self) -> None:
         """
-        Prints collected data
+        Prints collected data, and writes pending rows and closes all sinks
         """
-        if self.print_results:
+        if self.print_results and self.data is not None:
             print('Collected data:')
-            for sim, sim_data in sorted(self.data.items()):
+            for sim, sim_data in sorted(self.data.as_dict().items()):
                 print('- %s:' % sim)
                 for attr, values in sorted(sim_data.items()):
                     print('  - %s: %s' % (attr, values))
 
-        if self.results_show['database']==True:
-            self.conn.close()
+        if self.aggregator is not None:
+            self._write(self.aggregator.flush())
+        if self.change_filter is not None:
+            self._write_to_sinks(self.change_filter.flush())
+
+        # close every sink before reporting the first error, so that no results are lost
+        errors = []
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as exc:
+                errors.append(exc)
+        if errors:
+            raise errors[0]
 
 
 if __name__ == '__main__':
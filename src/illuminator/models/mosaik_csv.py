@@ -1,6 +1,11 @@
+import copy
 import arrow
 
 import mosaik_api_v3 as mosaik_api
+import numpy as np
+from illuminator.timeseries import (load_csv, load_csv_cached, parse_attrs, resample as resample_data,
+                                    is_columnar, load_table, table_attrs, load_index, seek_offset,
+                                    parse_time)
 
 
 __version__ = '1.2.0'
@@ -37,6 +42,16 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
             ???
         self.cache : ???
             ???
+        self.data : TimeSeries | None
+            The whole input file, when it is preloaded
+        self.index : int | None
+            Index in `self.data` of the row of the next step, when the file is preloaded
+        self.horizon : int
+            Number of rows provided by each step in the '<attr>_horizon' attributes, 0 if they are not provided
+        self.changes : np.ndarray | None
+            Indices of the rows that differ from the previous row, used to skip unchanged rows
+        self.entity_columns : dict
+            Attributes provided by each entity, None for all attributes
         """
 
         super().__init__({'models': {}})
@@ -50,9 +65,16 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
         self.attrs = None
         self.eids = []
         self.cache = None
+        self.data = None
+        self.index = None
+        self.horizon = 0
+        self.changes = None
+        self.entity_columns = {}
 
     def init(self, sid:str, time_resolution:float, sim_start, datafile, date_format:str='YYYY-MM-DD HH:mm:ss',
-             delimiter:str=',') -> dict:
+             delimiter:str=',', preload:bool=False, cache:bool=False, cache_dir:str=None,
+             mmap:bool=False, lookahead:bool=False, horizon:int=0, resample:str=None,
+             usecols:list=None, sim_end:str=None, index:bool=False, index_every:int=1000) -> dict:
         """
         Initialize the simulator with the ID `sid` and pass the `time_resolution` and additional parameters sent by mosaik.
         Because this method has an additional parameter `step_size` it is overriding the parent method init().
@@ -73,6 +95,41 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
             The expected date format
         delimitre : str
             The character which will be used as a delimiter
+        preload : bool
+            If True, the whole file is parsed at once into arrays, the start date is found by binary
+            search and steps read the arrays by index. Otherwise, the file is read one row per step
+        cache : bool
+            If True, the file is preloaded from arrays cached on disk, which are created the first time
+            the file is read and updated when it changes. Implies `preload`
+        cache_dir : str
+            Directory of the cache. By default, '.illuminator_cache' next to `datafile`
+        mmap : bool
+            If True, the cached values are memory-mapped instead of loaded, so that simulators reading the
+            same file share its pages in memory and only the pages of the simulated rows are read. Implies `cache`
+        lookahead : bool
+            If True, a step is followed by the next row in which a value changes, instead of the next row. Outputs of
+            this time-based simulator persist, so consumers keep reading the unchanged values. Implies `preload`, and
+            has no effect with `horizon`, whose blocks change at every row. The next step is found in the data, since
+            `max_advance` of a simulator without inputs is always the end of the simulation
+        horizon : int
+            If positive, every step provides the values of the next `horizon` rows, starting with the current row, as
+            lists in additional attributes '<attr>_horizon'. Steps still happen at every row. Implies `preload`
+        resample : str
+            If given, the data are resampled to `time_resolution` from `sim_start` when they are loaded, so that the
+            timestamps of the file do not need to match the simulation steps: 'hold' for the last value, 'linear'
+            for linear interpolation or 'mean' for the mean of the rows within each step. Implies `preload`
+        usecols : list
+            Names of the attributes read from a Parquet or Feather file. If None, all attributes are read. The
+            metadata lists all attributes of the file
+        sim_end : str
+            ISO 8601 timestamp of the end of the simulation. Rows of a Parquet or Feather file after it, or before
+            `sim_start`, are not read, unless the data are resampled
+        index : bool
+            If True, and the file is not preloaded, the reader seeks close to `sim_start` using a sparse index of the
+            byte offsets of the rows, instead of parsing the file from the first row. The index is built the first
+            time the file is read, stored next to the cache of the file, and rebuilt when the file changes
+        index_every : int
+            Number of rows between two entries of the index. At most this number of rows is parsed to find `sim_start`
 
         Returns
         -------
@@ -84,37 +141,68 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
         self.date_format = date_format
         self.start_date = arrow.get(sim_start, self.date_format)
         self.next_date = self.start_date
-
-        self.datafile = open(datafile)
         self.modelname = 'CSV' # next(self.datafile).strip() 
         # model name in META is set to the first line of the CSV file
 
-        next(self.datafile).strip() # Skip header line
-        # Get attribute names and strip optional comments
-        attrs = next(self.datafile).strip().split(self.delimiter)[1:]
-        for i, attr in enumerate(attrs):
-            try:
-                # Try stripping comments
-                attr = attr[:attr.index('#')]
-            except ValueError:
-                pass
-            attrs[i] = attr.strip()
-        self.attrs = attrs
+        if is_columnar(datafile):
+            # Parquet and Feather files are read at once, only for the attributes and rows that are used
+            bounds = {}
+            if resample is None:
+                bounds['start'] = self.start_date.int_timestamp
+                if sim_end is not None:
+                    bounds['end'] = arrow.get(sim_end).int_timestamp
+            self.data = load_table(datafile, usecols, date_format=self.date_format, **bounds)
+            attrs = table_attrs(datafile)
+        elif cache or mmap:
+            self.data = load_csv_cached(datafile, self.date_format, self.delimiter, cache_dir, mmap)
+            attrs = self.data.attrs
+        elif preload or lookahead or horizon > 0 or resample is not None:
+            self.data = load_csv(datafile, self.date_format, self.delimiter)
+            attrs = self.data.attrs
+        else:
+            self.datafile = open(datafile)
+            next(self.datafile).strip() # Skip header line
+            # Get attribute names and strip optional comments
+            attrs = parse_attrs(next(self.datafile), self.delimiter)
+            if index:
+                time_index = load_index(datafile, self.date_format, self.delimiter, index_every, cache_dir)
+                self.datafile.seek(seek_offset(time_index, self.start_date.int_timestamp))
+        # attributes with values, which can be fewer than those of the file
+        self.attrs = attrs if self.data is None else self.data.attrs
+        if horizon < 0:
+            raise ValueError("'horizon' must not be negative.")
+        self.horizon = horizon
+        if horizon > 0:
+            attrs = attrs + [f'{attr}_horizon' for attr in self.attrs]
 
         self.meta['type'] = 'time-based'
 
         self.meta['models'][self.modelname] = {
             'public': True,
-            'params': [],
+            'params': ['columns'],
             'attrs': attrs,
         }
 
+        if self.data is not None:
+            try:
+                if resample is not None:
+                    self.data = resample_data(self.data, self.start_date.int_timestamp,
+                                              int(self.time_resolution), resample)
+                self.index = self.data.index_of(self.start_date.int_timestamp)
+            except KeyError:
+                raise ValueError('Start date "%s" not in CSV file.' %
+                                 self.start_date.format(self.date_format)) from None
+            if lookahead and horizon == 0:
+                self.changes = self.data.changes(self.index)
+            return self.meta
+
         # Check start date
+        start = self.start_date.int_timestamp
         self._read_next_row()
-        if self.start_date < self.next_row[0]:
+        if start < self.next_row[0]:
             raise ValueError('Start date "%s" not in CSV file.' %
                              self.start_date.format(self.date_format))
-        while self.start_date > self.next_row[0]:
+        while start > self.next_row[0]:
             self._read_next_row()
             if self.next_row is None:
                 raise ValueError('Start date "%s" not in CSV file.' %
@@ -122,7 +210,7 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
 
         return self.meta
 
-    def create(self, num:int, model:str) -> list:
+    def create(self, num:int, model:str, columns:list=None) -> list:
         """
         Create `num` instances of `model` using the provided `model_params`.
 
@@ -134,8 +222,9 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
             The number of model instances to create.
         model : str
             `model` needs to be a public entry in the simulator's ``meta['models']``.
-        sim_start : str
-            Date and time (YYYY-MM-DD hh:mm:ss) of the start of the simulation in string format
+        columns : list
+            Attributes provided by the entities. If None, they provide all attributes of the file. Entities of
+            one simulator share the data of the file, so many models can read the same file with one simulator
        
         Returns
         -------
@@ -165,6 +254,11 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
         """
         if model != self.modelname:
             raise ValueError('Invalid model "%s" % model')
+        if columns is not None:
+            unknown = set(columns) - set(self.attrs)
+            if unknown:
+                raise ValueError('Columns %s not in CSV file.' % sorted(unknown))
+            columns = set(columns)
 
         start_idx = len(self.eids)
         entities = []
@@ -176,6 +270,7 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
                 'rel': [],
             })
             self.eids.append(eid)
+            self.entity_columns[eid] = columns
         return entities
 
     def step(self, time:int, inputs:dict, max_advance:int) -> int:
@@ -212,17 +307,20 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
         new_step : int
             Return the new simulation time, i.e. the time at which ``step()`` should be called again.
         """
+        if self.data is not None:
+            return self._step_preloaded(time, max_advance)
+
         data = self.next_row
         if data is None:
             raise IndexError('End of CSV file reached.')
 
-        # Check date
+        # Check date, as seconds since the epoch
         date = data[0]
-        expected_date = self.start_date.shift(seconds=time*self.time_resolution)
+        expected_date = self.start_date.int_timestamp + int(time * self.time_resolution)
         if date != expected_date:
             raise IndexError('Wrong date "%s", expected "%s"' % (
-                date.format(self.date_format),
-                expected_date.format(self.date_format)))
+                arrow.get(date).format(self.date_format),
+                arrow.get(expected_date).format(self.date_format)))
 
         # Put data into the cache for get_data() calls
         self.cache = {}
@@ -231,7 +329,39 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
 
         self._read_next_row()
         if self.next_row is not None:
-            return time + int((self.next_row[0].int_timestamp - date.int_timestamp)/self.time_resolution)
+            return time + int((self.next_row[0] - date)/self.time_resolution)
+        else:
+            return max_advance
+
+    def _step_preloaded(self, time:int, max_advance:int) -> int:
+        """
+        Performs a step reading the row at `self.index` of the preloaded data
+        """
+        times = self.data.times
+        if self.index >= len(times):
+            raise IndexError('End of CSV file reached.')
+
+        expected = self.start_date.int_timestamp + int(time * self.time_resolution)
+        if times[self.index] != expected:
+            raise IndexError('Wrong date "%s", expected "%s"' % (
+                arrow.get(int(times[self.index])).format(self.date_format),
+                arrow.get(expected).format(self.date_format)))
+
+        self.cache = self.data.row(self.index)
+        if self.horizon > 0:
+            block = self.data.values[self.index:self.index + self.horizon]
+            for i, attr in enumerate(self.attrs):
+                self.cache[f'{attr}_horizon'] = block[:, i].tolist()
+
+        end = self.index + 1
+        if self.changes is not None:
+            # skip the rows that are equal to the last row provided
+            position = np.searchsorted(self.changes, end)
+            end = int(self.changes[position]) if position < len(self.changes) else len(times)
+
+        self.index = end
+        if self.index < len(times):
+            return time + int((times[self.index] - expected) / self.time_resolution)
         else:
             return max_advance
 
@@ -275,22 +405,56 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
         """
         data = {}
         for eid, attrs in outputs.items():
-            if eid not in self.eids:
+            if eid not in self.entity_columns:
                 raise ValueError('Unknown entity ID "%s"' % eid)
 
+            columns = self.entity_columns[eid]
             data[eid] = {}
             for attr in attrs:
+                column = attr[:-len('_horizon')] if attr.endswith('_horizon') else attr
+                if columns is not None and column not in columns:
+                    raise ValueError('Entity "%s" does not provide "%s"' % (eid, attr))
                 data[eid][attr] = self.cache[attr]
 
         return data
 
+    def get_state(self) -> dict:
+        """
+        Returns the position reached in the data for a checkpoint: the index of the next row of
+        preloaded data, or the date of the next row of the file, and the values of the last step.
+        """
+        state = {'cache': copy.deepcopy(self.cache)}
+        if self.data is not None:
+            state['index'] = self.index
+        else:
+            state['next_date'] = None if self.next_row is None else self.next_row[0]
+        return state
+
+    def set_state(self, state:dict) -> None:
+        """
+        Continues reading the data from the position of a checkpoint returned by `get_state`.
+        The file is read from the start date up to the date of the next row of the checkpoint.
+        """
+        self.cache = copy.deepcopy(state['cache'])
+        if self.data is not None:
+            self.index = state['index']
+            return
+        if state['next_date'] is None:
+            self.next_row = None
+            return
+        while self.next_row is not None and self.next_row[0] < state['next_date']:
+            self._read_next_row()
+        if self.next_row is None or self.next_row[0] != state['next_date']:
+            raise ValueError('Date "%s" of the checkpoint not in CSV file.' %
+                             arrow.get(state['next_date']).format(self.date_format))
+
     def _read_next_row(self) -> None:
         """
         Reads the next row within the file object
         """
         try:
             self.next_row = next(self.datafile).strip().split(self.delimiter)
-            self.next_row[0] = arrow.get(self.next_row[0], self.date_format)
+            self.next_row[0] = parse_time(self.next_row[0], self.date_format)
         except StopIteration:
             self.next_row = None
 
@@ -298,7 +462,8 @@ class CSV(mosaik_api.Simulator): # simulator that reads a CSV file and provides
         """
         Closes the file object within `self.datafile`
         """
-        self.datafile.close()
+        if self.datafile is not None:
+            self.datafile.close()
 
 
 def main():
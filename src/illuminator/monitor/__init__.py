@@ -0,0 +1,12 @@
+from .sinks import (CSVSink, ParquetSink, SQLiteSink, MQTTSink, NullSink,
+                    SINKS, register_sink, create_sink, get_sink_state, set_sink_columns)
+from .readers import load_results, densify
+from .retention import RingRetention, StatsRetention, create_retention
+from .transforms import WindowAggregator, ChangeFilter
+from .writer import SinkWriter
+
+__all__ = ['CSVSink', 'ParquetSink', 'SQLiteSink', 'MQTTSink', 'NullSink',
+           'SINKS', 'register_sink', 'create_sink', 'get_sink_state', 'set_sink_columns',
+           'load_results', 'densify',
+           'RingRetention', 'StatsRetention', 'create_retention',
+           'WindowAggregator', 'ChangeFilter', 'SinkWriter']
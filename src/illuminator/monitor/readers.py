@@ -0,0 +1,114 @@
+"""
+Utilities for reading the results stored by the Collector.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+
+def _unchanged_as_na(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts the numeric columns of a CSV file read with only empty cells
+    as missing values to nullable floats, in which empty cells are <NA> and
+    'nan' values are NaN."""
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == bool or any(isinstance(value, bool) for value in values):
+            continue  # booleans keep their type
+        try:
+            numbers = values.astype(float).to_numpy()
+        except (ValueError, TypeError):
+            continue  # text columns keep NaN for empty cells
+        df[column] = pd.arrays.FloatingArray(numbers, values.isna().to_numpy())
+    return df
+
+
+def load_results(path: str, columns: list = None, start: str = None,
+                 end: str = None, changes: bool = False) -> pd.DataFrame:
+    """Returns the results of a simulation as a DataFrame indexed by date.
+
+    For Parquet files only the requested columns are read, and row groups
+    outside the requested time range are skipped using the statistics
+    stored in the file. For CSV files the whole file is parsed.
+
+    Parameters
+    ----------
+    path : str
+        Path to a results file written by the Collector. The format is
+        determined by the file extension. CSV files compressed with gzip
+        ('.csv.gz') or zstd ('.csv.zst') are decompressed while reading.
+    columns : list
+        Names of the columns to read. If None, all columns are read.
+    start : str
+        Timestamp of the first row to read, e.g. '2012-01-01 00:00:00'.
+        If None, rows are read from the beginning of the file.
+    end : str
+        Timestamp of the last row to read. If None, rows are read until
+        the end of the file.
+    changes : bool
+        True for results recorded with ``record: changes``. Numeric columns
+        are then read as nullable floats, in which the cells of unchanged
+        values are <NA> and values that changed to NaN are NaN, so that
+        `densify` keeps them.
+
+    Returns
+    -------
+    pd.DataFrame
+        The results with a 'date' index.
+    """
+    usecols = None if columns is None else ['date'] + list(columns)
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+
+    if os.path.splitext(path)[1] == '.parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        filters = []
+        if start is not None:
+            filters.append(('date', '>=', start))
+        if end is not None:
+            filters.append(('date', '<=', end))
+        table = pq.read_table(path, columns=usecols, filters=filters or None)
+        types_mapper = {pa.float64(): pd.Float64Dtype()}.get if changes else None
+        return table.to_pandas(types_mapper=types_mapper).set_index('date')
+
+    if changes:
+        # unchanged values are empty cells, and values that changed to NaN are 'nan'
+        df = pd.read_csv(path, usecols=usecols, index_col='date', parse_dates=['date'],
+                         keep_default_na=False, na_values=[''])
+        df = _unchanged_as_na(df)
+    else:
+        df = pd.read_csv(path, usecols=usecols, index_col='date', parse_dates=['date'])
+    return df.loc[start:end]
+
+
+def densify(df: pd.DataFrame, freq: str = None) -> pd.DataFrame:
+    """Rebuilds the dense series of results recorded with only the changed
+    values, by carrying the last value of each column forward.
+
+    Only missing values are filled. Results read with
+    ``load_results(path, changes=True)`` keep the values that changed to
+    NaN, which are carried forward as NaN; otherwise they cannot be told
+    apart from unchanged values.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Results indexed by date, as returned by `load_results`.
+    freq : str
+        Frequency of the dense series, e.g. '15min'. If given, the result has
+        one row for every date between the first and the last row of `df`.
+        If None, only the dates in `df` are kept.
+
+    Returns
+    -------
+    pd.DataFrame
+        The dense results.
+    """
+    if freq is not None:
+        df = df.reindex(pd.date_range(df.index[0], df.index[-1], freq=freq, name=df.index.name))
+    df = df.ffill()
+    # nullable columns of change-only results are returned as plain floats
+    nullable = [column for column in df.columns if isinstance(df[column].dtype, pd.Float64Dtype)]
+    return df.astype({column: np.float64 for column in nullable})
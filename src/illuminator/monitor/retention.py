@@ -0,0 +1,123 @@
+"""
+Retention policies for the values recorded by the Collector. A policy
+decides which values are kept in memory during a simulation, so that they
+can be reported when the simulation finishes. Memory used by every policy
+is independent of the length of the simulation.
+"""
+
+import collections
+import math
+import numbers
+
+
+class RingRetention:
+    """Keeps the last `steps` values of every monitored item.
+
+    Parameters
+    ----------
+    steps : int
+        Number of values kept for each source and attribute.
+    """
+
+    def __init__(self, steps: int) -> None:
+        if steps < 1:
+            raise ValueError("'steps' must be a positive integer.")
+        self.steps = steps
+        self._values = collections.defaultdict(
+            lambda: collections.defaultdict(lambda: collections.deque(maxlen=self.steps)))
+
+    def record(self, src: str, attr: str, time: int, value) -> None:
+        """Stores `value` for `src` and `attr` at `time`, discarding the
+        oldest value if more than `steps` values are stored."""
+        self._values[src][attr].append((time, value))
+
+    def as_dict(self) -> dict:
+        """Returns the retained values as {src: {attr: {time: value}}}"""
+        return {src: {attr: dict(values) for attr, values in attrs.items()}
+                for src, attrs in self._values.items()}
+
+
+class OnlineStats:
+    """Summary statistics of a series of numbers, updated one value at
+    a time. The variance is computed with Welford's algorithm.
+    """
+
+    __slots__ = ('count', 'min', 'max', 'mean', '_m2')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, value: float) -> None:
+        """Adds `value` to the statistics"""
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the values, NaN for less than two values"""
+        if self.count < 2:
+            return math.nan
+        return self._m2 / (self.count - 1)
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'min': self.min, 'max': self.max,
+                'mean': self.mean, 'variance': self.variance}
+
+
+class StatsRetention:
+    """Keeps count, minimum, maximum, mean and variance of every monitored
+    item. Values that are not numbers are ignored.
+    """
+
+    def __init__(self) -> None:
+        self._stats = collections.defaultdict(
+            lambda: collections.defaultdict(OnlineStats))
+
+    def record(self, src: str, attr: str, time: int, value) -> None:
+        """Updates the statistics of `src` and `attr` with `value`"""
+        if isinstance(value, numbers.Real) and not math.isnan(value):
+            self._stats[src][attr].update(value)
+
+    def as_dict(self) -> dict:
+        """Returns the statistics as {src: {attr: {statistic: value}}}"""
+        return {src: {attr: stats.as_dict() for attr, stats in attrs.items()}
+                for src, attrs in self._stats.items()}
+
+
+RETENTION_POLICIES = ('none', 'ring', 'stats')
+
+
+def create_retention(policy: str, steps: int = 96):
+    """Returns the retention object for `policy`.
+
+    Parameters
+    ----------
+    policy : str
+        'none' to keep nothing, 'ring' to keep the last `steps` values,
+        or 'stats' to keep summary statistics.
+    steps : int
+        Number of values kept by the 'ring' policy.
+
+    Returns
+    -------
+    RingRetention | StatsRetention | None
+        None if the policy is 'none'.
+    """
+    if policy == 'none':
+        return None
+    if policy == 'ring':
+        return RingRetention(steps)
+    if policy == 'stats':
+        return StatsRetention()
+    raise ValueError(f"Unknown retention policy '{policy}'. "
+                     f"Valid policies are {', '.join(RETENTION_POLICIES)}.")
@@ -0,0 +1,602 @@
+"""
+Sinks used by the Collector to store the values recorded by the
+monitor. A sink receives one row per recorded step, as a dictionary
+mapping column names to values, and it is responsible for persisting it.
+The row is assembled once by the Collector and shared by all sinks, which
+must not modify it.
+
+Sinks are registered by name in `SINKS`, so that they can be selected in
+the 'sinks' list of the monitor section of a configuration file. Any class
+with `write(row)` and `close()` methods can be added with `register_sink`,
+or referred to by its import path, e.g. 'my_package.sinks:InfluxSink'.
+
+Sinks that also have `get_state()` and `set_state(state)` methods can be
+checkpointed: `get_state` returns the position up to which rows are stored,
+and `set_state`, called on a new sink before its first row, discards the
+rows stored after that position, so that a resumed simulation continues
+the results where the checkpoint was taken.
+
+Sinks that store a fixed set of columns can have a `set_columns(columns)`
+method, called by the Collector before the first row with the columns of
+all monitored items, so that items without a value in the first row are
+not dropped.
+
+Values that are sequences, such as the '<attr>_horizon' outputs of the CSV
+model, are stored as JSON arrays in CSV files and SQLite databases, and as
+lists in Parquet files.
+"""
+
+import csv
+import gzip
+import importlib
+import io
+import json
+import os
+import sqlite3
+import warnings
+from urllib.parse import urlparse
+import numpy as np
+import pandas as pd
+
+
+def _check_columns(row: dict, columns: set, path: str) -> None:
+    """Warns about columns in `row` that are not in `columns`, once per
+    column. Unknown columns are added to `columns`."""
+    unknown = row.keys() - columns
+    if unknown:
+        warnings.warn(f"Columns {sorted(unknown)} are not columns of {path} "
+                      f"and are not written to it.")
+        columns.update(unknown)
+
+
+SEQUENCE_TYPES = (list, tuple, np.ndarray)
+
+
+def _encode_sequence(value):
+    """Returns `value` as a JSON array if it is a sequence, else `value`."""
+    if isinstance(value, np.ndarray):
+        return json.dumps(value.tolist())
+    if isinstance(value, (list, tuple)):
+        return json.dumps(list(value))
+    return value
+
+
+COMPRESSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def _open_text(path: str, compression: str = None, level: int = None):
+    """Opens `path` for writing text, compressed as a single stream with
+    `compression` ('gzip', 'zstd' or None)."""
+    if compression is None:
+        return open(path, 'w', newline='')
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', newline='',
+                         compresslevel=6 if level is None else level)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError as exc:
+            raise ImportError("Writing zstd-compressed results requires 'zstandard'. "
+                              "Install it with: pip install illuminator[zstd]") from exc
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        return io.TextIOWrapper(compressor.stream_writer(open(path, 'wb')), newline='')
+    raise ValueError(f"Unknown compression '{compression}'. "
+                     f"Valid compressions are 'gzip', 'zstd' and 'none'.")
+
+
+class CSVSink:
+    """Streams monitor rows to a CSV file.
+
+    The file is opened once, the header is written with the first row and
+    subsequent rows are appended to an in-memory buffer. The buffer is
+    written to disk whenever it holds `flush_rows` rows or `flush_bytes`
+    bytes, and when the sink is closed. The cost of writing a row does not
+    depend on the size of the file.
+
+    The file can be compressed with gzip or zstd. The whole file is a single
+    compressed stream, so the data are compressed once as they are appended.
+    Compressed data are only complete on disk after the sink is closed.
+
+    Parameters
+    ----------
+    path : str
+        Path to the CSV file. An existing file is overwritten.
+    flush_rows : int
+        Maximum number of rows kept in the buffer before writing to disk.
+    flush_bytes : int
+        Maximum size of the buffer in bytes before writing to disk.
+    compression : str
+        'gzip', 'zstd' or 'none'. By default, it is inferred from the file
+        extension: '.gz' for gzip and '.zst' for zstd.
+    compression_level : int
+        Compression level, by default 6 for gzip and 3 for zstd.
+    """
+
+    def __init__(self, path: str, flush_rows: int = 1000,
+                 flush_bytes: int = 1 << 20, compression: str = 'infer',
+                 compression_level: int = None) -> None:
+        if flush_rows < 1 or flush_bytes < 1:
+            raise ValueError("'flush_rows' and 'flush_bytes' must be positive integers.")
+        if compression == 'infer':
+            compression = COMPRESSIONS.get(os.path.splitext(path)[1])
+        elif compression == 'none':
+            compression = None
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f"Unknown compression '{compression}'. "
+                             f"Valid compressions are 'gzip', 'zstd' and 'none'.")
+        self.path = path
+        self.compression = compression
+        self.compression_level = compression_level
+        self.flush_rows = flush_rows
+        self.flush_bytes = flush_bytes
+        self.columns = None
+        self._file = None
+        self._writer = None
+        self._buffer = io.StringIO()
+        self._pending_rows = 0
+
+    def set_columns(self, columns: list) -> None:
+        """Sets the columns of the file. Must be called before the first row."""
+        self.columns = list(columns)
+
+    def _open(self, columns: list) -> None:
+        """Opens the file and writes the header to the buffer."""
+        self.columns = columns
+        self._columns_set = set(columns)
+        self._file = _open_text(self.path, self.compression, self.compression_level)
+        self._writer = csv.DictWriter(self._buffer, fieldnames=columns,
+                                      restval='', extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        """Appends a row to the buffer, and flushes the buffer if one
+        of the thresholds is reached.
+
+        The columns of the file are those given to `set_columns`, or else
+        those of the first row. Values of other columns are dropped.
+        """
+        if self._writer is None:
+            self._open(self.columns or list(row))
+        else:
+            _check_columns(row, self._columns_set, self.path)
+
+        if any(isinstance(value, SEQUENCE_TYPES) for value in row.values()):
+            # the row is shared with the other sinks: encode a copy
+            row = {column: _encode_sequence(value) for column, value in row.items()}
+        self._writer.writerow(row)
+        self._pending_rows += 1
+        if self._pending_rows >= self.flush_rows or \
+                self._buffer.tell() >= self.flush_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the content of the buffer to the file."""
+        if self._file is None:
+            return
+        self._file.write(self._buffer.getvalue())
+        if self.compression is None:
+            # flushing a compressed stream ends a block and degrades the compression
+            self._file.flush()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._pending_rows = 0
+
+    def close(self) -> None:
+        """Flushes pending rows and closes the file."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def get_state(self) -> dict:
+        """Writes the buffered rows and returns the columns of the file and
+        its size in bytes. Compressed files cannot be checkpointed, because
+        their data are only complete on disk after the sink is closed."""
+        if self.compression is not None:
+            raise ValueError(f"Results compressed with {self.compression} in {self.path} "
+                             "cannot be checkpointed.")
+        if self._file is None:
+            return {'columns': None, 'size': 0}
+        self.flush()
+        return {'columns': self.columns, 'size': self._file.tell()}
+
+    def set_state(self, state: dict) -> None:
+        """Continues the file from the position of `state`: the rows written
+        after it are discarded, and new rows are appended without a header.
+        If the file does not exist, e.g. in a simulation started from the
+        checkpoint of another one, a new file is written."""
+        if state['columns'] is None or not os.path.exists(self.path):
+            return
+        if os.path.getsize(self.path) < state['size']:
+            raise ValueError(f"{self.path} is shorter than at the checkpoint.")
+        with open(self.path, 'r+b') as _file:
+            _file.truncate(state['size'])
+        self.columns = list(state['columns'])
+        self._columns_set = set(self.columns)
+        self._file = open(self.path, 'a', newline='')
+        self._writer = csv.DictWriter(self._buffer, fieldnames=self.columns,
+                                      restval='', extrasaction='ignore')
+
+
+class ParquetSink:
+    """Stores monitor rows in a Parquet file, one column per monitored item.
+
+    Values are buffered column by column and written as a row group every
+    `row_group_size` rows, and when the sink is closed. The schema is
+    inferred from the first row group: integers are stored as doubles,
+    booleans and strings keep their type, and columns without values are
+    stored as doubles. Requires the optional dependency ``pyarrow``.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Parquet file. An existing file is overwritten.
+    row_group_size : int
+        Number of rows in each row group.
+    compression : str
+        Compression codec used by Parquet, e.g. 'snappy', 'zstd' or 'none'.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 1000,
+                 compression: str = 'snappy') -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as exc:
+            raise ImportError("Writing results to Parquet requires 'pyarrow'. "
+                              "Install it with: pip install illuminator[parquet]") from exc
+        if row_group_size < 1:
+            raise ValueError("'row_group_size' must be a positive integer.")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.columns = None
+        self.schema = None
+        self._values = None
+        self._writer = None
+        self._pending_rows = 0
+
+    def write(self, row: dict) -> None:
+        """Appends a row to the column buffers, and writes a row group
+        when the buffers hold `row_group_size` rows.
+
+        The columns of the file are those given to `set_columns`, or else
+        those of the first row. Values of other columns are dropped.
+        """
+        if self.columns is None:
+            self.set_columns(list(row))
+        else:
+            _check_columns(row, self._columns_set, self.path)
+
+        for column, values in self._values.items():
+            values.append(row.get(column))
+        self._pending_rows += 1
+        if self._pending_rows >= self.row_group_size:
+            self.flush()
+
+    def set_columns(self, columns: list) -> None:
+        """Sets the columns of the file. Must be called before the first row."""
+        self.columns = list(columns)
+        self._columns_set = set(self.columns)
+        self._values = {column: [] for column in self.columns}
+
+    def _infer_schema(self, arrays: list):
+        """Returns the schema of the file based on the first row group."""
+        pa = self._pa
+        fields = []
+        for column, array in zip(self.columns, arrays):
+            if pa.types.is_integer(array.type) or pa.types.is_null(array.type):
+                fields.append(pa.field(column, pa.float64()))
+            else:
+                fields.append(pa.field(column, array.type))
+        return pa.schema(fields)
+
+    def flush(self) -> None:
+        """Writes the buffered rows as a row group."""
+        if not self._pending_rows:
+            return
+        pa = self._pa
+        if self.schema is None:
+            arrays = [pa.array(self._values[column]) for column in self.columns]
+            self.schema = self._infer_schema(arrays)
+            self._writer = self._pq.ParquetWriter(self.path, self.schema,
+                                                  compression=self.compression)
+        arrays = [pa.array(self._values[field.name], type=field.type)
+                  for field in self.schema]
+        table = pa.Table.from_arrays(arrays, schema=self.schema)
+        self._writer.write_table(table, row_group_size=self._pending_rows)
+        for values in self._values.values():
+            values.clear()
+        self._pending_rows = 0
+
+    def close(self) -> None:
+        """Writes pending rows and closes the file."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class SQLiteSink:
+    """Stores monitor rows in a SQLite database in long format.
+
+    Values are stored in a table with the columns (time, source, attr,
+    value), and None values are skipped. Rows are buffered and inserted
+    with a single prepared statement
+    and a single transaction every `flush_rows` rows, and when the sink is
+    closed. The database is used in write-ahead-log (WAL) mode, so that it
+    can be read while the simulation is running. The index on (source, attr,
+    time) is created with the table, so that values can be queried by item
+    during the simulation, or after a simulation that did not finish. Rows
+    are appended to the table if it exists.
+
+    The connection is opened with the first flush, so that the sink can be
+    written from a thread other than the one that created it.
+
+    Parameters
+    ----------
+    path : str
+        Path to the database file.
+    table : str
+        Name of the table that stores the values.
+    flush_rows : int
+        Number of rows buffered before they are inserted.
+    """
+
+    def __init__(self, path: str, table: str = 'results',
+                 flush_rows: int = 1000) -> None:
+        if flush_rows < 1:
+            raise ValueError("'flush_rows' must be a positive integer.")
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name '{table}'.")
+        self.path = path
+        self.table = table
+        self.flush_rows = flush_rows
+        self._conn = None
+        self._records = []
+        self._pending_rows = 0
+        self._keys = {'date': None}  # column name -> (source, attr)
+
+    def _open(self) -> None:
+        """Opens the connection and creates the table and its index."""
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table} '
+                               '(time TEXT NOT NULL, source TEXT NOT NULL, '
+                               'attr TEXT NOT NULL, value)')
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_source_attr_time '
+                               f'ON {self.table} (source, attr, time)')
+
+    def write(self, row: dict) -> None:
+        """Buffers the values of a row, and inserts the buffered values
+        when `flush_rows` rows are buffered."""
+        time = str(row['date'])
+        keys = self._keys
+        records = self._records
+        for column, value in row.items():
+            key = keys.get(column)
+            if key is None:
+                if column == 'date':
+                    continue
+                # column names have the format '<source>-<attr>'
+                key = keys[column] = tuple(column.rsplit('-', 1))
+            if value is None:
+                continue
+            if isinstance(value, np.generic):
+                value = value.item()
+            elif isinstance(value, SEQUENCE_TYPES):
+                value = _encode_sequence(value)
+            records.append((time, key[0], key[1], value))
+        self._pending_rows += 1
+        if self._pending_rows >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Inserts the buffered values in one transaction."""
+        if not self._records:
+            return
+        if self._conn is None:
+            self._open()
+        with self._conn:
+            self._conn.executemany(f'INSERT INTO {self.table} VALUES (?, ?, ?, ?)',
+                                   self._records)
+        self._records.clear()
+        self._pending_rows = 0
+
+    def close(self) -> None:
+        """Inserts pending values and closes the connection."""
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_state(self) -> dict:
+        """Inserts the buffered values and returns the id of the last row
+        of the table."""
+        self.flush()
+        if self._conn is None:
+            self._open()
+        last, = self._conn.execute(f'SELECT MAX(rowid) FROM {self.table}').fetchone()
+        return {'rowid': last or 0}
+
+    def set_state(self, state: dict) -> None:
+        """Deletes the rows inserted after the checkpoint of `state`."""
+        if self._conn is None:
+            self._open()
+        with self._conn:
+            self._conn.execute(f'DELETE FROM {self.table} WHERE rowid > ?', (state['rowid'],))
+
+
+class MQTTSink:
+    """Publishes every monitor row as a JSON message to an MQTT broker.
+
+    Parameters
+    ----------
+    broker : str
+        URL of the broker, e.g. 'mqtt://192.168.10.90:1883'.
+    topic : str
+        Topic to which rows are published.
+    """
+
+    def __init__(self, broker: str, topic: str) -> None:
+        import paho.mqtt.client as mqtt
+
+        broker_url = urlparse(broker)
+        if not (broker_url.hostname and broker_url.port):
+            print('hostname:', broker_url.hostname)
+            print('port:', broker_url.port)
+            raise ValueError('Invalid host.')
+        self.topic = topic
+        self.client = mqtt.Client()
+        self.client.connect(broker_url.hostname, broker_url.port)
+
+    def write(self, row: dict) -> None:
+        """Publishes a row."""
+        df = pd.DataFrame.from_dict({key: [value] for key, value in row.items()})
+        msg = df.set_index('date').to_json()
+        self.client.publish(self.topic, msg)
+
+    def close(self) -> None:
+        """Disconnects from the broker."""
+        self.client.disconnect()
+
+    def get_state(self) -> None:
+        """Published messages are not kept, so there is no state."""
+        return None
+
+    def set_state(self, state: None) -> None:
+        pass
+
+
+class NullSink:
+    """Discards all rows. Useful to measure the simulation time without
+    the cost of storing results."""
+
+    def write(self, row: dict) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get_state(self) -> None:
+        return None
+
+    def set_state(self, state: None) -> None:
+        pass
+
+
+class DecimatedSink:
+    """Passes every `every`-th row to `sink`, starting with the first one.
+
+    Parameters
+    ----------
+    sink : CSVSink | ParquetSink | SQLiteSink | MQTTSink | NullSink
+        The sink that receives the rows.
+    every : int
+        Keep one row out of `every` rows.
+    """
+
+    def __init__(self, sink, every: int) -> None:
+        if every < 1:
+            raise ValueError("'decimate' must be a positive integer.")
+        self.sink = sink
+        self.every = every
+        self._count = 0
+
+    def write(self, row: dict) -> None:
+        if self._count % self.every == 0:
+            self.sink.write(row)
+        self._count += 1
+
+    def close(self) -> None:
+        self.sink.close()
+
+    def set_columns(self, columns: list) -> None:
+        set_sink_columns(self.sink, columns)
+
+    def get_state(self) -> dict:
+        return {'count': self._count, 'sink': get_sink_state(self.sink)}
+
+    def set_state(self, state: dict) -> None:
+        self._count = state['count']
+        self.sink.set_state(state['sink'])
+
+
+SINKS = {
+    'csv': CSVSink,
+    'parquet': ParquetSink,
+    'sqlite': SQLiteSink,
+    'mqtt': MQTTSink,
+    'null': NullSink,
+}
+"""Sink classes by the name used in the configuration file."""
+
+
+def get_sink_state(sink):
+    """Returns the state of `sink` to be stored in a checkpoint. Raises a
+    ValueError if the sink does not support checkpoints."""
+    if not hasattr(sink, 'get_state'):
+        raise ValueError(f"Results written by {type(sink).__name__} cannot be checkpointed. "
+                         "Use CSV or SQLite sinks to checkpoint a simulation.")
+    return sink.get_state()
+
+
+def set_sink_columns(sink, columns: list) -> None:
+    """Passes the columns of the monitor to `sink`, if it has a fixed set of columns."""
+    if hasattr(sink, 'set_columns'):
+        sink.set_columns(columns)
+
+
+def register_sink(name: str, sink_class) -> None:
+    """Makes `sink_class` available as a sink of type `name`."""
+    SINKS[name] = sink_class
+
+
+def create_sink(config: dict):
+    """Returns a sink from its configuration.
+
+    Parameters
+    ----------
+    config : dict
+        The sink configuration from the monitor section. 'type' is the name
+        of the sink in `SINKS` or the import path of a sink class written as
+        '<module>:<class>', the optional 'decimate' keeps one out of
+        every N rows, 'file' is passed as the `path` of the sink, and all
+        other items are passed as keyword arguments to the sink class.
+        Example::
+
+            {'type': 'parquet', 'file': './out.parquet', 'row_group_size': 96,
+             'compression': 'zstd', 'decimate': 4}
+
+    Returns
+    -------
+    CSVSink | ParquetSink | SQLiteSink | MQTTSink | NullSink | DecimatedSink
+        The sink.
+    """
+    options = dict(config)
+    sink_type = options.pop('type')
+    every = options.pop('decimate', 1)
+    if 'file' in options:
+        options['path'] = options.pop('file')
+
+    if sink_type in SINKS:
+        sink_class = SINKS[sink_type]
+    elif ':' in sink_type:
+        module_name, class_name = sink_type.split(':', 1)
+        sink_class = getattr(importlib.import_module(module_name), class_name)
+    else:
+        raise ValueError(f"Unknown sink type '{sink_type}'. Valid types "
+                         f"are {', '.join(sorted(SINKS))}.")
+    try:
+        sink = sink_class(**options)
+    except TypeError as exc:
+        raise ValueError(f"Invalid options for sink '{sink_type}': {exc}") from exc
+
+    if every != 1:
+        sink = DecimatedSink(sink, every)
+    return sink
@@ -0,0 +1,209 @@
+"""
+Transformations applied by the Collector to the rows of the monitor
+before they reach the sinks.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+
+AGGREGATIONS = ('min', 'max', 'mean', 'sum', 'last')
+
+
+class _Window:
+    """Incremental state of the aggregation of one column over one window."""
+
+    __slots__ = ('agg', 'every', 'index', 'count', 'total', 'min', 'max', 'last')
+
+    def __init__(self, agg: str, every: int) -> None:
+        self.agg = agg
+        self.every = every
+        self.index = None  # number of the current window since the start
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+
+    def add(self, value) -> None:
+        if value is None:
+            return
+        self.count += 1
+        self.last = value
+        if self.agg in ('mean', 'sum'):
+            self.total += value
+        elif self.agg == 'min':
+            self.min = value if self.min is None else min(self.min, value)
+        elif self.agg == 'max':
+            self.max = value if self.max is None else max(self.max, value)
+
+    def result(self):
+        if self.count == 0:
+            return None
+        if self.agg == 'mean':
+            return self.total / self.count
+        if self.agg == 'sum':
+            return self.total
+        return getattr(self, self.agg)
+
+
+class WindowAggregator:
+    """Aggregates columns of the monitor rows over fixed time windows.
+
+    Windows are aligned with the start of the simulation. The value of a
+    window is emitted when the first value of the next window arrives, and
+    the row that holds it is stamped with the end of the window. Columns
+    without a rule are passed through unchanged. All emitted rows contain
+    every column, with None for columns that have no value at that date.
+
+    Parameters
+    ----------
+    rules : dict
+        Aggregation rules by column name, e.g.
+        ``{'PvAdapter-0.pv_0-pv_gen': {'every': 3600, 'agg': 'mean'}}``, where
+        `every` is the length of the window in seconds and `agg` is one of
+        'min', 'max', 'mean', 'sum' or 'last'.
+    start_date : pd.Timestamp
+        Date of the simulation time 0.
+    time_resolution : int
+        Number of seconds of one unit of simulation time.
+    """
+
+    def __init__(self, rules: dict, start_date: pd.Timestamp, time_resolution: int) -> None:
+        self.start_date = start_date
+        self.time_resolution = time_resolution
+        self.columns = None
+        self._windows = {}
+        for column, rule in rules.items():
+            if rule['agg'] not in AGGREGATIONS:
+                raise ValueError(f"Unknown aggregation '{rule['agg']}' for {column}. "
+                                 f"Valid aggregations are {', '.join(AGGREGATIONS)}.")
+            if rule['every'] < 1:
+                raise ValueError(f"'every' must be a positive number of seconds for {column}.")
+            self._windows[column] = _Window(rule['agg'], rule['every'])
+
+    def _window_end(self, window: _Window) -> pd.Timestamp:
+        return self.start_date + pd.Timedelta(seconds=(window.index + 1) * window.every)
+
+    def _new_row(self, date: pd.Timestamp) -> dict:
+        row = dict.fromkeys(self.columns)
+        row['date'] = date
+        return row
+
+    def push(self, time: int, row: dict) -> list:
+        """Adds the values of `row`, recorded at simulation time `time`.
+
+        Returns
+        -------
+        list
+            The rows to be written, sorted by date. Empty if only aggregated
+            columns were recorded and no window was completed.
+        """
+        if self.columns is None:
+            self.columns = list(row) + [column for column in self._windows if column not in row]
+        seconds = time * self.time_resolution
+        date = row['date']
+        rows = {}
+        current = None
+        for column, value in row.items():
+            window = self._windows.get(column)
+            if window is None:
+                if column != 'date':
+                    if current is None:
+                        current = rows.setdefault(date, self._new_row(date))
+                    current[column] = value
+                continue
+            index = seconds // window.every
+            if window.index is not None and index != window.index:
+                end = self._window_end(window)
+                if end not in rows:
+                    rows[end] = self._new_row(end)
+                rows[end][column] = window.result()
+                window.reset()
+            window.index = index
+            window.add(value)
+        return [rows[key] for key in sorted(rows)]
+
+    def flush(self) -> list:
+        """Returns the rows for the windows that are not yet complete,
+        stamped with the date at which they would end."""
+        rows = {}
+        for column, window in self._windows.items():
+            if window.index is None or window.count == 0:
+                continue
+            end = self._window_end(window)
+            if end not in rows:
+                rows[end] = self._new_row(end)
+            rows[end][column] = window.result()
+            window.reset()
+            window.index = None
+        return [rows[key] for key in sorted(rows)]
+
+
+class ChangeFilter:
+    """Keeps only the values that changed since they were last kept.
+
+    A numeric value is kept when it differs from the last kept value of its
+    column by more than `tolerance`; other values are kept when they are
+    not equal to the last kept value. Values that are not kept are replaced
+    by None, and rows without any kept value are dropped. The first value
+    of every column is always kept. The dense series can be rebuilt by
+    carrying the last value forward, see ``illuminator.monitor.densify``.
+    Values that change to NaN are kept as NaN, which the sinks store apart
+    from the missing unchanged values, see ``load_results(changes=True)``.
+
+    Parameters
+    ----------
+    tolerance : float
+        Largest absolute difference between two numbers considered equal.
+    """
+
+    def __init__(self, tolerance: float = 0.0) -> None:
+        if tolerance < 0:
+            raise ValueError("'tolerance' must not be negative.")
+        self.tolerance = tolerance
+        self._last = {}
+        self._last_date = None
+        self._dropped = False
+
+    def _changed(self, column: str, value) -> bool:
+        if column not in self._last:
+            return True
+        last = self._last[column]
+        try:
+            value_nan, last_nan = value != value, last != last
+            if value_nan or last_nan:  # NaN only equals NaN
+                return value_nan != last_nan
+            return abs(value - last) > self.tolerance
+        except TypeError:
+            return value != last
+
+    def push(self, row: dict) -> dict | None:
+        """Returns `row` with unchanged values replaced by None, or None if
+        no value changed."""
+        changed = {'date': row['date']}
+        any_change = False
+        for column, value in row.items():
+            if column == 'date':
+                continue
+            if value is not None and self._changed(column, value):
+                self._last[column] = value
+                changed[column] = value
+                any_change = True
+            else:
+                changed[column] = None
+        self._last_date = row['date']
+        self._dropped = not any_change
+        return changed if any_change else None
+
+    def flush(self) -> list:
+        """Returns a row with the last kept values, stamped with the date of
+        the last row, if that row was dropped. This marks the end of the
+        recorded series."""
+        if not self._dropped:
+            return []
+        self._dropped = False
+        return [{'date': self._last_date, **self._last}]
@@ -0,0 +1,127 @@
+"""
+Background writing of monitor rows. A SinkWriter owns a sink and a worker
+thread that drains a bounded queue of rows into it, so that the Collector
+does not wait for disk or network I/O during a simulation step.
+"""
+
+import queue
+import threading
+from illuminator.monitor.sinks import get_sink_state, set_sink_columns
+
+_STOP = object()
+
+
+class _Call:
+    """A call to a method of the sink, made by the worker thread between two rows."""
+
+    def __init__(self, function, *args) -> None:
+        self.function = function
+        self.args = args
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class SinkWriter:
+    """Writes rows to `sink` from a background thread.
+
+    `write` only puts the row on a bounded queue. When the queue is full,
+    `write` blocks until the worker has written a row, which limits the
+    memory used by a slow sink. An exception raised by the sink stops the
+    writing of rows and is raised again by the next call to `write` or
+    `close`. `close` waits for all queued rows to be written and closes
+    the sink, after which other calls raise a RuntimeError. `set_columns`, `get_state` and `set_state` are passed to the sink by the
+    worker thread, after the rows queued before them are written.
+
+    Parameters
+    ----------
+    sink : CSVSink | ParquetSink | SQLiteSink | MQTTSink
+        Any object with `write(row)` and `close()` methods.
+    queue_size : int
+        Maximum number of rows waiting to be written.
+    """
+
+    def __init__(self, sink, queue_size: int = 1024) -> None:
+        if queue_size < 1:
+            raise ValueError("'queue_size' must be a positive integer.")
+        self.sink = sink
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f'{type(sink).__name__}Writer')
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Writes rows from the queue until `close` is called."""
+        while True:
+            row = self._queue.get()
+            if row is _STOP:
+                break
+            if isinstance(row, _Call):
+                try:
+                    row.result = row.function(*row.args)
+                except BaseException as exc:
+                    row.error = exc
+                row.done.set()
+                continue
+            if self._error is not None:
+                continue  # keep draining so that write() never blocks forever
+            try:
+                self.sink.write(row)
+            except BaseException as exc:
+                self._error = exc
+        try:
+            self.sink.close()
+        except BaseException as exc:
+            if self._error is None:
+                self._error = exc
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"{type(self.sink).__name__} failed to write "
+                               f"results: {self._error}") from self._error
+
+    def _check_open(self) -> None:
+        """Raises the error of the sink, or a RuntimeError if the writer is
+        closed, since no worker would process the queue."""
+        self._raise_error()
+        if self._closed:
+            raise RuntimeError(f"The writer of {type(self.sink).__name__} is closed.")
+
+    def write(self, row: dict) -> None:
+        """Queues `row` to be written by the worker thread."""
+        self._check_open()
+        self._queue.put(row)
+
+    def close(self) -> None:
+        """Writes all queued rows and closes the sink."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise_error()
+
+    def _call(self, function, *args):
+        """Calls `function` from the worker thread once the queued rows are
+        written, and returns its result."""
+        self._check_open()
+        call = _Call(function, *args)
+        self._queue.put(call)
+        call.done.wait()
+        self._raise_error()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def set_columns(self, columns: list) -> None:
+        """Sets the columns of the sink, before any row is written."""
+        self._call(set_sink_columns, self.sink, columns)
+
+    def get_state(self):
+        """Returns the state of the sink once the queued rows are written."""
+        return self._call(get_sink_state, self.sink)
+
+    def set_state(self, state) -> None:
+        """Sets the state of the sink, before any row is written."""
+        self._call(self.sink.set_state, state)
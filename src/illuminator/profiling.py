@@ -0,0 +1,156 @@
+"""
+Instrumentation of simulations: wall time and number of calls of the
+methods of every simulator, and volume of the data they exchange.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from mosaik.proxies import LocalProxy, RemoteProxy
+
+# proxies through which mosaik calls in-process and remote simulators
+PROXIES = (LocalProxy, RemoteProxy)
+
+
+class _Stats:
+    """Number of calls and total wall time of one method of one simulator."""
+
+    __slots__ = ('calls', 'seconds')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+
+
+class Profiler:
+    """Records the calls that mosaik makes to the simulators of a world.
+
+    Every call to a simulator (`init`, `create`, `step`, `get_data`, ...) is
+    timed when it passes through the proxy of the simulator, so simulators
+    running in this process and in other processes are measured alike,
+    without changes to the simulators. A ``DirectWorld`` reports the calls
+    it makes through `record` instead. The time of a call to a remote
+    simulator includes the transfer of its arguments and results. The
+    values returned by `get_data` are counted by output, with their size
+    once encoded as JSON.
+
+    Parameters
+    ----------
+    trace : bool
+        If True, every call is also kept as an event of a timeline that can
+        be written with `write_trace`.
+
+    Example
+    -------
+    ::
+
+        profiler = Profiler()
+        with profiler.attach():
+            world = mosaik.World(sim_config)
+            ...
+            world.run(until=96)
+        print(profiler.report())
+    """
+
+    def __init__(self, trace: bool = False) -> None:
+        self.trace = trace
+        self.stats = {}  # _Stats by (simulator id, method)
+        self.outputs = {}  # [values, bytes] by (simulator id, entity id, attribute)
+        self.connections = {}  # names of the connections of an output, by the key of `outputs`
+        self.events = []
+        self._sids = {}  # simulator id by proxy
+        self._origin = None
+
+    def _record(self, proxy, request, start: float, end: float, result) -> None:
+        method, args = request[0], request[1]
+        if method == 'init':
+            self._sids[proxy] = args[0]
+        self.record(self._sids.get(proxy, '?'), method, start, end, result)
+
+    def record(self, sid: str, method: str, start: float, end: float, result=None) -> None:
+        """Records a call to `method` of simulator `sid` that lasted from `start`
+        to `end`, as given by ``time.perf_counter``, and returned `result`."""
+        if self._origin is None:
+            self._origin = start
+        stats = self.stats.get((sid, method))
+        if stats is None:
+            stats = self.stats[(sid, method)] = _Stats()
+        stats.calls += 1
+        stats.seconds += end - start
+        if self.trace:
+            self.events.append((sid, method, start, end))
+        if method == 'get_data' and isinstance(result, dict):
+            for eid, values in result.items():
+                if not isinstance(values, dict):
+                    continue  # e.g. the 'time' of event-based outputs
+                for attr, value in values.items():
+                    volume = self.outputs.setdefault((sid, eid, attr), [0, 0])
+                    volume[0] += 1
+                    volume[1] += len(json.dumps(value, default=str))
+
+    def _wrap(self, send):
+        profiler = self
+
+        async def timed_send(proxy, request):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = await send(proxy, request)
+                return result
+            finally:
+                profiler._record(proxy, request, start, time.perf_counter(), result)
+
+        return timed_send
+
+    @contextmanager
+    def attach(self):
+        """Records the calls to simulators made within the context. Worlds and
+        simulators must be started within the context to be identified."""
+        originals = {proxy: proxy.send for proxy in PROXIES}
+        self._origin = time.perf_counter() if self._origin is None else self._origin
+        for proxy, send in originals.items():
+            proxy.send = self._wrap(send)
+        try:
+            yield self
+        finally:
+            for proxy, send in originals.items():
+                proxy.send = send
+
+    def add_connection(self, sid: str, eid: str, attr: str, name: str) -> None:
+        """Names a connection from output `attr` of entity `eid` of simulator
+        `sid`, e.g. 'PV.pv_gen -> Battery.flow2b', to show it in the report."""
+        self.connections.setdefault((sid, eid, attr), []).append(name)
+
+    def report(self) -> str:
+        """Returns the recorded calls ranked by total wall time, followed by the
+        data sent through every output."""
+        total = sum(stats.seconds for stats in self.stats.values()) or 1.0
+        lines = [f"{'Simulator':<24}{'Method':<14}{'Calls':>10}{'Total [s]':>12}{'Mean [ms]':>12}{'Share':>8}"]
+        ranked = sorted(self.stats.items(), key=lambda item: item[1].seconds, reverse=True)
+        for (sid, method), stats in ranked:
+            lines.append(f"{sid:<24}{method:<14}{stats.calls:>10}{stats.seconds:>12.3f}"
+                         f"{1000 * stats.seconds / stats.calls:>12.3f}{stats.seconds / total:>8.1%}")
+        if self.outputs:
+            lines.append('')
+            lines.append(f"{'Output':<48}{'Values':>10}{'Bytes':>12}  Connections")
+            ranked = sorted(self.outputs.items(), key=lambda item: item[1][1], reverse=True)
+            for key, (values, size) in ranked:
+                lines.append(f"{'.'.join(key):<48}{values:>10}{size:>12}  "
+                             f"{', '.join(self.connections.get(key, []))}")
+        return '\n'.join(lines)
+
+    def write_trace(self, path: str) -> None:
+        """Writes the recorded calls as a trace in the Chrome trace event format,
+        with one track per simulator. The trace can be opened in chrome://tracing
+        or https://ui.perfetto.dev."""
+        tracks = {}
+        events = []
+        for sid, method, start, end in self.events:
+            if sid not in tracks:
+                tracks[sid] = len(tracks) + 1
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tracks[sid],
+                               'args': {'name': sid}})
+            events.append({'name': method, 'cat': sid, 'ph': 'X', 'pid': 1, 'tid': tracks[sid],
+                           'ts': (start - self._origin) * 1e6, 'dur': (end - start) * 1e6})
+        with open(path, 'w') as _file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, _file)
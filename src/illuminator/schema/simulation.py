@@ -8,7 +8,7 @@ import re
 import os
 import json as json_module
 from ruamel.yaml import YAML
-from schema import Schema, And, Use, Regex, Optional, SchemaError, SchemaUnexpectedTypeError
+from schema import Schema, And, Or, Use, Regex, Optional, SchemaError, SchemaUnexpectedTypeError
 
 # valid format for start and end times: YYYY-MM-DD HH:MM:SS"
 valid_start_time = r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$'
@@ -58,15 +58,34 @@ def load_config_file(config_file: str, json:bool=False) -> dict | str:
     return valid_data
 
 
+# aggregation of a monitored item over time windows of 'every' seconds
+aggregation_rule = Schema(
+    {
+        "every": And(int, lambda n: n > 0, error="'every' must be a positive number of seconds"),
+        "agg": Or("min", "max", "mean", "sum", "last",
+                  error="'agg' must be one of 'min', 'max', 'mean', 'sum' or 'last'"),
+    }
+)
+
+
 def validate_model_item_format(items: list) -> list:
     """
     Validates the monitor section of the simulation configuration file, as
-    follows the format <model>.<item>
+    follows the format <model>.<item>. An item can also be a mapping of
+    <model>.<item> to an aggregation rule, e.g. {'PV.pv_gen': {'every': 3600, 'agg': 'mean'}}
     """
     pattern = re.compile(valid_model_item_format)
     for item in items:
-        if not pattern.match(item):
-            raise SchemaError(f"Invalid format for monitor item: {item}. "
+        if isinstance(item, dict):
+            if len(item) != 1:
+                raise SchemaError(f"Invalid monitor item: {item}. An aggregated item "
+                                  "must be a single <model>.<item>: {every: ..., agg: ...}")
+            name, rule = next(iter(item.items()))
+            aggregation_rule.validate(rule)
+        else:
+            name = item
+        if not isinstance(name, str) or not pattern.match(name):
+            raise SchemaError(f"Invalid format for monitor item: {name}. "
                               "Must be in the format: <model>.<item>")
     return items
 
@@ -129,6 +148,16 @@ schema = Schema(  # a mapping of mappings
                         Optional("time_resolution"): And(int, lambda n: n > 0,
                                                   error="time resolution must be a "
                                                   "positive integer"),
+                        Optional("execution"): Or("mosaik", "direct", error="'execution' must be "
+                                                  "either 'mosaik' or 'direct'"),
+                        Optional("checkpoint"): Schema({
+                            "every": And(int, lambda n: n > 0, error="'every' must be a positive "
+                                         "integer"),
+                            Optional("directory"): And(str, len, error="'directory' must be a "
+                                                       "non-empty string"),
+                            Optional("keep"): And(int, lambda n: n > 0, error="'keep' must be a "
+                                                  "positive integer"),
+                        }),
                     }
                 ),
                 "models": Schema(  # a sequence of mappings
@@ -163,6 +192,24 @@ schema = Schema(  # a mapping of mappings
         "monitor":  Schema(
             {
                 Optional("file"): And(str, len, Use(validate_directory_path, error="Path for 'file' does not exists..."), error="you must provide a non-empty string for 'file'"),
+                Optional("format"): Or("csv", "parquet", error="'format' must be either 'csv' or 'parquet'"),
+                Optional("row_group_size"): And(int, lambda n: n > 0, error="'row_group_size' must be a positive integer"),
+                Optional("retention"): Or("none", "ring", "stats", error="'retention' must be one of 'none', 'ring' or 'stats'"),
+                Optional("retention_steps"): And(int, lambda n: n > 0, error="'retention_steps' must be a positive integer"),
+                Optional("sinks"): And(list, len, [Schema({
+                    # YAML reads 'type: null' as None, which selects the null sink
+                    "type": And(Use(lambda t: 'null' if t is None else t), str, len,
+                                error="every sink must have a 'type'"),
+                    Optional("file"): And(str, len, Use(validate_directory_path, error="Path for 'file' does not exists...")),
+                    Optional("decimate"): And(int, lambda n: n > 0, error="'decimate' must be a positive integer"),
+                    Optional(str): object,
+                })], error="'sinks' must be a list of sink configurations, each with a 'type'"),
+                Optional("background"): And(bool, error="'background' must be true or false"),
+                Optional("mode"): Or("time-based", "event-based", error="'mode' must be either 'time-based' or 'event-based'"),
+                Optional("step_size"): And(int, lambda n: n > 0, error="'step_size' must be a positive integer"),
+                Optional("queue_size"): And(int, lambda n: n > 0, error="'queue_size' must be a positive integer"),
+                Optional("record"): Or("all", "changes", error="'record' must be either 'all' or 'changes'"),
+                Optional("tolerance"): And(Or(int, float), lambda n: n >= 0, error="'tolerance' must be a non-negative number"),
                 "items": And(list, len, Use(validate_model_item_format, error="Items in 'monitor' must have the format: <model>.<item>"), 
                         error="you must provide at least one item to monitor")
             }
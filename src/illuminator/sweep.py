@@ -0,0 +1,248 @@
+"""
+Parameter sweeps: running many variants of a simulation scenario, each with
+different values for some of its parameters, in parallel processes.
+"""
+
+import os
+import copy
+import time
+import tempfile
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from ruamel.yaml import YAML
+from schema import Schema, And, Optional
+from illuminator.checkpoint import DEFAULT_DIRECTORY
+from illuminator.engine import Simulation
+from illuminator.timeseries import is_columnar, load_csv_cached
+
+SUMMARY_FILE = 'summary.csv'
+DEFAULT_RESULTS_FILE = 'out.csv'
+# caches of the data files shared by the variants, unless the sweep sets 'cache_dir'
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'illuminator_cache')
+
+# sections of the configuration file that are addressed by name in a parameter path,
+# every other first component of a path is the name of a model
+CONFIG_SECTIONS = ('scenario', 'monitor')
+
+sweep_schema = Schema(
+    And({
+        "scenario": And(str, len),  # path to the base configuration file
+        "output_dir": And(str, len),
+        Optional("workers"): And(int, lambda n: n > 0, error="'workers' must be a positive integer"),
+        Optional("share_inputs"): bool,
+        Optional("cache_dir"): And(str, len),
+        Optional("grid"): {str: And(list, len, error="values of 'grid' must be non-empty lists")},
+        Optional("samples"): And(list, len, [{str: object}]),
+    },
+    lambda spec: 'grid' in spec or 'samples' in spec,
+    error="A sweep requires 'grid', 'samples' or both")
+)
+
+
+def load_sweep_file(sweep_file: str) -> dict:
+    """Returns the content of a sweep file written as YAML after
+    validating it. Raises a SchemaError if it is not valid."""
+    with open(sweep_file, 'r') as _file:
+        data = YAML(typ='safe').load(_file)
+    return sweep_schema.validate(data)
+
+
+def expand_variants(grid: dict = None, samples: list = None) -> list:
+    """
+    Returns the values of the parameters of every variant of a sweep.
+
+    Parameters
+    ----------
+    grid: dict
+        Lists of values by parameter path. Every combination of values is a variant.
+    samples: list
+        Values by parameter path, one mapping per variant. If given with `grid`,
+        every sample is combined with every combination of the grid.
+
+    Returns
+    -------
+    list
+        One dictionary of values by parameter path per variant. Example::
+
+            [{'PV.parameters.cap': 300, 'Battery.parameters.max_energy': 10}, ...]
+    """
+    grid = grid or {}
+    combinations = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    if not samples:
+        return combinations
+    return [{**sample, **combination} for sample in samples for combination in combinations]
+
+
+def set_parameter(config: dict, path: str, value) -> None:
+    """
+    Sets the value of a parameter of a configuration file, given by a path such as
+    'PV.parameters.cap' (model name, section and key) or 'scenario.end_time'.
+    Missing keys after the first component are created.
+    """
+    keys = path.split('.')
+    if len(keys) < 2:
+        raise KeyError(f"Invalid parameter path '{path}'. Use '<model-name>.<section>.<name>' or "
+                       f"'<{'|'.join(CONFIG_SECTIONS)}>.<name>'.")
+    if keys[0] in CONFIG_SECTIONS:
+        target = config[keys[0]]
+    else:
+        models = [model for model in config['models'] if model['name'] == keys[0]]
+        if not models:
+            raise KeyError(f"Invalid parameter path '{path}'. There is no model named '{keys[0]}'.")
+        target = models[0]
+    for key in keys[1:-1]:
+        if target.get(key) is None:
+            target[key] = {}
+        target = target[key]
+    target[keys[-1]] = value
+
+
+def redirect_results(config: dict, directory: str) -> None:
+    """Makes the monitor of `config` write its results files to `directory`,
+    keeping their names, and the checkpoints of the scenario to a directory
+    within it, so that variants neither overwrite nor resume from the
+    checkpoints of each other."""
+    checkpoint = config['scenario'].get('checkpoint')
+    if checkpoint:
+        name = os.path.basename(os.path.normpath(checkpoint.get('directory', DEFAULT_DIRECTORY)))
+        checkpoint['directory'] = os.path.join(directory, name)
+    monitor = config['monitor']
+    monitor['file'] = os.path.join(directory, os.path.basename(monitor.get('file', DEFAULT_RESULTS_FILE)))
+    for sink in monitor.get('sinks', []):
+        if 'file' in sink:
+            sink['file'] = os.path.join(directory, os.path.basename(sink['file']))
+
+
+def share_inputs(configs: list, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+    """
+    Makes the CSV models of several variants read their data files from the
+    binary cache, memory-mapped, so that each file is parsed once for the whole
+    sweep and its arrays are shared by the processes through the page cache.
+
+    The cache of every file is built here, before the variants start, in
+    `cache_dir` unless the model sets its own 'cache_dir', so that the
+    directories of the data files are not written to. Models that set 'cache'
+    or 'mmap' themselves, and Parquet and Feather files, are left unchanged.
+    A file that cannot be read is left to fail in its variants.
+    """
+    built = set()
+    for config in configs:
+        for model in config['models']:
+            parameters = model.get('parameters') or {}
+            datafile = parameters.get('datafile')
+            if model['type'] != 'CSV' or datafile is None or is_columnar(datafile) \
+                    or 'cache' in parameters or 'mmap' in parameters:
+                continue
+            parameters['cache'] = True
+            parameters['mmap'] = True
+            parameters.setdefault('cache_dir', cache_dir)
+            options = {key: parameters[key] for key in ('date_format', 'delimiter', 'cache_dir')
+                       if key in parameters}
+            key = (datafile, repr(sorted(options.items())))
+            if key in built:
+                continue
+            built.add(key)
+            try:
+                load_csv_cached(datafile, **options)
+            except (OSError, ValueError) as exc:
+                print(f"Warning: the data file {datafile} could not be cached: {exc}")
+
+
+def run_variant(config_file: str) -> float:
+    """Runs the simulation of one variant, and returns its duration in seconds."""
+    start = time.perf_counter()
+    simulation = Simulation(config_file)
+    if simulation.config is None:
+        raise ValueError(f"Invalid configuration file {config_file}.")
+    try:
+        simulation.run()
+    except SystemExit as exc:  # the engine exits on errors in the configuration
+        raise RuntimeError(f"The simulation exited with status {exc.code}.") from None
+    return time.perf_counter() - start
+
+
+def run_sweep(sweep: dict, workers: int = None) -> pd.DataFrame:
+    """
+    Runs every variant of a sweep in a pool of processes.
+
+    The configuration file of each variant is written to its own directory in
+    `output_dir`, named after the variant, where the monitor writes its results.
+    A variant that fails does not stop the others. The summary of the sweep is
+    written to 'summary.csv' in `output_dir`.
+
+    Parameters
+    ----------
+    sweep: dict
+        A sweep specification, as returned by `load_sweep_file`.
+    workers: int
+        Number of variants run at the same time. If None, the 'workers' of the
+        sweep are used, or the number of processors of the machine.
+
+    Returns
+    -------
+    pd.DataFrame
+        The summary of the sweep, with one row per variant: its name, the values of
+        its parameters, its directory, its 'status' ('ok' or 'failed'), its duration
+        in 'seconds' and its 'error', if any.
+    """
+    with open(sweep['scenario'], 'r') as _file:
+        base = YAML(typ='safe').load(_file)
+    variants = expand_variants(sweep.get('grid'), sweep.get('samples'))
+    width = len(str(len(variants) - 1))
+    yaml = YAML(typ='safe')
+    yaml.default_flow_style = False
+
+    rows = []
+    configs = {}
+    for number, values in enumerate(variants):
+        name = f'variant-{number:0{width}d}'
+        directory = os.path.join(sweep['output_dir'], name)
+        row = {'variant': name, **values, 'directory': directory,
+               'status': 'failed', 'seconds': None, 'error': None}
+        rows.append(row)
+        config = copy.deepcopy(base)
+        try:
+            for path, value in values.items():
+                set_parameter(config, path, value)
+        except KeyError as exc:
+            row['error'] = exc.args[0]
+            continue
+        redirect_results(config, directory)
+        configs[name] = config
+
+    if sweep.get('share_inputs', True) and len(configs) > 1:
+        share_inputs(list(configs.values()), sweep.get('cache_dir', DEFAULT_CACHE_DIR))
+
+    config_files = {}
+    for name, config in configs.items():
+        directory = os.path.join(sweep['output_dir'], name)
+        os.makedirs(directory, exist_ok=True)
+        config_files[name] = os.path.join(directory, 'config.yaml')
+        with open(config_files[name], 'w') as _file:
+            yaml.dump(config, _file)
+
+    workers = workers or sweep.get('workers') or os.cpu_count()
+    # spawned processes do not inherit the state of this one, such as event loops
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(config_files), 1)),
+                             mp_context=context) as pool:
+        futures = {name: pool.submit(run_variant, config_file)
+                   for name, config_file in config_files.items()}
+        for row in rows:
+            future = futures.get(row['variant'])
+            if future is None:
+                continue
+            try:
+                row['seconds'] = future.result()
+                row['status'] = 'ok'
+            except Exception as exc:
+                row['error'] = f'{type(exc).__name__}: {exc}'
+            print(f"{row['variant']}: {row['status']}" + (f" ({row['error']})" if row['error'] else ''))
+
+    paths = list(dict.fromkeys(path for values in variants for path in values))
+    summary = pd.DataFrame(rows, columns=['variant', *paths, 'directory', 'status', 'seconds', 'error'])
+    os.makedirs(sweep['output_dir'], exist_ok=True)
+    summary.to_csv(os.path.join(sweep['output_dir'], SUMMARY_FILE), index=False)
+    return summary
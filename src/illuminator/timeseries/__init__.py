@@ -0,0 +1,11 @@
+from .loader import TimeSeries, load_csv, parse_attrs
+from .timestamps import parse_time, parse_times
+from .cache import load_csv_cached
+from .resample import RESAMPLE_METHODS, resample
+from .columnar import is_columnar, load_table, table_attrs
+from .index import build_index, load_index, seek_offset
+
+__all__ = ['TimeSeries', 'load_csv', 'parse_attrs', 'parse_time', 'parse_times',
+           'load_csv_cached', 'RESAMPLE_METHODS', 'resample',
+           'is_columnar', 'load_table', 'table_attrs',
+           'build_index', 'load_index', 'seek_offset']
@@ -0,0 +1,166 @@
+"""
+On-disk cache of parsed input files. The arrays of a file are stored as
+raw ``.npy`` files in a cache directory, with a small JSON header that
+identifies the version of the source file they were parsed from. Loading
+them takes milliseconds, and they are parsed again whenever the source
+file or the parsing options change. The arrays of each version are written
+to a temporary directory that is renamed once complete, so that readers
+never see the arrays of different versions together.
+
+The cached arrays can also be memory-mapped instead of read. Processes
+that map the same file share its pages in the page cache of the operating
+system, and only the pages of the rows that are accessed are read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import warnings
+import numpy as np
+from .loader import TimeSeries, load_csv
+
+CACHE_VERSION = 1
+CACHE_DIRNAME = '.illuminator_cache'
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def cache_path(path: str, cache_dir: str = None) -> str:
+    """Returns the directory that holds the cached data of `path`. By
+    default, it is in a '.illuminator_cache' directory next to `path`. Its
+    name includes a hash of the absolute path, so that files with the same
+    name in different directories can share `cache_dir`."""
+    path = os.path.abspath(path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(path), CACHE_DIRNAME)
+    return os.path.join(cache_dir, f'{os.path.basename(path)}-{_digest(path)}')
+
+
+def cache_key(path: str, **options) -> dict:
+    """Returns the key that identifies the arrays parsed from `path` with
+    `options`. The size and modification time of the file stand for its
+    content, which is not hashed to avoid reading the whole file."""
+    stat = os.stat(path)
+    return {'version': CACHE_VERSION, 'path': os.path.abspath(path),
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, **options}
+
+
+def arrays_path(directory: str, key: dict) -> str:
+    """Returns the directory, within the cache directory `directory`, that
+    holds the arrays parsed with `key`."""
+    return os.path.join(directory, 'arrays-' + _digest(json.dumps(key, sort_keys=True)))
+
+
+def read_cache(directory: str, key: dict, mmap: bool = False) -> TimeSeries | None:
+    """Returns the arrays cached in `directory`, or None if there are none
+    or they were stored with a different key. If `mmap` is True, the values
+    are memory-mapped read-only instead of read."""
+    directory = arrays_path(directory, key)
+    try:
+        with open(os.path.join(directory, 'header.json')) as header_file:
+            header = json.load(header_file)
+        if header['key'] != key:
+            return None
+        times = np.load(os.path.join(directory, 'times.npy'))
+        values = np.load(os.path.join(directory, 'values.npy'), mmap_mode='r' if mmap else None)
+        return TimeSeries(times, values, header['attrs'])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def atomic_write(directory: str, name: str, write) -> None:
+    """Writes a file with `write` under a temporary name and renames it, so
+    that concurrent readers never see a partial file."""
+    target = os.path.join(directory, name)
+    temporary = f'{target}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        write(file)
+    os.replace(temporary, target)
+
+
+def _remove_stale(directory: str, key: dict) -> None:
+    """Removes the arrays cached in `directory` for other versions of the
+    file. Arrays parsed from the same version with other options are kept."""
+    version = {name: key[name] for name in ('version', 'size', 'mtime_ns')}
+    for name in os.listdir(directory):
+        if not name.startswith('arrays-'):
+            continue
+        try:
+            with open(os.path.join(directory, name, 'header.json')) as header_file:
+                stored = json.load(header_file)['key']
+            if all(stored.get(field) == value for field, value in version.items()):
+                continue
+        except (OSError, ValueError, KeyError):
+            pass
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def write_cache(directory: str, key: dict, data: TimeSeries) -> None:
+    """Stores the arrays of `data` in `directory`. They are written to a
+    temporary directory that is renamed once all files are complete, and
+    the arrays of other versions of the file are removed."""
+    os.makedirs(directory, exist_ok=True)
+    temporary = tempfile.mkdtemp(prefix='.arrays-', dir=directory)
+    try:
+        np.save(os.path.join(temporary, 'times.npy'), data.times)
+        np.save(os.path.join(temporary, 'values.npy'), data.values)
+        header = json.dumps({'key': key, 'attrs': data.attrs, 'shape': list(data.values.shape)})
+        with open(os.path.join(temporary, 'header.json'), 'w') as header_file:
+            header_file.write(header)
+        try:
+            os.replace(temporary, arrays_path(directory, key))
+        except OSError:
+            # another process stored the same arrays first
+            if read_cache(directory, key) is None:
+                raise
+    finally:
+        shutil.rmtree(temporary, ignore_errors=True)
+    _remove_stale(directory, key)
+
+
+def load_csv_cached(path: str, date_format: str = 'YYYY-MM-DD HH:mm:ss',
+                    delimiter: str = ',', cache_dir: str = None,
+                    mmap: bool = False) -> TimeSeries:
+    """Reads a CSV input file like `load_csv`, from its cached arrays if they
+    are up to date. Otherwise, the file is parsed and the cache updated.
+
+    Parameters
+    ----------
+    path : str
+        Path to the input file.
+    date_format : str
+        Format of the timestamps, with the tokens of the ``arrow`` package.
+    delimiter : str
+        Character that separates the columns.
+    cache_dir : str
+        Directory of the cache. By default, '.illuminator_cache' next to
+        the input file.
+    mmap : bool
+        If True, the cached values are memory-mapped instead of read. The
+        values stay in memory if they cannot be cached.
+
+    Returns
+    -------
+    TimeSeries
+        The values of the file.
+    """
+    directory = cache_path(path, cache_dir)
+    key = cache_key(path, date_format=date_format, delimiter=delimiter)
+    data = read_cache(directory, key, mmap)
+    if data is None:
+        data = load_csv(path, date_format, delimiter)
+        try:
+            write_cache(directory, key, data)
+        except OSError as exc:
+            warnings.warn(f"Parsed data of {path} could not be cached in {directory}: {exc}")
+        else:
+            if mmap:
+                # map the new cache, so that the parsed copy can be released
+                data = read_cache(directory, key, mmap) or data
+    return data
@@ -0,0 +1,128 @@
+"""
+Loaders for columnar input files, Parquet and Feather (Arrow IPC), that
+read only the requested columns and time range. The first column holds
+the timestamps, as timestamps, as seconds since the epoch or as strings,
+and every other column is an attribute. Requires the optional dependency
+``pyarrow``.
+"""
+
+import os
+import numpy as np
+from .loader import TimeSeries
+from .timestamps import parse_times
+
+COLUMNAR_EXTENSIONS = ('.parquet', '.feather', '.arrow')
+
+
+def is_columnar(path: str) -> bool:
+    """Returns True if `path` is a Parquet or Feather file, by its extension."""
+    return os.path.splitext(path)[1] in COLUMNAR_EXTENSIONS
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError("Reading Parquet and Feather files requires 'pyarrow'. "
+                          "Install it with: pip install illuminator[parquet]") from exc
+    return pyarrow
+
+
+def read_schema(path: str):
+    """Returns the Arrow schema of a columnar file, without reading its data."""
+    pa = _import_pyarrow()
+    if os.path.splitext(path)[1] == '.parquet':
+        return pa.parquet.read_schema(path)
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).schema
+
+
+def table_attrs(path: str) -> list:
+    """Returns the attribute names of a columnar file, all columns but the first."""
+    return read_schema(path).names[1:]
+
+
+def _bound(field, timestamp: int, date_format: str):
+    """Returns `timestamp` as a value comparable with the time column."""
+    pa = _import_pyarrow()
+    if pa.types.is_timestamp(field.type):
+        return pa.scalar(timestamp, type=pa.timestamp('s')).cast(field.type)
+    if pa.types.is_integer(field.type):
+        return timestamp
+    # strings in the default layout sort like the timestamps they represent
+    if date_format != 'YYYY-MM-DD HH:mm:ss':
+        return None
+    return np.datetime64(timestamp, 's').astype(str).replace('T', ' ')
+
+
+def load_table(path: str, columns: list = None, start: int = None, end: int = None,
+               date_format: str = 'YYYY-MM-DD HH:mm:ss') -> TimeSeries:
+    """Reads a Parquet or Feather input file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the input file.
+    columns : list
+        Names of the attributes to read. If None, all attributes are read.
+    start : int
+        If given, rows before this timestamp, in seconds since the epoch,
+        are not read. Parquet row groups outside of the range are skipped.
+    end : int
+        If given, rows after this timestamp are not read.
+    date_format : str
+        Format of the timestamps if they are stored as strings, with the
+        tokens of the ``arrow`` package. The time range is only pushed down
+        to the reader for the default format; for other formats it is
+        applied after parsing.
+
+    Returns
+    -------
+    TimeSeries
+        The values of the requested attributes.
+    """
+    pa = _import_pyarrow()
+    schema = read_schema(path)
+    field = schema.field(0)
+    attrs = schema.names[1:] if columns is None else list(columns)
+    unknown = set(attrs) - set(schema.names[1:])
+    if unknown:
+        raise ValueError(f"Columns {sorted(unknown)} not in {path}.")
+
+    bounds = [(op, None if value is None else _bound(field, value, date_format))
+              for op, value in (('>=', start), ('<=', end))]
+    filters = [(field.name, op, bound) for op, bound in bounds if bound is not None]
+
+    if os.path.splitext(path)[1] == '.parquet':
+        table = pa.parquet.read_table(path, columns=[field.name] + attrs, filters=filters or None)
+    else:
+        table = pa.feather.read_table(path, columns=[field.name] + attrs, memory_map=True)
+        for name, op, bound in filters:
+            compare = pa.compute.greater_equal if op == '>=' else pa.compute.less_equal
+            table = table.filter(compare(table.column(name), bound))
+
+    time_column = table.column(0)
+    if pa.types.is_timestamp(field.type):
+        times = time_column.cast(pa.timestamp('s')).to_numpy().astype(np.int64)
+    elif pa.types.is_integer(field.type):
+        times = time_column.to_numpy().astype(np.int64)
+    else:
+        times = parse_times(time_column.to_pylist(), date_format)
+
+    if len(filters) < sum(value is not None for _, value in bounds):
+        # the range could not be pushed down
+        keep = np.ones(len(times), dtype=bool)
+        if start is not None:
+            keep &= times >= start
+        if end is not None:
+            keep &= times <= end
+        times = times[keep]
+        table = table.filter(pa.array(keep))
+
+    values = np.empty((len(times), len(attrs)), dtype=np.float64)
+    for i, attr in enumerate(attrs):
+        values[:, i] = table.column(attr).to_numpy(zero_copy_only=False)
+    return TimeSeries(times, values, attrs)
@@ -0,0 +1,81 @@
+"""
+Sparse time index of CSV input files. The index holds the timestamp and
+the byte offset of every N-th row, so that a reader can seek close to any
+timestamp instead of parsing the file from its first row. It is stored
+next to the cached arrays of the file and rebuilt when the file changes.
+"""
+
+import json
+import os
+import warnings
+import numpy as np
+from .cache import atomic_write, cache_key, cache_path
+from .timestamps import parse_times
+
+
+def build_index(path: str, date_format: str = 'YYYY-MM-DD HH:mm:ss', delimiter: str = ',',
+                every: int = 1000) -> np.ndarray:
+    """Returns the timestamps and byte offsets of every `every`-th row of a
+    CSV input file, starting with the first row, as an int64 array of shape
+    (rows, 2). Only the timestamps of these rows are parsed."""
+    if every < 1:
+        raise ValueError("'every' must be a positive integer.")
+    separator = delimiter.encode()
+    dates, offsets = [], []
+    with open(path, 'rb') as datafile:
+        datafile.readline()  # name of the dataset
+        datafile.readline()  # header
+        offset = datafile.tell()
+        for i, line in enumerate(iter(datafile.readline, b'')):
+            if i % every == 0 and line.strip():
+                dates.append(line.split(separator, 1)[0].decode())
+                offsets.append(offset)
+            offset += len(line)
+    times = parse_times(dates, date_format)
+    return np.column_stack([times, np.array(offsets, dtype=np.int64)])
+
+
+def load_index(path: str, date_format: str = 'YYYY-MM-DD HH:mm:ss', delimiter: str = ',',
+               every: int = 1000, cache_dir: str = None) -> np.ndarray:
+    """Returns the time index of a CSV input file, see `build_index`. The
+    index is read from the cache directory of the file if it is up to date,
+    otherwise it is built and stored there.
+
+    Parameters
+    ----------
+    path : str
+        Path to the input file.
+    date_format : str
+        Format of the timestamps, with the tokens of the ``arrow`` package.
+    delimiter : str
+        Character that separates the columns.
+    every : int
+        Number of rows between two entries of the index.
+    cache_dir : str
+        Directory of the cache. By default, '.illuminator_cache' next to
+        the input file.
+    """
+    directory = cache_path(path, cache_dir)
+    key = cache_key(path, date_format=date_format, delimiter=delimiter, every=every)
+    try:
+        with open(os.path.join(directory, 'index.json')) as header_file:
+            if json.load(header_file)['key'] == key:
+                return np.load(os.path.join(directory, 'index.npy'))
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = build_index(path, date_format, delimiter, every)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        atomic_write(directory, 'index.npy', lambda file: np.save(file, index))
+        atomic_write(directory, 'index.json', lambda file: file.write(json.dumps({'key': key}).encode()))
+    except OSError as exc:
+        warnings.warn(f"Time index of {path} could not be stored in {directory}: {exc}")
+    return index
+
+
+def seek_offset(index: np.ndarray, timestamp: int) -> int:
+    """Returns the byte offset of the last indexed row at or before
+    `timestamp`, or of the first row if there is none."""
+    position = np.searchsorted(index[:, 0], timestamp, side='right') - 1
+    return int(index[max(position, 0), 1])
@@ -0,0 +1,92 @@
+"""
+Loaders that read the input files of data-source models, such as the CSV
+simulator, into NumPy arrays. Input files have the name of the dataset in
+the first line, a header in the second line and one row per timestamp,
+with the timestamp in the first column.
+"""
+
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from .timestamps import parse_times
+
+
+@dataclass
+class TimeSeries:
+    """Values of a dataset indexed by timestamp.
+
+    Attributes
+    ----------
+    times : np.ndarray
+        Timestamps of the rows as seconds since the epoch (int64), in
+        increasing order.
+    values : np.ndarray
+        Values as a float64 array of shape (len(times), len(attrs)).
+    attrs : list
+        Names of the columns of `values`.
+    """
+    times: np.ndarray
+    values: np.ndarray
+    attrs: list
+
+    def __post_init__(self) -> None:
+        if self.values.shape != (len(self.times), len(self.attrs)):
+            raise ValueError(f"Expected values of shape {(len(self.times), len(self.attrs))}, "
+                             f"got {self.values.shape}.")
+        if len(self.times) > 1 and np.any(np.diff(self.times) <= 0):
+            raise ValueError("Timestamps must be in strictly increasing order.")
+
+    def index_of(self, timestamp: int) -> int:
+        """Returns the index of the row at `timestamp`, found by binary
+        search. Raises KeyError if there is no row at `timestamp`."""
+        index = int(np.searchsorted(self.times, timestamp))
+        if index == len(self.times) or self.times[index] != timestamp:
+            raise KeyError(timestamp)
+        return index
+
+    def changes(self, start: int = 0) -> np.ndarray:
+        """Returns the indices of the rows after `start` whose values differ
+        from the values of the previous row."""
+        values = self.values[start:]
+        return np.flatnonzero(np.any(values[1:] != values[:-1], axis=1)) + start + 1
+
+    def row(self, index: int) -> dict:
+        """Returns the values of the row at `index` by attribute name."""
+        return dict(zip(self.attrs, self.values[index].tolist()))
+
+
+def parse_attrs(header: str, delimiter: str = ',') -> list:
+    """Returns the attribute names in the `header` line of an input file,
+    without the name of the timestamp column and without comments, which
+    start with '#'."""
+    attrs = header.strip().split(delimiter)[1:]
+    return [attr.split('#', 1)[0].strip() for attr in attrs]
+
+
+def load_csv(path: str, date_format: str = 'YYYY-MM-DD HH:mm:ss',
+             delimiter: str = ',') -> TimeSeries:
+    """Reads a whole CSV input file at once.
+
+    Parameters
+    ----------
+    path : str
+        Path to the input file.
+    date_format : str
+        Format of the timestamps, with the tokens of the ``arrow`` package.
+    delimiter : str
+        Character that separates the columns.
+
+    Returns
+    -------
+    TimeSeries
+        The values of the file.
+    """
+    with open(path) as datafile:
+        next(datafile)  # name of the dataset
+        attrs = parse_attrs(next(datafile), delimiter)
+        df = pd.read_csv(datafile, sep=delimiter, header=None,
+                         names=range(len(attrs) + 1), dtype={0: str})
+
+    times = parse_times(df[0], date_format)
+    values = df.iloc[:, 1:].to_numpy(dtype=np.float64)
+    return TimeSeries(times, values, attrs)
@@ -0,0 +1,70 @@
+"""
+Resampling of time series to the time resolution of a simulation, so that
+data files can be used with any time resolution.
+"""
+
+import numpy as np
+from .loader import TimeSeries
+
+RESAMPLE_METHODS = ('hold', 'linear', 'mean')
+
+
+def resample(data: TimeSeries, start: int, step: int, method: str = 'hold') -> TimeSeries:
+    """Returns the values of `data` at every `step` seconds from `start`
+    until the last timestamp of `data`.
+
+    Parameters
+    ----------
+    data : TimeSeries
+        The values to resample.
+    start : int
+        First timestamp, as seconds since the epoch. Must be within the
+        timestamps of `data`.
+    step : int
+        Number of seconds between two timestamps of the result.
+    method : str
+        'hold' to take the value of the last row at or before each timestamp,
+        'linear' to interpolate linearly between the rows around each
+        timestamp, or 'mean' to average the rows from each timestamp up to
+        the next one. Timestamps without rows in the latter case hold the
+        value of the last row before them. NaN values are ignored by 'mean'.
+
+    Returns
+    -------
+    TimeSeries
+        The resampled values.
+    """
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(f"Unknown resampling method '{method}'. "
+                         f"Valid methods are {', '.join(RESAMPLE_METHODS)}.")
+    if step < 1:
+        raise ValueError("'step' must be a positive number of seconds.")
+    times = data.times
+    if len(times) == 0 or not times[0] <= start <= times[-1]:
+        raise KeyError(start)
+
+    grid = np.arange(start, times[-1] + 1, step, dtype=np.int64)
+    # index of the last row at or before each timestamp
+    previous = np.searchsorted(times, grid, side='right') - 1
+
+    if method == 'hold':
+        values = data.values[previous]
+    elif method == 'linear':
+        values = np.empty((len(grid), len(data.attrs)))
+        for i in range(len(data.attrs)):
+            values[:, i] = np.interp(grid, times, data.values[:, i])
+    else:
+        first = np.searchsorted(times, grid, side='left')
+        last = np.searchsorted(times, grid + step, side='left')
+        valid = ~np.isnan(data.values)
+        sums = np.vstack([np.zeros((1, len(data.attrs))),
+                          np.cumsum(np.where(valid, data.values, 0.0), axis=0)])
+        counts = np.vstack([np.zeros((1, len(data.attrs)), dtype=np.int64),
+                            np.cumsum(valid, axis=0)])
+        interval_sums = sums[last] - sums[first]
+        interval_counts = counts[last] - counts[first]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(interval_counts > 0, interval_sums / interval_counts,
+                              data.values[previous])
+
+    return TimeSeries(grid, np.ascontiguousarray(values, dtype=np.float64), list(data.attrs))
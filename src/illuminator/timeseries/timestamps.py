@@ -0,0 +1,83 @@
+"""
+Parsing of the timestamps of input files into seconds since the epoch
+(UTC). Timestamps in the layout 'YYYY-MM-DD HH:mm:ss', the one required
+by the schema of the configuration file, are parsed by a fast path; other
+formats fall back to a generic use of pandas, or to the general parser
+of ``arrow``.
+"""
+
+from __future__ import annotations
+
+import calendar
+import re
+from datetime import datetime
+import arrow
+import numpy as np
+import pandas as pd
+
+DEFAULT_DATE_FORMAT = 'YYYY-MM-DD HH:mm:ss'
+_FIXED_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# arrow tokens that have an equivalent strptime directive
+_STRPTIME_DIRECTIVES = {'YYYY': '%Y', 'MM': '%m', 'DD': '%d',
+                        'HH': '%H', 'mm': '%M', 'ss': '%S'}
+_TOKENS = re.compile(r'\[.*?\]|YYYY|MM|DD|HH|mm|ss|[A-Za-z]+')
+
+
+def _strptime_format(date_format: str) -> str | None:
+    """Returns the strptime equivalent of an arrow `date_format`, or None
+    if it uses tokens without equivalent."""
+    supported = True
+
+    def replace(match):
+        nonlocal supported
+        token = match.group()
+        if token in _STRPTIME_DIRECTIVES:
+            return _STRPTIME_DIRECTIVES[token]
+        supported = False
+        return token
+
+    strptime_format = _TOKENS.sub(replace, date_format.replace('%', '%%'))
+    return strptime_format if supported else None
+
+
+def _seconds(times: pd.Series) -> np.ndarray:
+    return times.to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+
+def parse_times(values, date_format: str = DEFAULT_DATE_FORMAT) -> np.ndarray:
+    """Returns timestamps in `date_format` as seconds since the epoch.
+
+    Timestamps in the default format are parsed at once by the ISO 8601
+    parser of pandas. Other formats made of numeric year, month, day, hour,
+    minute and second tokens are parsed at once by pandas after stripping
+    whitespace; the remaining formats, and the values that pandas cannot
+    parse, are parsed one by one by ``arrow``, which also reports invalid
+    timestamps.
+    """
+    if date_format == DEFAULT_DATE_FORMAT:
+        try:
+            return _seconds(pd.to_datetime(pd.Series(values, dtype=object), format=_FIXED_FORMAT))
+        except ValueError:
+            pass  # e.g. surrounding whitespace or dates out of the range of pandas
+    strptime_format = _strptime_format(date_format)
+    if strptime_format is not None:
+        try:
+            return _seconds(pd.to_datetime(pd.Series(values, dtype=str).str.strip(),
+                                           format=strptime_format))
+        except ValueError:
+            pass  # let arrow report the invalid timestamp
+    return np.array([arrow.get(value.strip(), date_format).int_timestamp for value in values],
+                    dtype=np.int64)
+
+
+def parse_time(value: str, date_format: str = DEFAULT_DATE_FORMAT) -> int:
+    """Returns a single timestamp in `date_format` as seconds since the epoch.
+    Timestamps in the default format are parsed by ``datetime``, which is
+    much faster than the general parser of ``arrow`` used for other formats."""
+    if date_format == DEFAULT_DATE_FORMAT and len(value) == 19 and value[10] == ' ':
+        try:
+            return calendar.timegm(datetime.fromisoformat(value).timetuple())
+        except ValueError:
+            pass  # let arrow report the invalid timestamp
+    return arrow.get(value, date_format).int_timestamp
@@ -0,0 +1,112 @@
+"""
+Unit tests for the Collector simulator.
+"""
+
+import pandas as pd
+import pytest
+from illuminator.models.collector import Collector
+from illuminator.monitor import densify, load_results
+
+
+def init_collector(tmp_path, columns=None, **kwargs):
+    collector = Collector()
+    collector.init('Collector-0', time_resolution=60, start_date='2012-01-01 00:00:00',
+                   sinks=[{'type': 'csv', 'file': str(tmp_path / 'out.csv')}],
+                   background=False, **kwargs)
+    collector.create(1, 'Monitor', columns=columns)
+    return collector
+
+
+class TestCollectorStep:
+    """
+    Tests for the step method of the Collector.
+    """
+
+    def test_time_based_step(self, tmp_path):
+        """The next step is `step_size` time units later, whatever the time resolution"""
+        collector = init_collector(tmp_path)
+        assert collector.step(0, {}, 100) == 1
+
+        collector = init_collector(tmp_path, step_size=15)
+        assert collector.step(30, {}, 100) == 45
+
+    def test_legacy_step(self, tmp_path):
+        """Collectors that select their outputs with results_show keep steps of 900 time units"""
+        collector = Collector()
+        collector.init('Collector-0', time_resolution=1, start_date='2012-01-01 00:00:00',
+                       results_show={'write2csv': True}, output_file=str(tmp_path / 'out.csv'),
+                       background=False)
+        collector.create(1, 'Monitor')
+        assert collector.step(0, {}, 10000) == 900
+
+    def test_event_based_step(self, tmp_path):
+        """An event-based monitor does not schedule its own steps"""
+        collector = init_collector(tmp_path, mode='event-based')
+        assert collector.meta['type'] == 'event-based'
+        assert collector.step(0, {}, 100) is None
+
+    def test_invalid_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            init_collector(tmp_path, mode='real-time')
+
+    def test_dates_follow_time_resolution(self, tmp_path):
+        """Rows are stamped with the date of the simulation time"""
+        collector = init_collector(tmp_path)
+        for time in range(3):
+            collector.step(time, {'Monitor': {'pv_gen': {'PV-0.pv_0': float(time)}}}, 100)
+        collector.finalize()
+
+        df = pd.read_csv(tmp_path / 'out.csv', parse_dates=['date'])
+        assert list(df['date']) == list(pd.date_range('2012-01-01 00:00:00', periods=3, freq='60s'))
+        assert list(df['PV-0.pv_0-pv_gen']) == [0.0, 1.0, 2.0]
+
+    def test_items_without_first_value(self, tmp_path):
+        """Monitored items whose first value arrives after the first row are written"""
+        collector = init_collector(tmp_path, mode='event-based',
+                                   columns=['PV-0.pv_0-pv_gen', 'Battery-0.battery_0-soc'])
+        collector.step(0, {'Monitor': {'pv_gen': {'PV-0.pv_0': 1.0}}}, 100)
+        collector.step(1, {'Monitor': {'soc': {'Battery-0.battery_0': 0.5}}}, 100)
+        collector.finalize()
+
+        df = pd.read_csv(tmp_path / 'out.csv')
+        assert list(df.columns) == ['date', 'PV-0.pv_0-pv_gen', 'Battery-0.battery_0-soc']
+        assert list(df['Battery-0.battery_0-soc'].fillna(-1)) == [-1, 0.5]
+
+
+class TestCollectorPrint:
+    """
+    Tests for the printing of the collected values.
+    """
+
+    def test_print_results(self, tmp_path, capsys):
+        """Printed results keep the last values by default"""
+        collector = init_collector(tmp_path, print_results=True)
+        collector.step(0, {'Monitor': {'pv_gen': {'PV-0.pv_0': 1.0}}}, 100)
+        collector.finalize()
+        assert 'pv_gen: {0: 1.0}' in capsys.readouterr().out
+
+    def test_print_without_retention(self, tmp_path):
+        with pytest.warns(UserWarning, match='prints nothing'):
+            init_collector(tmp_path, print_results=True, retention='none')
+
+
+class TestCollectorRecord:
+    """
+    Tests for the change-only recording of the Collector.
+    """
+
+    def test_changes_only(self, tmp_path):
+        """Only changed values are written, and the dense series can be rebuilt"""
+        collector = init_collector(tmp_path, record='changes')
+        socs = [0.5, 0.5, 0.5, 0.7, 0.7]
+        for time, soc in enumerate(socs):
+            collector.step(time, {'Monitor': {'soc': {'Battery-0.battery_0': soc}}}, 100)
+        collector.finalize()
+
+        df = load_results(str(tmp_path / 'out.csv'))
+        assert len(df) == 3  # first value, change and end of the simulation
+        assert list(densify(df, freq='60s')['Battery-0.battery_0-soc']) == socs
+
+    def test_invalid_record(self, tmp_path):
+        with pytest.raises(ValueError):
+            init_collector(tmp_path, record='sometimes')
@@ -0,0 +1,49 @@
+import pytest
+import numpy as np
+import pandas as pd
+from illuminator.models.LoadinNetSim.model import LoadModel
+
+
+def create_model(times, start='2021-05-21 00:00:00'):
+    profile = pd.DataFrame({'Time': times,
+                            'Load R1': np.arange(len(times), dtype=float),
+                            'Load R11': np.arange(len(times)) * 10})
+    return LoadModel({'start': start, 'resolution': 15, 'unit': 'W'}, profile)
+
+
+class TestLoadModel():
+    """
+    Unit tester for the load model of LoadinNetSim
+    """
+
+    def test_get(self):
+        model = create_model(['2021-05-21 00:00', '2021-05-21 00:15', '2021-05-21 00:30'])
+        assert list(model.get(0)) == [0.0, 0.0]
+        assert list(model.get(29)) == [1.0, 10.0]  # trimmed to 15 minutes
+        assert list(model.get(30)) == [2.0, 20.0]
+        with pytest.raises(IndexError):
+            model.get(45)
+
+    def test_same_as_lookup_by_time(self):
+        """Rows are found like a lookup by time: the profiles may start after 'start', have gaps,
+        duplicated times and times between steps"""
+        times = ['2021-05-21 00:30', '2021-05-21 00:40', '2021-05-21 00:45', '2021-05-21 00:45',
+                 '2021-05-21 01:15']
+        model = create_model(times, start='2021-05-21 00:00')
+        profile = model.data
+        for minutes in range(0, 120, 15):
+            target = pd.Timestamp('2021-05-21 00:00') + pd.Timedelta(minutes=minutes)
+            expected = profile[profile['Time'] == target]
+            if len(expected) == 0:
+                with pytest.raises(IndexError):
+                    model.get(minutes)
+            else:
+                assert list(model.get(minutes)) == list(expected.iloc[0][model.load_ids])
+
+    def test_get_returns_view(self):
+        """Getting a row allocates no copy of the profiles"""
+        model = create_model(['2021-05-21 00:00', '2021-05-21 00:15'])
+        values = model.get(15)
+        assert np.shares_memory(values, model._values)
+        with pytest.raises(ValueError):
+            values[0] = 1.0
@@ -0,0 +1,186 @@
+"""
+Unit tests for the CSV simulator.
+"""
+
+import pandas as pd
+import pytest
+from illuminator.models.mosaik_csv import CSV
+
+DATAFILE = 'tests/data/solar-sample.csv'
+
+
+def start_csv(sim_start='2012-01-01 00:00:00', **kwargs):
+    simulator = CSV()
+    simulator.init('CSV-0', time_resolution=900, sim_start=sim_start, datafile=DATAFILE, **kwargs)
+    simulator.create(1, 'CSV')
+    return simulator
+
+
+class TestPreload:
+    """
+    Tests for the CSV simulator with a preloaded data file.
+    """
+
+    def test_same_output_as_streaming(self):
+        """Preloading the file does not change the steps and values"""
+        streaming = start_csv('2012-01-01 00:30:00')
+        preloaded = start_csv('2012-01-01 00:30:00', preload=True)
+        outputs = {'CSV_0': ['G_Gh', 'Ta', 'Az']}
+        for time in range(6):
+            assert preloaded.step(time, {}, 100) == streaming.step(time, {}, 100)
+            assert preloaded.get_data(outputs) == streaming.get_data(outputs)
+        streaming.finalize()
+
+    def test_mmap(self, tmp_path):
+        """Values of a memory-mapped cache are the same as those of the file"""
+        streaming = start_csv()
+        mapped = start_csv(mmap=True, cache_dir=str(tmp_path))
+        assert mapped.step(0, {}, 100) == streaming.step(0, {}, 100)
+        assert mapped.get_data({'CSV_0': ['Ta']}) == streaming.get_data({'CSV_0': ['Ta']})
+        streaming.finalize()
+
+    def test_resample(self):
+        """Files with another resolution than the simulation can be used"""
+        simulator = CSV()
+        simulator.init('CSV-0', time_resolution=300, sim_start='2012-01-01 00:10:00',
+                       datafile=DATAFILE, resample='linear')
+        simulator.create(1, 'CSV')
+        assert simulator.step(0, {}, 100) == 1
+        assert simulator.get_data({'CSV_0': ['Az']})['CSV_0']['Az'] == pytest.approx(-168.25333, abs=1e-4)
+
+    def test_start_not_in_file(self):
+        with pytest.raises(ValueError):
+            start_csv('2012-01-01 00:10:00', preload=True)
+
+    def test_wrong_date(self):
+        simulator = start_csv(preload=True)
+        with pytest.raises(IndexError):
+            simulator.step(2, {}, 100)
+
+    def test_end_of_file(self):
+        """The last row is followed by `max_advance`, then an error"""
+        simulator = start_csv('2012-01-01 01:45:00', preload=True)
+        assert simulator.step(0, {}, 100) == 100
+        with pytest.raises(IndexError):
+            simulator.step(1, {}, 100)
+
+
+@pytest.fixture
+def setpoints(tmp_path):
+    """A data file with values that hold for several rows"""
+    path = tmp_path / 'setpoints.csv'
+    rows = [(0, 1.0), (15, 1.0), (30, 1.0), (45, 2.0), (60, 2.0), (75, 3.0)]
+    path.write_text('Setpoints\nTime,p\n' + ''.join(
+        f'2012-01-01 {minute // 60:02d}:{minute % 60:02d}:00,{p}\n' for minute, p in rows))
+    return str(path)
+
+
+class TestIndex:
+    """
+    Tests for the CSV simulator reading a file with a time index.
+    """
+
+    def test_same_output_without_index(self, tmp_path):
+        """Seeking with the index gives the same steps and values as reading from the top"""
+        indexed = start_csv('2012-01-01 01:00:00', index=True, index_every=3, cache_dir=str(tmp_path))
+        streaming = start_csv('2012-01-01 01:00:00')
+        for time in range(4):
+            assert indexed.step(time, {}, 100) == streaming.step(time, {}, 100)
+            assert indexed.get_data({'CSV_0': ['Az']}) == streaming.get_data({'CSV_0': ['Az']})
+        indexed.finalize()
+        streaming.finalize()
+
+
+class TestLookahead:
+    """
+    Tests for the lookahead and horizon parameters of the CSV simulator.
+    """
+
+    def start(self, datafile, **kwargs):
+        simulator = CSV()
+        simulator.init('CSV-0', time_resolution=900, sim_start='2012-01-01 00:00:00',
+                       datafile=datafile, **kwargs)
+        simulator.create(1, 'CSV')
+        return simulator
+
+    def test_unchanged_rows_are_skipped(self, setpoints):
+        """Steps only happen at rows where a value changes"""
+        simulator = self.start(setpoints, lookahead=True)
+        steps, values = [], []
+        time = 0
+        while time < 100:
+            steps.append(time)
+            time = simulator.step(time, {}, 100)
+            values.append(simulator.get_data({'CSV_0': ['p']})['CSV_0']['p'])
+        assert steps == [0, 3, 5]
+        assert values == [1.0, 2.0, 3.0]
+
+    def test_horizon(self, setpoints):
+        """Every row is a step, which provides the block of rows that starts with it"""
+        simulator = self.start(setpoints, horizon=4)
+        assert 'p_horizon' in simulator.meta['models']['CSV']['attrs']
+
+        assert simulator.step(0, {}, 100) == 1
+        assert simulator.get_data({'CSV_0': ['p', 'p_horizon']}) == \
+            {'CSV_0': {'p': 1.0, 'p_horizon': [1.0, 1.0, 1.0, 2.0]}}
+        assert simulator.step(1, {}, 100) == 2
+        assert simulator.get_data({'CSV_0': ['p', 'p_horizon']}) == \
+            {'CSV_0': {'p': 1.0, 'p_horizon': [1.0, 1.0, 2.0, 2.0]}}
+        for time in (2, 3):
+            simulator.step(time, {}, 100)
+        assert simulator.step(4, {}, 100) == 5
+        assert simulator.get_data({'CSV_0': ['p', 'p_horizon']}) == \
+            {'CSV_0': {'p': 2.0, 'p_horizon': [2.0, 3.0]}}
+
+    def test_horizon_and_lookahead(self, setpoints):
+        """Rows are not skipped with a horizon, because its blocks change at every row"""
+        simulator = self.start(setpoints, horizon=2, lookahead=True)
+        assert [simulator.step(time, {}, 100) for time in range(3)] == [1, 2, 3]
+
+
+class TestColumns:
+    """
+    Tests for entities that provide a subset of the columns of a file.
+    """
+
+    def test_entities_share_data(self):
+        simulator = CSV()
+        simulator.init('CSV-0', time_resolution=900, sim_start='2012-01-01 00:00:00',
+                       datafile=DATAFILE, preload=True)
+        simulator.create(1, 'CSV', columns=['Ta'])
+        simulator.create(1, 'CSV', columns=['G_Gh', 'Az'])
+        simulator.step(0, {}, 100)
+
+        assert simulator.get_data({'CSV_0': ['Ta'], 'CSV_1': ['Az']}) == \
+            {'CSV_0': {'Ta': 6.1}, 'CSV_1': {'Az': -172.92}}
+        with pytest.raises(ValueError):
+            simulator.get_data({'CSV_0': ['Az']})
+
+    def test_unknown_column(self):
+        simulator = CSV()
+        simulator.init('CSV-0', time_resolution=900, sim_start='2012-01-01 00:00:00',
+                       datafile=DATAFILE)
+        with pytest.raises(ValueError):
+            simulator.create(1, 'CSV', columns=['Wind'])
+        simulator.finalize()
+
+
+class TestColumnar:
+    """
+    Tests for the CSV simulator reading a Parquet file.
+    """
+
+    def test_parquet(self, tmp_path):
+        """A Parquet file provides the same data and metadata as a CSV file"""
+        pytest.importorskip('pyarrow')
+        path = str(tmp_path / 'solar.parquet')
+        pd.read_csv(DATAFILE, skiprows=1, parse_dates=['Time']).to_parquet(path, index=False)
+
+        simulator = CSV()
+        meta = simulator.init('CSV-0', time_resolution=900, sim_start='2012-01-01 00:15:00',
+                              datafile=path, usecols=['Ta'], sim_end='2012-01-01 00:45:00')
+        simulator.create(1, 'CSV')
+        assert meta['models']['CSV']['attrs'] == ['G_Gh', 'G_Dh', 'G_Bn', 'Ta', 'hs', 'FF', 'Az']
+        assert simulator.step(0, {}, 100) == 1
+        assert simulator.get_data({'CSV_0': ['Ta']}) == {'CSV_0': {'Ta': 6.1}}
+        assert len(simulator.data.times) == 3
@@ -0,0 +1,87 @@
+"""
+Unit tests for the readers of the monitor package.
+"""
+
+import pandas as pd
+import pytest
+from illuminator.monitor.readers import load_results, densify
+from illuminator.monitor.sinks import CSVSink, ParquetSink
+from illuminator.monitor.transforms import ChangeFilter
+
+
+def write_rows(sink, steps=8):
+    start = pd.Timestamp('2012-01-01 00:00:00')
+    for i in range(steps):
+        sink.write({'date': start + pd.Timedelta(minutes=15 * i),
+                    'PV-0.pv_0-pv_gen': float(i),
+                    'Load-0.load_0-load_dem': 2.0 * i})
+    sink.close()
+
+
+class TestLoadResults:
+    """
+    Tests for the load_results function.
+    """
+
+    def test_csv_columns_and_range(self, tmp_path):
+        """Reads a subset of columns and rows from a CSV file"""
+        path = str(tmp_path / 'out.csv')
+        write_rows(CSVSink(path))
+
+        df = load_results(path, columns=['PV-0.pv_0-pv_gen'],
+                          start='2012-01-01 00:30:00', end='2012-01-01 01:00:00')
+        assert list(df.columns) == ['PV-0.pv_0-pv_gen']
+        assert list(df['PV-0.pv_0-pv_gen']) == [2.0, 3.0, 4.0]
+
+    def test_parquet_columns_and_range(self, tmp_path):
+        """Reads a subset of columns and rows from a Parquet file"""
+        pytest.importorskip('pyarrow')
+
+        path = str(tmp_path / 'out.parquet')
+        write_rows(ParquetSink(path, row_group_size=2))
+
+        df = load_results(path, columns=['Load-0.load_0-load_dem'],
+                          start='2012-01-01 00:30:00', end='2012-01-01 01:00:00')
+        assert list(df.columns) == ['Load-0.load_0-load_dem']
+        assert list(df['Load-0.load_0-load_dem']) == [4.0, 6.0, 8.0]
+        assert df.index[0] == pd.Timestamp('2012-01-01 00:30:00')
+
+
+class TestDensify:
+    """
+    Tests for the densify function.
+    """
+
+    def test_forward_fill(self):
+        """Empty values and missing dates are filled with the last value"""
+        index = pd.DatetimeIndex(['2012-01-01 00:00:00', '2012-01-01 00:30:00',
+                                  '2012-01-01 01:00:00'], name='date')
+        df = pd.DataFrame({'soc': [0.5, 0.6, None], 'state': [1.0, None, 0.0]}, index=index)
+
+        dense = densify(df, freq='15min')
+        assert len(dense) == 5
+        assert list(dense['soc']) == [0.5, 0.5, 0.6, 0.6, 0.6]
+        assert list(dense['state']) == [1.0, 1.0, 1.0, 1.0, 0.0]
+        assert list(densify(df)['soc']) == [0.5, 0.6, 0.6]
+
+    @pytest.mark.parametrize('name', ['out.csv', 'out.parquet'])
+    def test_changes_to_nan(self, tmp_path, name):
+        """Values that changed to NaN are kept, and unchanged values are filled"""
+        if name.endswith('.parquet'):
+            pytest.importorskip('pyarrow')
+        path = str(tmp_path / name)
+        sink = CSVSink(path) if name.endswith('.csv') else ParquetSink(path)
+        change_filter = ChangeFilter()
+        start = pd.Timestamp('2012-01-01 00:00:00')
+        values = [5.0, 6.0, float('nan'), float('nan'), 7.0, 7.0]
+        for i, value in enumerate(values):
+            row = change_filter.push({'date': start + pd.Timedelta(minutes=i), 'soc': value, 'mode': 'on'})
+            if row is not None:
+                sink.write(row)
+        for row in change_filter.flush():
+            sink.write(row)
+        sink.close()
+
+        dense = densify(load_results(path, changes=True), freq='60s')
+        assert dense['soc'].tolist() == pytest.approx(values, nan_ok=True)
+        assert dense['mode'].tolist() == ['on'] * len(values)
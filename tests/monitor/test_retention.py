@@ -0,0 +1,63 @@
+"""
+Unit tests for the retention policies of the monitor package.
+"""
+
+import math
+import numpy as np
+import pytest
+from illuminator.monitor.retention import (RingRetention, StatsRetention,
+                                          create_retention)
+
+
+class TestRingRetention:
+    """
+    Tests for the RingRetention class.
+    """
+
+    def test_keeps_last_steps(self):
+        """Only the last `steps` values are kept"""
+        retention = RingRetention(steps=3)
+        for time in range(10):
+            retention.record('PV-0.pv_0', 'pv_gen', time, float(time))
+
+        assert retention.as_dict() == {'PV-0.pv_0': {'pv_gen': {7: 7.0, 8: 8.0, 9: 9.0}}}
+
+
+class TestStatsRetention:
+    """
+    Tests for the StatsRetention class.
+    """
+
+    def test_statistics(self):
+        """Streaming statistics match the statistics of the whole series"""
+        values = np.random.default_rng(0).normal(size=1000)
+        retention = StatsRetention()
+        for time, value in enumerate(values):
+            retention.record('PV-0.pv_0', 'pv_gen', time, value)
+
+        stats = retention.as_dict()['PV-0.pv_0']['pv_gen']
+        assert stats['count'] == 1000
+        assert stats['min'] == values.min()
+        assert stats['max'] == values.max()
+        assert stats['mean'] == pytest.approx(values.mean())
+        assert stats['variance'] == pytest.approx(values.var(ddof=1))
+
+    def test_ignores_non_numbers(self):
+        """Values that are not numbers are not counted"""
+        retention = StatsRetention()
+        retention.record('PV-0.pv_0', 'pv_gen', 0, 1.0)
+        retention.record('PV-0.pv_0', 'pv_gen', 1, None)
+        retention.record('PV-0.pv_0', 'pv_gen', 2, 'off')
+
+        stats = retention.as_dict()['PV-0.pv_0']['pv_gen']
+        assert stats['count'] == 1
+        assert math.isnan(stats['variance'])
+
+
+def test_create_retention():
+    """Policies are created by name"""
+    assert create_retention('none') is None
+    assert isinstance(create_retention('ring', 4), RingRetention)
+    assert isinstance(create_retention('stats'), StatsRetention)
+    with pytest.raises(ValueError):
+        create_retention('all')
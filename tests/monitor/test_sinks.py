@@ -0,0 +1,346 @@
+"""
+Unit tests for the sinks of the monitor package.
+"""
+
+import gzip
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from illuminator.monitor.sinks import (CSVSink, ParquetSink, SQLiteSink, NullSink,
+                                      create_sink)
+
+
+@pytest.fixture
+def rows():
+    start = pd.Timestamp('2012-01-01 00:00:00')
+    return [{'date': start + pd.Timedelta(minutes=15 * i),
+             'PV-0.pv_0-pv_gen': float(i),
+             'Load-0.load_0-load_dem': 2.0 * i}
+            for i in range(10)]
+
+
+class TestCSVSink:
+    """
+    Tests for the CSVSink class.
+    """
+
+    def test_rows_are_written(self, tmp_path, rows):
+        """All rows are in the file after closing the sink"""
+        path = tmp_path / 'out.csv'
+        sink = CSVSink(str(path))
+        for row in rows:
+            sink.write(row)
+        sink.close()
+
+        df = pd.read_csv(path, index_col='date', parse_dates=True)
+        assert len(df) == len(rows)
+        assert list(df.columns) == ['PV-0.pv_0-pv_gen', 'Load-0.load_0-load_dem']
+        assert df.index[0] == rows[0]['date']
+        assert df['Load-0.load_0-load_dem'].iloc[-1] == 18.0
+
+    def test_flush_rows_threshold(self, tmp_path, rows):
+        """Rows are written to disk when the buffer reaches `flush_rows`"""
+        path = tmp_path / 'out.csv'
+        sink = CSVSink(str(path), flush_rows=4)
+        for row in rows[:5]:
+            sink.write(row)
+
+        # header and the first four rows are on disk, the fifth is buffered
+        assert len(path.read_text().splitlines()) == 5
+        sink.close()
+        assert len(path.read_text().splitlines()) == 6
+
+    def test_flush_bytes_threshold(self, tmp_path, rows):
+        """Every row is written to disk when the buffer limit is one byte"""
+        path = tmp_path / 'out.csv'
+        sink = CSVSink(str(path), flush_bytes=1)
+        for row in rows[:3]:
+            sink.write(row)
+
+        assert len(path.read_text().splitlines()) == 4
+        sink.close()
+
+    def test_unknown_column_warns(self, tmp_path, rows):
+        """Columns not present in the first row are dropped with a warning"""
+        path = tmp_path / 'out.csv'
+        sink = CSVSink(str(path))
+        sink.write(rows[0])
+        with pytest.warns(UserWarning):
+            sink.write({**rows[1], 'Wind-0.wind_0-wind_gen': 1.0})
+        sink.close()
+
+        df = pd.read_csv(path)
+        assert 'Wind-0.wind_0-wind_gen' not in df.columns
+
+    def test_set_columns(self, tmp_path, rows):
+        """Columns set before the first row are written even if they first appear later"""
+        path = tmp_path / 'out.csv'
+        sink = CSVSink(str(path))
+        sink.set_columns(['date', 'PV-0.pv_0-pv_gen', 'Wind-0.wind_0-wind_gen'])
+        sink.write(rows[0])
+        sink.write({**rows[1], 'Wind-0.wind_0-wind_gen': 1.0})
+        sink.close()
+
+        df = pd.read_csv(path)
+        assert list(df.columns) == ['date', 'PV-0.pv_0-pv_gen', 'Wind-0.wind_0-wind_gen']
+        assert df['Wind-0.wind_0-wind_gen'].isna().iloc[0]
+        assert df['Wind-0.wind_0-wind_gen'].iloc[1] == 1.0
+
+    def test_sequence_values(self, tmp_path, rows):
+        """Sequences are written as JSON arrays, without modifying the row"""
+        path = tmp_path / 'out.csv'
+        sink = CSVSink(str(path))
+        row = {'date': rows[0]['date'], 'CSV-0.pv_0-pv_gen_horizon': np.array([1.0, 2.0]),
+               'CSV-0.pv_0-pv_gen': 1.0}
+        sink.write(row)
+        sink.close()
+
+        df = pd.read_csv(path)
+        assert json.loads(df['CSV-0.pv_0-pv_gen_horizon'][0]) == [1.0, 2.0]
+        assert isinstance(row['CSV-0.pv_0-pv_gen_horizon'], np.ndarray)
+
+    @pytest.mark.parametrize('name', ['out.csv.gz', 'out.csv.zst'])
+    def test_compression_from_extension(self, tmp_path, rows, name):
+        """Files ending in .gz or .zst are compressed and can be read by pandas"""
+        if name.endswith('.zst'):
+            pytest.importorskip('zstandard')
+        path = tmp_path / name
+        sink = CSVSink(str(path), flush_rows=3)
+        for row in rows:
+            sink.write(row)
+        sink.close()
+
+        df = pd.read_csv(path, index_col='date', parse_dates=True)
+        assert len(df) == len(rows)
+        assert df['Load-0.load_0-load_dem'].iloc[-1] == 18.0
+        assert path.read_bytes()[:2] != b'da'  # not plain text
+
+    def test_compression_option(self, tmp_path, rows):
+        """The compression can be chosen regardless of the extension"""
+        path = tmp_path / 'out.csv'
+        sink = CSVSink(str(path), compression='gzip', compression_level=1)
+        sink.write(rows[0])
+        sink.close()
+        assert gzip.decompress(path.read_bytes()).startswith(b'date,')
+
+    def test_unknown_compression(self, tmp_path):
+        with pytest.raises(ValueError):
+            CSVSink(str(tmp_path / 'out.csv'), compression='bz2')
+
+    def test_invalid_threshold(self, tmp_path):
+        """Thresholds must be positive"""
+        with pytest.raises(ValueError):
+            CSVSink(str(tmp_path / 'out.csv'), flush_rows=0)
+
+    def test_state(self, tmp_path, rows):
+        """A new sink continues the file from the state of a checkpoint, without the rows written after it"""
+        path = tmp_path / 'out.csv'
+        sink = CSVSink(str(path))
+        for row in rows[:4]:
+            sink.write(row)
+        state = sink.get_state()
+        for row in rows[4:6]:
+            sink.write(row)
+        sink.close()
+
+        sink = CSVSink(str(path))
+        sink.set_state(state)
+        for row in rows[4:]:
+            sink.write(row)
+        sink.close()
+
+        df = pd.read_csv(path, index_col='date', parse_dates=True)
+        assert len(df) == len(rows)
+        assert list(df.index) == [row['date'] for row in rows]
+        assert df['Load-0.load_0-load_dem'].iloc[-1] == 18.0
+
+    def test_state_compressed(self, tmp_path, rows):
+        sink = CSVSink(str(tmp_path / 'out.csv.gz'))
+        sink.write(rows[0])
+        with pytest.raises(ValueError):
+            sink.get_state()
+        sink.close()
+
+
+class TestParquetSink:
+    """
+    Tests for the ParquetSink class.
+    """
+
+    def test_row_groups(self, tmp_path, rows):
+        """Rows are written in row groups of `row_group_size` rows"""
+        pq = pytest.importorskip('pyarrow.parquet')
+
+        path = tmp_path / 'out.parquet'
+        sink = ParquetSink(str(path), row_group_size=4)
+        for row in rows:
+            sink.write(row)
+        sink.close()
+
+        metadata = pq.ParquetFile(path).metadata
+        assert metadata.num_rows == 10
+        assert metadata.num_row_groups == 3
+
+    def test_integers_are_stored_as_doubles(self, tmp_path, rows):
+        """Columns are typed from the first row group"""
+        pq = pytest.importorskip('pyarrow.parquet')
+
+        path = tmp_path / 'out.parquet'
+        sink = ParquetSink(str(path), row_group_size=1)
+        sink.write({'date': rows[0]['date'], 'a': 1, 'b': True})
+        sink.write({'date': rows[1]['date'], 'a': 1.5, 'b': False})
+        sink.close()
+
+        table = pq.read_table(path)
+        assert str(table.schema.field('a').type) == 'double'
+        assert str(table.schema.field('b').type) == 'bool'
+        assert table.column('a').to_pylist() == [1.0, 1.5]
+
+    def test_set_columns(self, tmp_path, rows):
+        """Columns set before the first row are stored even if they first appear later"""
+        pq = pytest.importorskip('pyarrow.parquet')
+
+        path = tmp_path / 'out.parquet'
+        sink = ParquetSink(str(path), row_group_size=1)
+        sink.set_columns(['date', 'PV-0.pv_0-pv_gen', 'Wind-0.wind_0-wind_gen'])
+        sink.write(rows[0])
+        sink.write({**rows[1], 'Wind-0.wind_0-wind_gen': 1.0})
+        sink.close()
+
+        table = pq.read_table(path)
+        assert table.column_names == ['date', 'PV-0.pv_0-pv_gen', 'Wind-0.wind_0-wind_gen']
+        assert table.column('Wind-0.wind_0-wind_gen').to_pylist() == [None, 1.0]
+
+
+class TestSQLiteSink:
+    """
+    Tests for the SQLiteSink class.
+    """
+
+    def test_long_format(self, tmp_path, rows):
+        """Every value is stored as (time, source, attr, value)"""
+        path = tmp_path / 'results.db'
+        sink = SQLiteSink(str(path), flush_rows=4)
+        for row in rows:
+            sink.write(row)
+        sink.close()
+
+        with sqlite3.connect(path) as conn:
+            records = conn.execute('SELECT time, source, attr, value FROM results '
+                                   'WHERE source = ? ORDER BY time',
+                                   ('Load-0.load_0',)).fetchall()
+            journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+            indexes = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+
+        assert len(records) == 10
+        assert records[1] == ('2012-01-01 00:15:00', 'Load-0.load_0', 'load_dem', 2.0)
+        assert journal_mode == 'wal'
+        assert indexes == [('results_source_attr_time',)]
+
+    def test_batches(self, tmp_path, rows):
+        """Values are inserted every `flush_rows` rows, into a table that is indexed from the start"""
+        path = tmp_path / 'results.db'
+        sink = SQLiteSink(str(path), flush_rows=4)
+        for row in rows[:5]:
+            sink.write(row)
+
+        with sqlite3.connect(path) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM results').fetchone()[0] == 8
+            assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall() == \
+                [('results_source_attr_time',)]
+        sink.close()
+
+    def test_numpy_values(self, tmp_path, rows):
+        """NumPy scalars are stored as Python numbers"""
+        path = tmp_path / 'results.db'
+        sink = SQLiteSink(str(path))
+        sink.write({'date': rows[0]['date'], 'Battery-0.battery_0-soc': np.int64(3)})
+        sink.close()
+
+        with sqlite3.connect(path) as conn:
+            assert conn.execute('SELECT value FROM results').fetchone()[0] == 3
+
+    def test_sequence_values(self, tmp_path, rows):
+        """Sequences, such as horizon outputs, are stored as JSON arrays"""
+        path = tmp_path / 'results.db'
+        sink = SQLiteSink(str(path))
+        sink.write({'date': rows[0]['date'], 'CSV-0.pv_0-pv_gen_horizon': [1.0, 2.0],
+                    'CSV-0.load_0-load_dem_horizon': np.array([3.0])})
+        sink.close()
+
+        with sqlite3.connect(path) as conn:
+            values = conn.execute('SELECT value FROM results ORDER BY source').fetchall()
+        assert [json.loads(value) for value, in values] == [[3.0], [1.0, 2.0]]
+
+    def test_state(self, tmp_path, rows):
+        """Values inserted after the state of a checkpoint are deleted by `set_state`"""
+        path = tmp_path / 'results.db'
+        sink = SQLiteSink(str(path), flush_rows=4)
+        for row in rows[:5]:
+            sink.write(row)
+        state = sink.get_state()
+        sink.write(rows[5])
+        sink.close()
+
+        sink = SQLiteSink(str(path))
+        sink.set_state(state)
+        sink.close()
+        with sqlite3.connect(path) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM results').fetchone()[0] == 10
+
+
+class TestCreateSink:
+    """
+    Tests for the create_sink function.
+    """
+
+    def test_file_is_passed_as_path(self, tmp_path):
+        """'file' is the path of the sink and other options are passed on"""
+        sink = create_sink({'type': 'csv', 'file': str(tmp_path / 'out.csv'),
+                            'flush_rows': 5})
+        assert isinstance(sink, CSVSink)
+        assert sink.path == str(tmp_path / 'out.csv')
+        assert sink.flush_rows == 5
+
+    def test_decimate(self, tmp_path, rows):
+        """Only one out of 'decimate' rows is written"""
+        path = tmp_path / 'out.csv'
+        sink = create_sink({'type': 'csv', 'file': str(path), 'decimate': 4})
+        for row in rows:
+            sink.write(row)
+        sink.close()
+
+        df = pd.read_csv(path)
+        assert list(df['PV-0.pv_0-pv_gen']) == [0.0, 4.0, 8.0]
+
+    def test_decimate_set_columns(self, tmp_path, rows):
+        """The columns are passed to the decimated sink"""
+        path = tmp_path / 'out.csv'
+        sink = create_sink({'type': 'csv', 'file': str(path), 'decimate': 2})
+        sink.set_columns(['date', 'Wind-0.wind_0-wind_gen'])
+        sink.write(rows[0])
+        sink.close()
+
+        assert list(pd.read_csv(path).columns) == ['date', 'Wind-0.wind_0-wind_gen']
+
+    def test_null_sink(self, rows):
+        sink = create_sink({'type': 'null'})
+        assert isinstance(sink, NullSink)
+        sink.write(rows[0])
+        sink.close()
+
+    def test_import_path(self):
+        """Sink classes can be given by their import path"""
+        sink = create_sink({'type': 'illuminator.monitor.sinks:NullSink'})
+        assert isinstance(sink, NullSink)
+
+    def test_unknown_type(self):
+        with pytest.raises(ValueError, match='Unknown sink type'):
+            create_sink({'type': 'excel'})
+
+    def test_invalid_option(self, tmp_path):
+        with pytest.raises(ValueError, match='Invalid options'):
+            create_sink({'type': 'csv', 'file': str(tmp_path / 'out.csv'),
+                         'row_group_size': 5})
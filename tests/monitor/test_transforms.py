@@ -0,0 +1,104 @@
+"""
+Unit tests for the transformations of the monitor package.
+"""
+
+import pandas as pd
+import pytest
+from illuminator.monitor.transforms import WindowAggregator, ChangeFilter
+
+START = pd.Timestamp('2012-01-01 00:00:00')
+
+
+def step_row(time, **values):
+    return {'date': START + pd.Timedelta(seconds=900 * time), **values}
+
+
+class TestWindowAggregator:
+    """
+    Tests for the WindowAggregator class.
+    """
+
+    def test_hourly_mean(self):
+        """Only one row per hour reaches the sinks, stamped with the end of the hour"""
+        aggregator = WindowAggregator({'pv': {'every': 3600, 'agg': 'mean'}}, START, 900)
+        rows = []
+        for time in range(9):
+            rows += aggregator.push(time, step_row(time, pv=float(time)))
+        rows += aggregator.flush()
+
+        assert [row['date'] for row in rows] == [START + pd.Timedelta(hours=h) for h in (1, 2, 3)]
+        assert [row['pv'] for row in rows] == [1.5, 5.5, 8.0]
+
+    @pytest.mark.parametrize('agg, expected', [('min', 0.0), ('max', 3.0),
+                                               ('sum', 6.0), ('last', 3.0)])
+    def test_aggregations(self, agg, expected):
+        aggregator = WindowAggregator({'pv': {'every': 3600, 'agg': agg}}, START, 900)
+        for time in range(4):
+            assert aggregator.push(time, step_row(time, pv=float(time))) == []
+        assert aggregator.push(4, step_row(4, pv=0.0))[0]['pv'] == expected
+
+    def test_raw_columns_pass_through(self):
+        """Columns without a rule are written every step, aggregated columns
+        are None except at the end of their window"""
+        aggregator = WindowAggregator({'pv': {'every': 1800, 'agg': 'sum'}}, START, 900)
+        rows = []
+        for time in range(3):
+            rows += aggregator.push(time, step_row(time, pv=1.0, load=2.0))
+
+        assert [row['load'] for row in rows] == [2.0, 2.0, 2.0]
+        assert [row['pv'] for row in rows] == [None, None, 2.0]
+        assert all(list(row) == ['date', 'pv', 'load'] for row in rows)
+
+    def test_invalid_aggregation(self):
+        with pytest.raises(ValueError):
+            WindowAggregator({'pv': {'every': 3600, 'agg': 'median'}}, START, 900)
+
+
+class TestChangeFilter:
+    """
+    Tests for the ChangeFilter class.
+    """
+
+    def test_unchanged_values_are_dropped(self):
+        """Values equal to the last kept value are None, and rows without
+        changes are dropped"""
+        change_filter = ChangeFilter()
+        rows = [change_filter.push(step_row(time, soc=soc, state='on'))
+                for time, soc in enumerate([0.5, 0.5, 0.6, 0.6])]
+
+        assert rows[0] == step_row(0, soc=0.5, state='on')
+        assert rows[1] is None
+        assert rows[2] == step_row(2, soc=0.6, state=None)
+        assert rows[3] is None
+
+    def test_tolerance(self):
+        """Changes up to the tolerance are ignored, relative to the last kept value"""
+        change_filter = ChangeFilter(tolerance=0.1)
+        kept = [change_filter.push(step_row(time, soc=soc)) is not None
+                for time, soc in enumerate([0.0, 0.05, 0.1, 0.15, 0.25])]
+        assert kept == [True, False, False, True, False]
+
+    def test_nan_is_unchanged(self):
+        change_filter = ChangeFilter()
+        assert change_filter.push(step_row(0, soc=float('nan'))) is not None
+        assert change_filter.push(step_row(1, soc=float('nan'))) is None
+
+    def test_nan_to_number_and_back(self):
+        """Changes from NaN to a number and from a number to NaN are kept"""
+        change_filter = ChangeFilter()
+        kept = [change_filter.push(step_row(time, soc=soc)) is not None
+                for time, soc in enumerate([float('nan'), 5.0, 6.0, float('nan'), float('nan')])]
+        assert kept == [True, True, True, True, False]
+
+    def test_flush_marks_the_end(self):
+        """The last values are written at the last date if the last row was dropped"""
+        change_filter = ChangeFilter()
+        change_filter.push(step_row(0, soc=0.5))
+        assert change_filter.flush() == []
+
+        change_filter.push(step_row(1, soc=0.5))
+        assert change_filter.flush() == [step_row(1, soc=0.5)]
+
+    def test_negative_tolerance(self):
+        with pytest.raises(ValueError):
+            ChangeFilter(tolerance=-1)
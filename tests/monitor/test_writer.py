@@ -0,0 +1,119 @@
+"""
+Unit tests for the background writer of the monitor package.
+"""
+
+import threading
+import pytest
+from illuminator.monitor.writer import SinkWriter
+
+
+class ListSink:
+    """A sink that stores rows in a list"""
+
+    def __init__(self, fail_at=None, gate=None):
+        self.rows = []
+        self.closed = False
+        self.fail_at = fail_at
+        self.gate = gate
+
+    def write(self, row):
+        if self.gate is not None:
+            self.gate.wait()
+        if len(self.rows) == self.fail_at:
+            raise OSError('disk full')
+        self.rows.append(row)
+
+    def close(self):
+        self.closed = True
+
+
+class TestSinkWriter:
+    """
+    Tests for the SinkWriter class.
+    """
+
+    def test_all_rows_written_on_close(self):
+        """Rows are written in order and the sink is closed"""
+        sink = ListSink()
+        writer = SinkWriter(sink, queue_size=2)
+        for i in range(100):
+            writer.write({'i': i})
+        writer.close()
+
+        assert [row['i'] for row in sink.rows] == list(range(100))
+        assert sink.closed
+
+    def test_backpressure(self):
+        """write() blocks when the queue is full"""
+        gate = threading.Event()
+        writer = SinkWriter(ListSink(gate=gate), queue_size=1)
+        writer.write({'i': 0})  # taken by the worker, which waits on the gate
+        writer.write({'i': 1})  # fills the queue
+
+        blocked = threading.Thread(target=writer.write, args=({'i': 2},))
+        blocked.start()
+        blocked.join(timeout=0.2)
+        assert blocked.is_alive()
+
+        gate.set()
+        blocked.join(timeout=5)
+        assert not blocked.is_alive()
+        writer.close()
+
+    def test_error_propagation(self):
+        """Errors raised by the sink are raised by write() or close()"""
+        sink = ListSink(fail_at=3)
+        writer = SinkWriter(sink)
+        with pytest.raises(RuntimeError, match='disk full'):
+            try:
+                for i in range(10):
+                    writer.write({'i': i})
+            finally:
+                writer.close()
+        assert sink.closed
+        assert len(sink.rows) == 3
+
+    def test_state_after_queued_rows(self):
+        """get_state() returns the state of the sink once the queued rows are written"""
+        class CountingSink(ListSink):
+            def get_state(self):
+                return len(self.rows)
+
+        writer = SinkWriter(CountingSink(), queue_size=8)
+        for i in range(5):
+            writer.write({'i': i})
+        assert writer.get_state() == 5
+        writer.close()
+
+    def test_set_columns(self):
+        """set_columns() is passed to the sink before the rows written after it"""
+        class ColumnsSink(ListSink):
+            def set_columns(self, columns):
+                self.columns = columns
+
+        sink = ColumnsSink()
+        writer = SinkWriter(sink)
+        writer.set_columns(['date', 'a'])
+        writer.write({'date': 0})
+        writer.close()
+        assert sink.columns == ['date', 'a']
+
+        # sinks without set_columns store the columns of their rows
+        writer = SinkWriter(ListSink())
+        writer.set_columns(['date', 'a'])
+        writer.close()
+
+    def test_closed(self):
+        """Rows and calls after close() raise instead of waiting for the worker"""
+        writer = SinkWriter(ListSink())
+        writer.close()
+        with pytest.raises(RuntimeError, match='closed'):
+            writer.get_state()
+        with pytest.raises(RuntimeError, match='closed'):
+            writer.write({'i': 0})
+
+    def test_state_not_supported(self):
+        writer = SinkWriter(ListSink())
+        with pytest.raises(ValueError):
+            writer.get_state()
+        writer.close()
@@ -0,0 +1,179 @@
+"""
+Unit tests for the checkpoints of simulations.
+"""
+
+import os
+import pytest
+import pandas as pd
+from ruamel.yaml import YAML
+from illuminator.engine import Simulation, start_simulators
+from illuminator.direct import DirectWorld
+from illuminator.checkpoint import Checkpoints, latest_checkpoint, load_checkpoint
+
+
+def write_config(tmp_path, name, results, execution='direct', checkpoint=None, parameters=None,
+                 sinks=None):
+    """Writes a scenario of 8 steps that monitors a CSV model, and returns its path"""
+    scenario = {'name': 'Checkpoint', 'start_time': '2012-01-01 00:00:00',
+                'end_time': '2012-01-01 02:00:00', 'time_resolution': 900, 'execution': execution}
+    if checkpoint is not None:
+        scenario['checkpoint'] = checkpoint
+    config = {'scenario': scenario,
+              'models': [{'name': 'Weather', 'type': 'CSV',
+                          'parameters': {'start': '2012-01-01 00:00:00',
+                                         'datafile': './tests/data/solar-sample.csv',
+                                         **(parameters or {})}}],
+              'connections': [],
+              'monitor': {'file': str(results), 'items': ['Weather.Ta', 'Weather.hs']}}
+    if sinks is not None:
+        config['monitor']['sinks'] = sinks
+    path = tmp_path / name
+    with open(path, 'w') as _file:
+        YAML(typ='safe').dump(config, _file)
+    return str(path)
+
+
+def write_pv_config(tmp_path, name, results, checkpoint=None):
+    """Writes a scenario of 8 daytime steps with a PV model fed by a CSV model, and returns its path"""
+    datafile = tmp_path / 'day.csv'
+    rows = ['Solar_data', 'Time,G_Gh,G_Dh,G_Bn,Ta,hs,FF,Az']
+    rows += [f'2012-06-01 {11 + i // 4:02d}:{15 * (i % 4):02d}:00,{600 + 20 * i},{150 + 5 * i},'
+             f'{500 + 10 * i},{20 + i / 2},{55 + i},3.0,{-10 + 5 * i}' for i in range(8)]
+    datafile.write_text('\n'.join(rows) + '\n')
+    panel_data = {'Module_area': 1.26, 'NOCT': 44, 'Module_Efficiency': 0.198,
+                  'Irradiance_at_NOCT': 800, 'Power_output_at_STC': 250, 'peak_power': 600}
+    scenario = {'name': 'PV', 'start_time': '2012-06-01 11:00:00', 'end_time': '2012-06-01 13:00:00',
+                'time_resolution': 900, 'execution': 'direct'}
+    if checkpoint is not None:
+        scenario['checkpoint'] = checkpoint
+    config = {'scenario': scenario,
+              'models': [{'name': 'Weather', 'type': 'CSV',
+                          'parameters': {'start': '2012-06-01 11:00:00', 'datafile': str(datafile)}},
+                         {'name': 'PV', 'type': 'PvAdapter',
+                          'parameters': {'panel_data': panel_data, 'm_tilt': 14, 'm_az': 180, 'cap': 500,
+                                         'output_type': 'power', 'sim_start': '2012-06-01 11:00:00'}}],
+              'connections': [{'from': f'Weather.{attr}', 'to': f'PV.{attr}'}
+                              for attr in ['G_Gh', 'G_Dh', 'G_Bn', 'Ta', 'hs', 'FF', 'Az']],
+              'monitor': {'file': str(results), 'items': ['PV.pv_gen']}}
+    path = tmp_path / name
+    with open(path, 'w') as _file:
+        YAML(typ='safe').dump(config, _file)
+    return str(path)
+
+
+class TestCheckpoints:
+    """
+    Tests for the Checkpoints class.
+    """
+
+    def test_keep(self, tmp_path):
+        """only the last `keep` checkpoints are kept, and the latest is found by time"""
+        checkpoints = Checkpoints(every=4, directory=str(tmp_path), keep=2)
+        for time in (4, 8, 12):
+            checkpoints.save({'time': time})
+
+        assert len(os.listdir(tmp_path)) == 2
+        assert load_checkpoint(latest_checkpoint(str(tmp_path))) == {'time': 12}
+        assert checkpoints.next_time(12) == 16
+        assert checkpoints.next_time(13) == 16
+
+    def test_no_checkpoint(self, tmp_path):
+        assert latest_checkpoint(str(tmp_path)) is None
+
+
+class TestModelState:
+    """
+    Tests for the state of the simulators of models built with ModelConstructor.
+    """
+
+    def test_restore(self):
+        """inputs, outputs and states of every entity are restored, parameters are kept"""
+        world = DirectWorld({'Adder1': {'python': 'illuminator.models:Adder'}})
+        models = [{'name': 'Adder1', 'type': 'Adder', 'inputs': {'in1': 10, 'in2': 20},
+                   'outputs': {'out1': 0}, 'parameters': {'param1': 'adding tens'}}]
+        entity = start_simulators(world, models)['Adder1'][0]
+        simulator = world.sims[entity.sid].sim
+        simulator.step(0)
+        state = simulator.get_state()
+
+        simulator.model_entities['Adder1'].outputs['out1'] = -1
+        simulator.model_entities['Adder1'].parameters['param1'] = 'other'
+        simulator.set_state(state)
+        assert simulator.model_entities['Adder1'].outputs == {'out1': 30}
+        assert simulator.model_entities['Adder1'].parameters == {'param1': 'other'}
+
+        with pytest.raises(ValueError):
+            simulator.set_state({'time': 0, 'entities': {'Adder2': state['entities']['Adder1']}})
+
+
+class TestResume:
+    """
+    Tests for resuming simulations from checkpoints.
+    """
+
+    @pytest.mark.parametrize('parameters', [{}, {'preload': True}])
+    def test_same_results(self, tmp_path, parameters):
+        """a simulation resumed from its last checkpoint writes the same results as an uninterrupted one"""
+        Simulation(write_config(tmp_path, 'reference.yaml', tmp_path / 'reference.csv',
+                                parameters=parameters)).run()
+        reference = pd.read_csv(tmp_path / 'reference.csv')
+
+        checkpoint = {'every': 3, 'directory': str(tmp_path / 'checkpoints'), 'keep': 2}
+        config_file = write_config(tmp_path, 'config.yaml', tmp_path / 'out.csv',
+                                   checkpoint=checkpoint, parameters=parameters)
+        Simulation(config_file).run()
+        assert sorted(os.listdir(tmp_path / 'checkpoints')) == ['checkpoint-000000000003.pkl',
+                                                                'checkpoint-000000000006.pkl']
+
+        # the rows after the checkpoint at time 6 are discarded and written again
+        Simulation(config_file).run(resume=True)
+        pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'), reference)
+
+    def test_pv(self, tmp_path):
+        """simulations with PV models can be checkpointed and resumed"""
+        Simulation(write_pv_config(tmp_path, 'reference.yaml', tmp_path / 'reference.csv')).run()
+        reference = pd.read_csv(tmp_path / 'reference.csv')
+
+        config_file = write_pv_config(tmp_path, 'config.yaml', tmp_path / 'out.csv',
+                                      checkpoint={'every': 5, 'directory': str(tmp_path / 'checkpoints')})
+        Simulation(config_file).run()
+        Simulation(config_file).run(resume=True)
+        results = pd.read_csv(tmp_path / 'out.csv')
+
+        assert (reference['PvAdapter-0.pv_0-pv_gen'] > 0).all()
+        pd.testing.assert_frame_equal(results, reference)
+
+    def test_warm_start(self, tmp_path):
+        """another simulation can start from a checkpoint, with new results files"""
+        checkpoint = {'every': 6, 'directory': str(tmp_path / 'checkpoints')}
+        Simulation(write_config(tmp_path, 'spin-up.yaml', tmp_path / 'spin-up.csv',
+                                checkpoint=checkpoint)).run()
+        spin_up = pd.read_csv(tmp_path / 'spin-up.csv')
+
+        variant = write_config(tmp_path, 'variant.yaml', tmp_path / 'variant.csv')
+        Simulation(variant).run(resume=str(tmp_path / 'checkpoints' / 'checkpoint-000000000006.pkl'))
+        results = pd.read_csv(tmp_path / 'variant.csv')
+
+        pd.testing.assert_frame_equal(results, spin_up.iloc[6:].reset_index(drop=True))
+
+    def test_requires_direct_execution(self, tmp_path):
+        config_file = write_config(tmp_path, 'config.yaml', tmp_path / 'out.csv', execution='mosaik',
+                                   checkpoint={'every': 3, 'directory': str(tmp_path)})
+        with pytest.raises(ValueError):
+            Simulation(config_file).run()
+
+    def test_unsupported_sink(self, tmp_path):
+        """sinks that cannot be checkpointed fail before the first step"""
+        pytest.importorskip('pyarrow')
+        config_file = write_config(tmp_path, 'config.yaml', tmp_path / 'out.parquet',
+                                   checkpoint={'every': 3, 'directory': str(tmp_path / 'checkpoints')},
+                                   sinks=[{'type': 'parquet', 'file': str(tmp_path / 'out.parquet')}])
+        with pytest.raises(ValueError):
+            Simulation(config_file).run()
+        assert not os.path.exists(tmp_path / 'checkpoints')
+
+    def test_no_checkpoint_to_resume(self, tmp_path):
+        config_file = write_config(tmp_path, 'config.yaml', tmp_path / 'out.csv',
+                                   checkpoint={'every': 3, 'directory': str(tmp_path / 'checkpoints')})
+        with pytest.raises(ValueError):
+            Simulation(config_file).run(resume=True)
@@ -0,0 +1,192 @@
+"""
+Unit tests for the direct execution of simulations.
+"""
+
+import pytest
+import pandas as pd
+import mosaik_api_v3
+from ruamel.yaml import YAML
+from illuminator.engine import Simulation
+from illuminator.direct import DirectWorld
+
+RECEIVED = []  # (time, inputs) of the steps of Receiver
+
+
+def meta(sim_type, attrs):
+    return {'type': sim_type, 'models': {'Model': {'public': True, 'params': [], 'attrs': attrs}}}
+
+
+class Source(mosaik_api_v3.Simulator):
+    """Provides the time as output 'x' every 2 time units"""
+
+    def __init__(self, sim_type='time-based'):
+        super().__init__(meta(sim_type, ['x']))
+        self.time = None
+
+    def create(self, num, model):
+        return [{'eid': f'src_{i}', 'type': model} for i in range(num)]
+
+    def step(self, time, inputs, max_advance):
+        self.time = time
+        return time + 2
+
+    def get_data(self, outputs):
+        return {eid: {'x': self.time} for eid in outputs}
+
+
+class HybridSource(Source):
+    def __init__(self):
+        super().__init__('hybrid')
+
+
+class Doubler(mosaik_api_v3.Simulator):
+    """Provides twice its input 'x' as output 'y' every time unit"""
+
+    def __init__(self):
+        super().__init__(meta('time-based', ['x', 'y']))
+        self.y = None
+
+    def create(self, num, model):
+        return [{'eid': 'double', 'type': model}]
+
+    def step(self, time, inputs, max_advance):
+        self.y = 2 * sum(inputs['double']['x'].values())
+        return time + 1
+
+    def get_data(self, outputs):
+        return {'double': {'y': self.y}}
+
+
+class Receiver(mosaik_api_v3.Simulator):
+    """Records its inputs every time unit"""
+
+    def __init__(self):
+        super().__init__(meta('time-based', ['x', 'y']))
+
+    def create(self, num, model):
+        return [{'eid': 'receiver', 'type': model}]
+
+    def step(self, time, inputs, max_advance):
+        RECEIVED.append((time, {attr: dict(values) for attr, values in inputs.get('receiver', {}).items()}))
+        return time + 1
+
+
+class EventDoubler(Doubler):
+    """Provides twice its input 'x' as output 'y' when 'x' changes"""
+
+    def __init__(self):
+        super().__init__()
+        self.meta['type'] = 'event-based'
+
+    def step(self, time, inputs, max_advance):
+        super().step(time, inputs, max_advance)
+        return None
+
+
+class Triggered(Receiver):
+    def __init__(self):
+        super().__init__()
+        self.meta['type'] = 'hybrid'
+        self.meta['models']['Model']['trigger'] = ['x']
+
+
+def direct_world(*names):
+    RECEIVED.clear()
+    return DirectWorld({name: {'python': f'test_direct:{name}'} for name in names})
+
+
+class TestDirectWorld:
+    """
+    Tests for the DirectWorld class.
+    """
+
+    def test_topological_order(self):
+        """simulators step after the simulators they depend on, whatever the order in which they start"""
+        world = direct_world('Receiver', 'Doubler', 'Source')
+        receiver = world.start('Receiver').Model.create(1)[0]
+        double = world.start('Doubler').Model.create(1)[0]
+        source = world.start('Source').Model.create(1)[0]
+        world.connect(source, double, 'x')
+        world.connect(double, receiver, 'y')
+        world.run(until=4)
+
+        # outputs of time-based simulators keep their value between their steps
+        assert RECEIVED == [(time, {'y': {'Doubler-0.double': 2 * (time - time % 2)}}) for time in range(4)]
+
+    def test_hybrid_outputs(self):
+        """as in mosaik, outputs of hybrid simulators without triggers keep their value between steps"""
+        world = direct_world('HybridSource', 'Receiver')
+        source = world.start('HybridSource').Model.create(1)[0]
+        receiver = world.start('Receiver').Model.create(1)[0]
+        world.connect(source, receiver, 'x')
+        world.run(until=4)
+
+        assert RECEIVED == [(time, {'x': {'HybridSource-0.src_0': time - time % 2}}) for time in range(4)]
+
+    def test_event_based(self):
+        """event-based simulators step when their sources step, and their outputs are only received
+        at the time they are produced"""
+        world = direct_world('Source', 'EventDoubler', 'Receiver')
+        source = world.start('Source').Model.create(1)[0]
+        double = world.start('EventDoubler').Model.create(1)[0]
+        receiver = world.start('Receiver').Model.create(1)[0]
+        world.connect(source, double, 'x')
+        world.connect(double, receiver, 'y')
+        world.run(until=4)
+
+        assert RECEIVED == [(0, {'y': {'EventDoubler-0.double': 0}}), (1, {}),
+                            (2, {'y': {'EventDoubler-0.double': 4}}), (3, {})]
+
+    def test_unsupported(self):
+        world = direct_world('Source', 'Doubler', 'Triggered')
+        with pytest.raises(ValueError):
+            world.start('Triggered')
+
+        source = world.start('Source').Model.create(1)[0]
+        double = world.start('Doubler').Model.create(1)[0]
+        other = world.start('Doubler').Model.create(1)[0]
+        world.connect(source, double, 'x')
+        world.connect(double, other, ('y', 'x'))
+        world.connect(other, double, ('y', 'x'))
+        with pytest.raises(ValueError):
+            world.run(until=2)
+
+    def test_same_simulator(self):
+        """connections between entities of one simulator are rejected instead of being delayed"""
+        world = direct_world('Doubler')
+        double = world.start('Doubler', sim_id='Doubler-A').Model.create(1)[0]
+        assert double.full_id == 'Doubler-A.double'
+        with pytest.raises(ValueError):
+            world.start('Doubler', sim_id='Doubler-A')
+
+        world.connect(double, double, ('y', 'x'))
+        with pytest.raises(ValueError):
+            world.run(until=2)
+
+
+class TestDirectExecution:
+    """
+    Tests for the direct execution of simulations from a configuration file.
+    """
+
+    def test_same_results_as_mosaik(self, tmp_path):
+        results = {}
+        for execution in ('mosaik', 'direct'):
+            config = {'scenario': {'name': 'Direct', 'start_time': '2012-01-01 00:00:00',
+                                   'end_time': '2012-01-01 02:00:00', 'time_resolution': 900,
+                                   'execution': execution},
+                      'models': [{'name': 'Weather', 'type': 'CSV',
+                                  'parameters': {'start': '2012-01-01 00:00:00',
+                                                 'datafile': './tests/data/solar-sample.csv'}}],
+                      'connections': [],
+                      'monitor': {'file': str(tmp_path / f'{execution}.csv'),
+                                  'items': ['Weather.Ta', 'Weather.G_Gh'],
+                                  'background': False}}
+            path = tmp_path / f'{execution}.yaml'
+            with open(path, 'w') as _file:
+                YAML(typ='safe').dump(config, _file)
+            Simulation(str(path)).run()
+            results[execution] = pd.read_csv(tmp_path / f'{execution}.csv')
+
+        assert len(results['direct']) == 8
+        pd.testing.assert_frame_equal(results['direct'], results['mosaik'])
@@ -0,0 +1,77 @@
+"""
+Unit tests for the profiling module.
+"""
+
+import json
+import pytest
+from ruamel.yaml import YAML
+from mosaik.proxies import LocalProxy
+from illuminator.engine import Simulation
+from illuminator.profiling import Profiler
+
+
+def write_config(tmp_path, execution='mosaik'):
+    config = {'scenario': {'name': 'Profile', 'start_time': '2012-01-01 00:00:00',
+                           'end_time': '2012-01-01 01:00:00', 'time_resolution': 900,
+                           'execution': execution},
+              'models': [{'name': 'Weather', 'type': 'CSV',
+                          'parameters': {'start': '2012-01-01 00:00:00',
+                                         'datafile': './tests/data/solar-sample.csv'}}],
+              'connections': [],
+              'monitor': {'file': str(tmp_path / 'out.csv'), 'items': ['Weather.Ta']}}
+    path = tmp_path / 'config.yaml'
+    with open(path, 'w') as _file:
+        YAML(typ='safe').dump(config, _file)
+    return str(path)
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    return write_config(tmp_path)
+
+
+class TestProfiler:
+    """
+    Tests for the Profiler class.
+    """
+
+    def test_simulation_profile(self, config_file, tmp_path):
+        """calls to in-process and remote simulators are recorded, with the data of every output"""
+        simulation = Simulation(config_file)
+        simulation.run(trace_file=str(tmp_path / 'trace.json'))
+        profiler = simulation.profiler
+
+        assert profiler.stats[('Weather-0', 'step')].calls == 4
+        assert profiler.stats[('Weather-0', 'init')].calls == 1
+        assert profiler.stats[('Collector-0', 'step')].calls == 4  # a remote simulator
+        assert profiler.outputs[('Weather-0', 'CSV_0', 'Ta')] == [4, 12]
+        assert profiler.connections[('Weather-0', 'CSV_0', 'Ta')] == ['Weather.Ta -> monitor']
+        assert profiler.report().splitlines()[0].startswith('Simulator')
+
+        with open(tmp_path / 'trace.json') as _file:
+            events = json.load(_file)['traceEvents']
+        steps = [event for event in events if event['ph'] == 'X' and event['name'] == 'step']
+        assert len(steps) == 8
+        assert all(event['dur'] >= 0 for event in steps)
+
+    def test_direct_execution(self, tmp_path):
+        """calls made by the loop of the direct execution are recorded"""
+        simulation = Simulation(write_config(tmp_path, execution='direct'))
+        simulation.run(trace_file=str(tmp_path / 'trace.json'))
+        profiler = simulation.profiler
+
+        assert profiler.stats[('Weather-0', 'init')].calls == 1
+        assert profiler.stats[('Weather-0', 'step')].calls == 4
+        assert profiler.stats[('Collector-0', 'step')].calls == 4
+        assert profiler.outputs[('Weather-0', 'CSV_0', 'Ta')] == [4, 12]
+        assert profiler.connections[('Weather-0', 'CSV_0', 'Ta')] == ['Weather.Ta -> monitor']
+        with open(tmp_path / 'trace.json') as _file:
+            events = json.load(_file)['traceEvents']
+        assert len([event for event in events if event['ph'] == 'X' and event['name'] == 'step']) == 8
+
+    def test_detach(self):
+        """proxies are restored when leaving the context"""
+        send = LocalProxy.send
+        with Profiler().attach():
+            assert LocalProxy.send is not send
+        assert LocalProxy.send is send
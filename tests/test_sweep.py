@@ -0,0 +1,114 @@
+"""
+Unit tests for the sweep module.
+"""
+
+import pytest
+import pandas as pd
+from ruamel.yaml import YAML
+from schema import SchemaError
+from illuminator.sweep import expand_variants, set_parameter, redirect_results, run_sweep, sweep_schema
+
+
+@pytest.fixture
+def config():
+    return {'scenario': {'name': 'Sweep', 'start_time': '2012-01-01 00:00:00',
+                         'end_time': '2012-01-01 01:00:00', 'time_resolution': 900},
+            'models': [{'name': 'Weather', 'type': 'CSV',
+                        'parameters': {'start': '2012-01-01 00:00:00',
+                                       'datafile': './tests/data/solar-sample.csv'}}],
+            'connections': [],
+            'monitor': {'file': 'weather.csv', 'items': ['Weather.Ta']}}
+
+
+class TestExpandVariants:
+    """
+    Tests for the expand_variants function.
+    """
+
+    def test_grid(self):
+        variants = expand_variants(grid={'a.x': [1, 2], 'b.y': ['u', 'v']})
+        assert variants == [{'a.x': 1, 'b.y': 'u'}, {'a.x': 1, 'b.y': 'v'},
+                            {'a.x': 2, 'b.y': 'u'}, {'a.x': 2, 'b.y': 'v'}]
+
+    def test_samples_combined_with_grid(self):
+        variants = expand_variants(grid={'a.x': [1, 2]}, samples=[{'b.y': 'u'}, {'b.y': 'v'}])
+        assert variants == [{'b.y': 'u', 'a.x': 1}, {'b.y': 'u', 'a.x': 2},
+                            {'b.y': 'v', 'a.x': 1}, {'b.y': 'v', 'a.x': 2}]
+        assert expand_variants(samples=[{'b.y': 'u'}]) == [{'b.y': 'u'}]
+
+    def test_grid_or_samples_required(self):
+        with pytest.raises(SchemaError):
+            sweep_schema.validate({'scenario': 'config.yaml', 'output_dir': 'out'})
+
+
+class TestSetParameter:
+    """
+    Tests for the set_parameter function.
+    """
+
+    def test_model_and_section(self, config):
+        set_parameter(config, 'Weather.parameters.preload', True)
+        set_parameter(config, 'Weather.inputs.x', 1)  # missing sections are created
+        set_parameter(config, 'scenario.end_time', '2012-01-01 02:00:00')
+        assert config['models'][0]['parameters']['preload'] is True
+        assert config['models'][0]['inputs'] == {'x': 1}
+        assert config['scenario']['end_time'] == '2012-01-01 02:00:00'
+
+    def test_unknown_model(self, config):
+        with pytest.raises(KeyError):
+            set_parameter(config, 'PV.parameters.cap', 300)
+        with pytest.raises(KeyError):
+            set_parameter(config, 'Weather', 300)
+
+
+class TestRedirectResults:
+    """
+    Tests for the redirect_results function.
+    """
+
+    def test_results_and_checkpoints(self, config, tmp_path):
+        """Results files and checkpoints are written to the directory of the variant"""
+        config['monitor']['sinks'] = [{'type': 'sqlite', 'file': './results/out.db'}]
+        config['scenario']['checkpoint'] = {'every': 4, 'directory': './checkpoints/'}
+        redirect_results(config, str(tmp_path / 'variant-0'))
+        assert config['monitor']['file'] == str(tmp_path / 'variant-0' / 'weather.csv')
+        assert config['monitor']['sinks'][0]['file'] == str(tmp_path / 'variant-0' / 'out.db')
+        assert config['scenario']['checkpoint']['directory'] == str(tmp_path / 'variant-0' / 'checkpoints')
+
+        # the default directory of the checkpoints is redirected too
+        config['scenario']['checkpoint'] = {'every': 4}
+        redirect_results(config, str(tmp_path / 'variant-1'))
+        assert config['scenario']['checkpoint']['directory'] == str(tmp_path / 'variant-1' / 'checkpoints')
+
+
+class TestRunSweep:
+    """
+    Tests for the run_sweep function.
+    """
+
+    def test_variants_fail_one_at_a_time(self, config, tmp_path):
+        """every variant writes its own results, and invalid variants do not stop the sweep"""
+        scenario = tmp_path / 'config.yaml'
+        with open(scenario, 'w') as _file:
+            YAML(typ='safe').dump(config, _file)
+        output_dir = tmp_path / 'sweep'
+        sweep = {'scenario': str(scenario), 'output_dir': str(output_dir),
+                 'cache_dir': str(tmp_path / 'cache'),
+                 'grid': {'scenario.end_time': ['2012-01-01 00:30:00', '2012-01-01 01:00:00']},
+                 'samples': [{'Weather.parameters.preload': True},
+                             {'Weather.parameters.start': '2011-01-01 00:00:00'},  # not in the file
+                             {'PV.parameters.cap': 300}]}  # no such model
+
+        summary = run_sweep(sweep, workers=2)
+
+        assert list(summary['status']) == ['ok', 'ok', 'failed', 'failed', 'failed', 'failed']
+        assert summary['error'].iloc[4].startswith("Invalid parameter path 'PV.parameters.cap'")
+        assert pd.read_csv(output_dir / 'summary.csv')['variant'].tolist() == list(summary['variant'])
+        assert len(pd.read_csv(output_dir / 'variant-0' / 'weather.csv')) == 2
+        assert len(pd.read_csv(output_dir / 'variant-1' / 'weather.csv')) == 4
+        # the data file is parsed once, and read from the cache by the variants
+        with open(output_dir / 'variant-0' / 'config.yaml') as _file:
+            parameters = YAML(typ='safe').load(_file)['models'][0]['parameters']
+        assert parameters['cache'] and parameters['mmap']
+        assert parameters['cache_dir'] == str(tmp_path / 'cache')
+        assert (tmp_path / 'cache').exists()
@@ -0,0 +1,81 @@
+"""
+Unit tests for the cache of parsed input files.
+"""
+
+import os
+import shutil
+import numpy as np
+import pytest
+from illuminator.timeseries.cache import arrays_path, cache_key, cache_path, load_csv_cached
+
+DATAFILE = 'tests/data/solar-sample.csv'
+
+
+@pytest.fixture
+def datafile(tmp_path):
+    path = tmp_path / 'solar.csv'
+    shutil.copy(DATAFILE, path)
+    return str(path)
+
+
+class TestLoadCSVCached:
+    """
+    Tests for the load_csv_cached function.
+    """
+
+    def test_cache_is_created_and_used(self, datafile, monkeypatch):
+        """The second load reads the arrays instead of parsing the file"""
+        data = load_csv_cached(datafile)
+        directory = cache_path(datafile)
+        assert os.path.dirname(directory).endswith('.illuminator_cache')
+        arrays = arrays_path(directory, cache_key(datafile, date_format='YYYY-MM-DD HH:mm:ss',
+                                                  delimiter=','))
+        assert os.listdir(directory) == [os.path.basename(arrays)]
+        assert sorted(os.listdir(arrays)) == ['header.json', 'times.npy', 'values.npy']
+
+        def fail(*args):
+            raise AssertionError('the file was parsed again')
+        monkeypatch.setattr('illuminator.timeseries.cache.load_csv', fail)
+        cached = load_csv_cached(datafile)
+        assert cached.attrs == data.attrs
+        assert np.array_equal(cached.times, data.times)
+        assert np.array_equal(cached.values, data.values)
+
+    def test_cache_is_invalidated(self, datafile):
+        """Changes of the file or of the parsing options invalidate the cache"""
+        load_csv_cached(datafile)
+        with open(datafile, 'a') as file:
+            file.write('\n2012-01-01 02:00:00,1,1,1,1,1,1,1')
+        assert len(load_csv_cached(datafile).times) == 9
+        # the arrays of the previous version are removed
+        assert len(os.listdir(cache_path(datafile))) == 1
+
+        with pytest.raises(ValueError):
+            # the comma-separated file is parsed again with another delimiter
+            load_csv_cached(datafile, delimiter=';')
+
+    def test_cache_dir(self, datafile, tmp_path):
+        cache_dir = str(tmp_path / 'cache')
+        load_csv_cached(datafile, cache_dir=cache_dir)
+        assert os.listdir(cache_dir) == [os.path.basename(cache_path(datafile))]
+
+    def test_same_name_in_other_directory(self, datafile, tmp_path):
+        """Files with the same name in different directories do not share a cache"""
+        other = tmp_path / 'other'
+        other.mkdir()
+        with open(datafile) as source, open(other / 'solar.csv', 'w') as target:
+            target.write(source.read() + '\n2012-01-01 02:00:00,1,1,1,1,1,1,1')
+        cache_dir = str(tmp_path / 'cache')
+        assert len(load_csv_cached(datafile, cache_dir=cache_dir).times) == 8
+        assert len(load_csv_cached(str(other / 'solar.csv'), cache_dir=cache_dir).times) == 9
+        assert len(os.listdir(cache_dir)) == 2
+
+    def test_mmap(self, datafile):
+        """Cached values can be memory-mapped, also when the cache is created"""
+        data = load_csv_cached(datafile)
+        for _ in range(2):
+            mapped = load_csv_cached(datafile, mmap=True)
+            assert isinstance(mapped.values, np.memmap)
+            assert not mapped.values.flags.writeable
+            assert np.array_equal(mapped.values, data.values)
+            assert mapped.row(3) == data.row(3)
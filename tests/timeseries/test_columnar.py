@@ -0,0 +1,66 @@
+"""
+Unit tests for the loaders of Parquet and Feather input files.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from illuminator.timeseries.columnar import is_columnar, load_table, table_attrs
+from illuminator.timeseries.loader import load_csv
+
+pa = pytest.importorskip('pyarrow')
+
+DATAFILE = 'tests/data/solar-sample.csv'
+START = 1325376000  # 2012-01-01 00:00:00 UTC
+
+
+@pytest.fixture
+def frame():
+    return pd.read_csv(DATAFILE, skiprows=1, parse_dates=['Time'])
+
+
+@pytest.fixture(params=['parquet', 'feather', 'parquet-strings'])
+def datafile(request, tmp_path, frame):
+    """The sample data as Parquet or Feather, with timestamps or strings in the time column"""
+    if request.param == 'parquet-strings':
+        frame['Time'] = frame['Time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    if request.param == 'feather':
+        path = tmp_path / 'solar.feather'
+        frame.to_feather(path)
+    else:
+        path = tmp_path / 'solar.parquet'
+        frame.to_parquet(path, index=False, row_group_size=2)
+    return str(path)
+
+
+class TestLoadTable:
+    """
+    Tests for the load_table function.
+    """
+
+    def test_same_values_as_csv(self, datafile):
+        data = load_table(datafile)
+        expected = load_csv(DATAFILE)
+        assert data.attrs == expected.attrs
+        assert np.array_equal(data.times, expected.times)
+        assert np.array_equal(data.values, expected.values)
+
+    def test_columns_and_range(self, datafile):
+        """Only the requested columns and rows are read"""
+        data = load_table(datafile, columns=['Az', 'Ta'], start=START + 900, end=START + 2700)
+        assert data.attrs == ['Az', 'Ta']
+        assert list(data.times) == [START + 900, START + 1800, START + 2700]
+        assert data.values[:, 0].tolist() == [-165.92, -159.13, -152.63]
+
+    def test_unknown_column(self, datafile):
+        with pytest.raises(ValueError):
+            load_table(datafile, columns=['Wind'])
+
+    def test_table_attrs(self, datafile):
+        """Attributes are read from the schema"""
+        assert table_attrs(datafile) == ['G_Gh', 'G_Dh', 'G_Bn', 'Ta', 'hs', 'FF', 'Az']
+
+
+def test_is_columnar():
+    assert is_columnar('data.parquet') and is_columnar('data.feather')
+    assert not is_columnar('data.csv')
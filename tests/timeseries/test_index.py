@@ -0,0 +1,52 @@
+"""
+Unit tests for the sparse time index of CSV input files.
+"""
+
+import os
+import shutil
+import numpy as np
+import pytest
+from illuminator.timeseries.cache import cache_path
+from illuminator.timeseries.index import build_index, load_index, seek_offset
+
+DATAFILE = 'tests/data/solar-sample.csv'
+START = 1325376000  # 2012-01-01 00:00:00 UTC
+
+
+@pytest.fixture
+def datafile(tmp_path):
+    path = tmp_path / 'solar.csv'
+    shutil.copy(DATAFILE, path)
+    return str(path)
+
+
+class TestIndex:
+    """
+    Tests for the time index functions.
+    """
+
+    def test_offsets_point_to_rows(self, datafile):
+        """Every indexed offset is the start of the row with the indexed timestamp"""
+        index = build_index(datafile, every=3)
+        assert list(index[:, 0]) == [START, START + 2700, START + 5400]
+        with open(datafile, 'rb') as file:
+            for _, offset in index:
+                file.seek(offset)
+                assert file.readline().startswith(b'2012-01-01')
+            file.seek(index[1, 1])
+            assert file.readline().startswith(b'2012-01-01 00:45:00')
+
+    def test_seek_offset(self, datafile):
+        index = build_index(datafile, every=3)
+        assert seek_offset(index, START + 3600) == index[1, 1]
+        assert seek_offset(index, START + 2700) == index[1, 1]
+        assert seek_offset(index, START - 900) == index[0, 1]
+
+    def test_index_is_stored_and_rebuilt(self, datafile):
+        index = load_index(datafile, every=4)
+        assert os.path.exists(os.path.join(cache_path(datafile), 'index.npy'))
+        assert np.array_equal(load_index(datafile, every=4), index)
+
+        with open(datafile, 'a') as file:
+            file.write('\n2012-01-01 02:00:00,1,1,1,1,1,1,1')
+        assert load_index(datafile, every=4)[-1, 0] == START + 7200
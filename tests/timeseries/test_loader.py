@@ -0,0 +1,56 @@
+"""
+Unit tests for the loaders of the timeseries package.
+"""
+
+import numpy as np
+import pytest
+from illuminator.timeseries.loader import TimeSeries, load_csv, parse_attrs
+
+DATAFILE = 'tests/data/solar-sample.csv'
+START = 1325376000  # 2012-01-01 00:00:00 UTC
+
+
+class TestLoadCSV:
+    """
+    Tests for the load_csv function.
+    """
+
+    def test_arrays(self):
+        """Timestamps are seconds since the epoch and values a float matrix"""
+        data = load_csv(DATAFILE)
+        assert data.attrs == ['G_Gh', 'G_Dh', 'G_Bn', 'Ta', 'hs', 'FF', 'Az']
+        assert data.times.dtype == np.int64
+        assert list(data.times) == [START + 900 * i for i in range(8)]
+        assert data.values.shape == (8, 7)
+        assert data.row(1)['Az'] == -165.92
+
+    def test_delimiter_and_date_format(self, tmp_path):
+        path = tmp_path / 'data.csv'
+        path.write_text('Data\nTime;a # comment;b\n01/01/2012 00:00;1;2\n01/01/2012 01:00;3;4\n')
+        data = load_csv(str(path), date_format='DD/MM/YYYY HH:mm', delimiter=';')
+        assert data.attrs == ['a', 'b']
+        assert list(data.times) == [START, START + 3600]
+        assert data.values.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+
+
+class TestTimeSeries:
+    """
+    Tests for the TimeSeries class.
+    """
+
+    def test_index_of(self):
+        """Rows are found by timestamp"""
+        data = load_csv(DATAFILE)
+        assert data.index_of(START + 900 * 5) == 5
+        with pytest.raises(KeyError):
+            data.index_of(START + 100)
+        with pytest.raises(KeyError):
+            data.index_of(START + 900 * 8)
+
+    def test_unsorted_timestamps(self):
+        with pytest.raises(ValueError):
+            TimeSeries(np.array([2, 1]), np.zeros((2, 1)), ['a'])
+
+
+def test_parse_attrs():
+    assert parse_attrs('Time,a#kW, b \n') == ['a', 'b']
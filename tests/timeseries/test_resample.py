@@ -0,0 +1,51 @@
+"""
+Unit tests for the resampling of time series.
+"""
+
+import numpy as np
+import pytest
+from illuminator.timeseries.loader import TimeSeries
+from illuminator.timeseries.resample import resample
+
+
+@pytest.fixture
+def data():
+    """Values every 30 minutes, with a NaN in the second column"""
+    times = np.arange(0, 4 * 1800, 1800)
+    values = np.array([[0.0, 1.0], [2.0, np.nan], [4.0, 3.0], [6.0, 5.0]])
+    return TimeSeries(times, values, ['a', 'b'])
+
+
+class TestResample:
+    """
+    Tests for the resample function.
+    """
+
+    def test_hold(self, data):
+        """Upsampling holds the last value"""
+        result = resample(data, 0, 900, 'hold')
+        assert list(result.times) == list(range(0, 5401, 900))
+        assert list(result.values[:, 0]) == [0.0, 0.0, 2.0, 2.0, 4.0, 4.0, 6.0]
+
+    def test_linear(self, data):
+        result = resample(data, 900, 900, 'linear')
+        assert list(result.values[:, 0]) == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+    def test_mean(self, data):
+        """Downsampling averages the rows of each step, ignoring NaN"""
+        result = resample(data, 0, 3600, 'mean')
+        assert list(result.times) == [0, 3600]
+        assert result.values.tolist() == [[1.0, 1.0], [5.0, 4.0]]
+
+    def test_mean_upsampling_holds(self, data):
+        """Steps without rows hold the previous value"""
+        result = resample(data, 0, 900, 'mean')
+        assert list(result.values[:, 0]) == [0.0, 0.0, 2.0, 2.0, 4.0, 4.0, 6.0]
+
+    def test_start_outside_data(self, data):
+        with pytest.raises(KeyError):
+            resample(data, -900, 900)
+
+    def test_unknown_method(self, data):
+        with pytest.raises(ValueError):
+            resample(data, 0, 900, 'cubic')
@@ -0,0 +1,53 @@
+"""
+Unit tests for the timestamp parsers of the timeseries package.
+"""
+
+import arrow
+import pytest
+from illuminator.timeseries.timestamps import parse_time, parse_times
+
+START = 1325376000  # 2012-01-01 00:00:00 UTC
+
+
+class TestParseTimes:
+    """
+    Tests for the parse_times function.
+    """
+
+    def test_vectorized_and_fallback(self):
+        """Formats without strptime equivalent are parsed by arrow, with the same result"""
+        assert list(parse_times(['2012-01-01 00:15:00'])) == [START + 900]
+        assert list(parse_times(['1325376900'], date_format='X')) == [START + 900]
+        assert list(parse_times(['2012-01-01T00:15:00Z'], date_format='YYYY-MM-DDTHH:mm:ssZ')) == [START + 900]
+
+    def test_default_format_outside_fast_path(self):
+        """Whitespace and dates out of the range of pandas are parsed like arrow does"""
+        values = [' 2012-01-01 00:15:00', '2400-02-29 00:00:00']
+        assert list(parse_times(values)) == [START + 900, arrow.get('2400-02-29 00:00:00').int_timestamp]
+
+    def test_invalid_date(self):
+        """Invalid dates raise an error, also in the fast path"""
+        with pytest.raises(ValueError):
+            parse_times(['2012-01-01 00:00:00', '2013-02-29 00:00:00'])
+
+    def test_empty(self):
+        assert len(parse_times([])) == 0
+
+
+class TestParseTime:
+    """
+    Tests for the parse_time function.
+    """
+
+    @pytest.mark.parametrize('value', ['2012-02-29 12:00:00', '1999-12-31 23:59:59', '2038-01-19 03:14:08'])
+    def test_same_as_arrow(self, value):
+        assert parse_time(value) == arrow.get(value, 'YYYY-MM-DD HH:mm:ss').int_timestamp
+
+    def test_other_format(self):
+        assert parse_time('01/01/2012 00:15', 'DD/MM/YYYY HH:mm') == START + 900
+
+    def test_invalid_date(self):
+        with pytest.raises(ValueError):
+            parse_time('2013-02-29 00:00:00')
+        with pytest.raises(ValueError):
+            parse_time('2012-01-01T00:00:00')